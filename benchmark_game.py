@@ -0,0 +1,288 @@
+import os
+
+# Окно не нужно: SDL работает с виртуальным дисплеем (до импорта pygame)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import contextlib
+import gc
+import io
+import random
+import sys
+import time
+import numpy as np
+import pygame
+from ecs.game import Game
+from ecs.components.components import Enemy, Health, Position
+from ecs.utils.input_source import ScriptedInput
+from ecs.utils.profiler import FrameProfiler
+from ecs.utils.sprite_manager import sprite_manager
+
+# Размеры лабиринтов (в тайлах), число врагов и длительность прогона по умолчанию
+MAZE_SIZES = [30, 60, 90]
+ENEMY_COUNTS = [3, 20, 60]
+TICKS = 600
+# Фиксированный шаг симуляции (60 тиков в секунду игрового времени)
+DT = 1 / 60
+# Число систем в таблице времени каждого прогона
+TOP_SYSTEMS = 8
+
+# Направления движения игрока по сценарию: меняются каждые WALK_PHASE тиков
+WALK_KEYS = [pygame.K_d, pygame.K_s, pygame.K_a, pygame.K_w]
+WALK_PHASE = 40
+# Стрельба каждые FIRE_PERIOD тиков
+FIRE_PERIOD = 3
+
+def apply_script(game, input_source, player_id, tick, walk=True):
+    """
+    Выставляет ввод на тик: игрок обходит лабиринт по кругу, целится в ближайшего
+    врага и стреляет. Сценарий зависит только от номера тика и состояния мира
+    :param game: Сборка игры
+    :param input_source: Сценарный источник ввода
+    :param player_id: ID сущности игрока
+    :param tick: Номер тика
+    :param walk: Двигаться ли игроку (False - стоит на месте и только стреляет)
+    """
+    world = game.world
+    player_pos = world.get_component(player_id, Position)
+    mouse_pos = None
+    if player_pos is not None:
+        nearest = None
+        nearest_distance = None
+        for enemy_id in world.query(Enemy, Position):
+            enemy_pos = world.get_component(enemy_id, Position)
+            distance = (enemy_pos.x - player_pos.x) ** 2 + (enemy_pos.y - player_pos.y) ** 2
+            if nearest_distance is None or distance < nearest_distance:
+                nearest, nearest_distance = enemy_pos, distance
+        if nearest is not None:
+            screen_x, screen_y = game.camera_system.world_to_screen(nearest.x, nearest.y)
+            mouse_pos = (int(screen_x), int(screen_y))
+
+    input_source.set_state(
+        keys=(WALK_KEYS[(tick // WALK_PHASE) % len(WALK_KEYS)],) if walk else (),
+        mouse_pos=mouse_pos,
+        mouse_buttons=(tick % FIRE_PERIOD == 0, False, False),
+    )
+
+def run_simulation(game, input_source, player_id, ticks, render):
+    """
+    Выполняет тики с фиксированным шагом без ожидания между кадрами
+    :param game: Сборка игры
+    :param input_source: Сценарный источник ввода
+    :param player_id: ID сущности игрока
+    :param ticks: Число тиков
+    :param render: Выполнять ли проходы отрисовки
+    :return: Кортеж (время в секундах, выполнено тиков)
+    """
+    world = game.world
+    profiler = world.profiler
+    done = 0
+    start_time = time.perf_counter()
+    for tick in range(ticks):
+        apply_script(game, input_source, player_id, tick)
+        world.update(DT)
+        if render:
+            # Подготовка кадра начинает кадр очереди отрисовки (иначе отмеченные области копятся)
+            game.render_system.prepare_frame()
+            world.render()
+        profiler.end_frame(len(world.entities))
+        done += 1
+
+        # После смерти игрока игра показывает экран окончания, продолжать прогон нет смысла
+        health = world.get_component(player_id, Health)
+        if health is None or health.current <= 0:
+            break
+    return time.perf_counter() - start_time, done
+
+def run_benchmark(screen, size, enemies, ticks, seed, render, csv_dir=None):
+    """
+    Собирает игру, создает уровень и выполняет прогон
+    :param screen: Поверхность для отрисовки
+    :param size: Размер лабиринта в тайлах
+    :param enemies: Число врагов
+    :param ticks: Число тиков
+    :param seed: Значение random.seed
+    :param render: Выполнять ли проходы отрисовки
+    :param csv_dir: Папка для покадровых замеров в CSV (None - не сохранять)
+    :return: Словарь с результатами прогона
+    """
+    random.seed(seed)
+    input_source = ScriptedInput()
+
+    # Системы и генератор уровня печатают отладочную информацию, она здесь не нужна
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Game(screen, input_source)
+        if render:
+            game.add_render_passes()
+        player_id = game.reset(level_width=size, level_height=size, enemy_count=enemies)
+        game.world.profiler = FrameProfiler(history=ticks)
+
+        # Мусор от создания уровня не должен попасть в счетчики прогона
+        gc.collect()
+        collections_before = [stats['collections'] for stats in gc.get_stats()]
+        blocks_before = sys.getallocatedblocks()
+
+        elapsed, done = run_simulation(game, input_source, player_id, ticks, render)
+
+        blocks_after = sys.getallocatedblocks()
+        collections = [stats['collections'] - before for stats, before in zip(gc.get_stats(), collections_before)]
+
+    if csv_dir is not None:
+        os.makedirs(csv_dir, exist_ok=True)
+        game.world.profiler.dump_csv(os.path.join(csv_dir, f"benchmark_{size}x{size}_{enemies}.csv"))
+
+    world = game.world
+    player_pos = world.get_component(player_id, Position)
+    return {
+        'ticks': done,
+        'elapsed': elapsed,
+        'collections': collections,
+        'blocks': blocks_after - blocks_before,
+        'entities': len(world.entities),
+        'enemies': len(world.query(Enemy)),
+        'kills': game.game_progress.enemies_killed,
+        'player': (round(player_pos.x, 2), round(player_pos.y, 2)) if player_pos is not None else None,
+        'summary': world.profiler.get_summary(),
+    }
+
+def count_different_pixels(surface, other):
+    """
+    Считает пиксели, которые различаются на двух поверхностях одного размера
+    :param surface: Первая поверхность
+    :param other: Вторая поверхность
+    :return: Число различающихся пикселей
+    """
+    return int(np.any(pygame.surfarray.array3d(surface) != pygame.surfarray.array3d(other), axis=2).sum())
+
+def check_dirty_rects(screen, size, enemies, ticks, seed, walk):
+    """
+    Прогоняет игру в режиме перерисовки изменившихся областей и сравнивает каждый частичный
+    кадр с полной перерисовкой того же состояния (с тем же смещением камеры). Содержимое
+    дисплея моделируется отдельной поверхностью, в которую попадают только выведенные области
+    :param screen: Поверхность для отрисовки
+    :param size: Размер лабиринта в тайлах
+    :param enemies: Число врагов
+    :param ticks: Число тиков
+    :param seed: Значение random.seed
+    :param walk: Двигаться ли игроку по сценарию
+    :return: Словарь с числом тиков, частичных кадров, кадров с расхождением и наибольшим
+             числом различающихся пикселей
+    """
+    random.seed(seed)
+    input_source = ScriptedInput()
+    result = {'ticks': 0, 'partial': 0, 'mismatched': 0, 'max_pixels': 0, 'first_mismatch': None}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Game(screen, input_source)
+        game.add_render_passes()
+        player_id = game.reset(level_width=size, level_height=size, enemy_count=enemies)
+        world = game.world
+        render_system = game.render_system
+        render_queue = render_system.render_queue
+        render_system.dirty_rects_enabled = True
+        shown = pygame.Surface(screen.get_size())
+
+        for tick in range(ticks):
+            apply_script(game, input_source, player_id, tick, walk)
+            world.update(DT)
+            result['ticks'] += 1
+
+            dirty_rects = render_system.prepare_frame()
+            if dirty_rects is None:
+                world.render()
+                shown.blit(screen, (0, 0))
+            else:
+                result['partial'] += 1
+                if dirty_rects:
+                    screen.set_clip(dirty_rects[0].unionall(dirty_rects[1:]))
+                    world.render()
+                    screen.set_clip(None)
+                for rect in dirty_rects:
+                    shown.blit(screen, rect, rect)
+
+                # Полная перерисовка того же кадра для сравнения
+                render_queue.partial_frame = False
+                render_queue.frame_rects = None
+                world.render()
+                pixels = count_different_pixels(shown, screen)
+                if pixels:
+                    result['mismatched'] += 1
+                    result['max_pixels'] = max(result['max_pixels'], pixels)
+                    if result['first_mismatch'] is None:
+                        result['first_mismatch'] = tick
+
+            health = world.get_component(player_id, Health)
+            if health is None or health.current <= 0:
+                break
+    return result
+
+def parse_args():
+    """
+    Разбирает аргументы командной строки
+    :return: Пространство имен argparse
+    """
+    parser = argparse.ArgumentParser(description="Прогон игры без окна с фиксированным шагом и сценарным вводом")
+    parser.add_argument("--ticks", type=int, default=TICKS, help="число тиков в каждом прогоне")
+    parser.add_argument("--sizes", type=int, nargs="+", default=MAZE_SIZES, help="размеры лабиринтов в тайлах")
+    parser.add_argument("--enemies", type=int, nargs="+", default=ENEMY_COUNTS, help="число врагов")
+    parser.add_argument("--seed", type=int, default=42, help="значение random.seed для каждого прогона")
+    parser.add_argument("--no-render", action="store_true", help="не выполнять проходы отрисовки")
+    parser.add_argument("--csv", metavar="DIR", help="сохранить покадровые замеры каждого прогона в папку")
+    parser.add_argument("--check-dirty", action="store_true",
+                        help="вместо замеров сравнить кадры режима перерисовки изменившихся областей с полной перерисовкой")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    render = not args.no_render
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    with contextlib.redirect_stdout(io.StringIO()):
+        sprite_manager.load_sprites()
+
+    if args.check_dirty:
+        return check_main(screen, args)
+
+    print(f"Тиков: {args.ticks}, шаг {DT * 1000:.2f} мс, seed {args.seed}, отрисовка: {'да' if render else 'нет'}")
+    for size in args.sizes:
+        for enemies in args.enemies:
+            result = run_benchmark(screen, size, enemies, args.ticks, args.seed, render, args.csv)
+            ticks_per_second = result['ticks'] / result['elapsed'] if result['elapsed'] > 0 else 0
+            gen0, gen1, gen2 = result['collections']
+
+            print()
+            print(f"Лабиринт {size}x{size}, врагов {enemies}: {result['ticks']} тиков за {result['elapsed']:.2f} с"
+                  f" ({ticks_per_second:.1f} тиков/с)")
+            print(f"  Сборки мусора (поколения 0/1/2): {gen0}/{gen1}/{gen2}, прирост блоков памяти: {result['blocks']:+d}")
+            print(f"  Итог: сущностей {result['entities']}, врагов {result['enemies']}, убито {result['kills']},"
+                  f" игрок {result['player']}")
+            print(f"  {'Система':<34}{'среднее':>9}{'p50':>8}{'p95':>8}{'p99':>8}  мс")
+            for row in result['summary'][:TOP_SYSTEMS]:
+                print(f"  {row['name']:<34}{row['mean']:>9.3f}{row['p50']:>8.3f}{row['p95']:>8.3f}{row['p99']:>8.3f}")
+
+def check_main(screen, args):
+    """
+    Проверяет режим перерисовки изменившихся областей для всех лабиринтов и чисел врагов:
+    игрок идет по сценарию или стоит на месте и стреляет
+    :param screen: Поверхность для отрисовки
+    :param args: Аргументы командной строки
+    :return: Код завершения (1, если хотя бы один кадр отличается от полной перерисовки)
+    """
+    print(f"Проверка перерисовки изменившихся областей: тиков {args.ticks}, seed {args.seed}")
+    failed = False
+    for size in args.sizes:
+        for enemies in args.enemies:
+            for walk in (True, False):
+                result = check_dirty_rects(screen, size, enemies, args.ticks, args.seed, walk)
+                failed = failed or result['mismatched'] > 0
+                status = "ок" if not result['mismatched'] else (f"расхождений {result['mismatched']},"
+                                                               f" до {result['max_pixels']} пикселей,"
+                                                               f" первое на тике {result['first_mismatch']}")
+                print(f"  Лабиринт {size}x{size}, врагов {enemies}, {'ходьба' if walk else 'стоя'}:"
+                      f" {result['ticks']} тиков, частичных кадров {result['partial']} - {status}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
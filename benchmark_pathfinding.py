@@ -0,0 +1,80 @@
+import random
+import time
+import io
+import contextlib
+from ecs.factories.prim_maze_generator import generate_prim_maze
+from ecs.pathfinding.dijkstra import DijkstraPathfinder
+from ecs.pathfinding.astar import AStarPathfinder
+
+# Размеры лабиринтов (в тайлах) и число запросов на каждый лабиринт
+MAZE_SIZES = [30, 60, 90, 120]
+QUERIES_PER_MAZE = 200
+# Доля стен, которые убираются, чтобы в лабиринте появились циклы и равные по длине пути
+LOOP_WALL_RATIO = 0.1
+
+def build_maze(size, loops):
+    """
+    Генерирует лабиринт для замера
+    :param size: Размер лабиринта в тайлах
+    :param loops: Пробивать ли стены, создавая циклы
+    :return: Кортеж (карта, ширина, высота)
+    """
+    # Генератор печатает отладочную информацию, она здесь не нужна
+    with contextlib.redirect_stdout(io.StringIO()):
+        level_map = generate_prim_maze(size, size, corridor_width=1)
+
+    height = len(level_map)
+    width = len(level_map[0])
+
+    if loops:
+        for y in range(1, height - 1):
+            for x in range(1, width - 1):
+                if level_map[y][x] == 1 and random.random() < LOOP_WALL_RATIO:
+                    level_map[y][x] = 2
+
+    return level_map, width, height
+
+def build_queries(level_map, width, height, count):
+    """
+    Выбирает случайные пары проходимых клеток
+    :param level_map: Карта уровня
+    :param width: Ширина карты
+    :param height: Высота карты
+    :param count: Количество запросов
+    :return: Список кортежей (start_x, start_y, target_x, target_y) в мировых координатах
+    """
+    cells = [(x * 32 + 16, y * 32 + 16) for y in range(height) for x in range(width)
+             if level_map[y][x] in (2, 3, 4)]
+    return [random.choice(cells) + random.choice(cells) for _ in range(count)]
+
+def run_queries(pathfinder, queries):
+    """
+    Выполняет запросы и замеряет время
+    :param pathfinder: Объект поиска пути
+    :param queries: Список запросов
+    :return: Кортеж (время в секундах, список найденных путей)
+    """
+    start_time = time.perf_counter()
+    paths = [pathfinder.find_path(*query) for query in queries]
+    return time.perf_counter() - start_time, paths
+
+def main():
+    random.seed(42)
+
+    print(f"{'Лабиринт':<16}{'Дейкстра, мс':>14}{'A*, мс':>10}{'Ускорение':>11}  Пути")
+    for loops in (False, True):
+        for size in MAZE_SIZES:
+            level_map, width, height = build_maze(size, loops)
+            queries = build_queries(level_map, width, height, QUERIES_PER_MAZE)
+
+            dijkstra_time, dijkstra_paths = run_queries(DijkstraPathfinder(level_map, width, height), queries)
+            astar_time, astar_paths = run_queries(AStarPathfinder(level_map, width, height), queries)
+
+            mismatches = sum(1 for a, b in zip(dijkstra_paths, astar_paths) if a != b)
+            label = f"{width}x{height}" + (" с циклами" if loops else "")
+            status = "совпадают" if mismatches == 0 else f"РАЗЛИЧАЮТСЯ: {mismatches}"
+            print(f"{label:<16}{dijkstra_time * 1000 / len(queries):>14.3f}{astar_time * 1000 / len(queries):>10.3f}"
+                  f"{dijkstra_time / astar_time:>10.1f}x  {status}")
+
+if __name__ == "__main__":
+    main()
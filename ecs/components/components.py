@@ -93,6 +93,8 @@ class Bullet:
         self.radius = radius  # Радиус пули для проверки столкновений
         self.lifetime = lifetime  # Время жизни пули в секундах
         self.timer = 0
+        self.prev_x = None  # Позиция на момент последней проверки столкновений
+        self.prev_y = None  # (None - пуля еще не проверялась)
 
 class Health:
     """Компонент здоровья"""
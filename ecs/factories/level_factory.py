@@ -3,6 +3,7 @@ import pygame
 from ecs.components.components import Position, Sprite, Collider, Tile, Portal, Minimap
 from ecs.factories.prim_maze_generator import generate_prim_maze
 from ecs.utils.sprite_manager import sprite_manager
+from ecs.utils.tile_grid import TileGrid
 
 # Загружаем текстуры или создаем их
 def get_textures():
@@ -35,6 +36,9 @@ def create_level(world, width, height):
     tile_size = 32
     level_entities = []
     
+    # Плотная сетка тайлов, которая публикуется как ресурс мира
+    tile_grid = TileGrid(width, height, tile_size)
+    
     # Загружаем текстуры
     textures = get_textures()
     
@@ -165,6 +169,7 @@ def create_level(world, width, height):
                     print("ОШИБКА: Не удалось добавить компоненты к порталу!")
                 
                 # Пропускаем добавление стандартного спрайта
+                tile_grid.set_tile(x, y, tile_type, walkable, False, tile_id)
                 level_entities.append(tile_id)
                 continue
             else:
@@ -190,8 +195,12 @@ def create_level(world, width, height):
             if not walkable:
                 world.add_component(tile_id, Collider(width=tile_size, height=tile_size))
             
+            tile_grid.set_tile(x, y, tile_type, walkable, not walkable, tile_id)
             level_entities.append(tile_id)
     
+    # Публикуем сетку тайлов: системы проверяют стены по ней за O(1)
+    world.add_resource(tile_grid)
+    
     # Создаем мини-карту, если найдены вход и выход
     if entrance_pos and exit_pos:
         create_minimap(world, level_map, entrance_pos, exit_pos, width, height)
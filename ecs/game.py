@@ -0,0 +1,191 @@
+import random
+from ecs.world import World
+from ecs.systems.render_system import RenderSystem
+from ecs.systems.movement_system import MovementSystem
+from ecs.systems.player_control_system import PlayerControlSystem
+from ecs.systems.collision_system import CollisionSystem
+from ecs.systems.enemy_system import EnemySystem
+from ecs.systems.weapon_system import WeaponSystem
+from ecs.systems.camera_system import CameraSystem
+from ecs.systems.enemy_ai_system import EnemyAISystem
+from ecs.systems.health_system import HealthSystem
+from ecs.systems.lighting_system import LightingSystem
+from ecs.systems.particle_system import ParticleSystem
+from ecs.systems.effects_system import EffectsSystem
+from ecs.systems.portal_system import PortalSystem
+from ecs.systems.direction_indicator_system import DirectionIndicatorSystem
+from ecs.systems.minimap_system import MinimapSystem
+from ecs.factories.player_factory import create_player
+from ecs.factories.level_factory import create_level
+from ecs.factories.enemy_factory import create_enemy
+from ecs.components.components import Position, Tile, GameProgress
+
+class Game:
+    """
+    Сборка игры: мир ECS со всеми системами в порядке выполнения, проходы отрисовки
+    и создание уровня. Используется и окном игры (main.py), и запуском без окна
+    (benchmark_game.py), поэтому оба работают с одним и тем же миром
+    """
+
+    def __init__(self, screen, input_source=None):
+        """
+        Создает мир и системы
+        :param screen: Поверхность Pygame для отрисовки (ее размер задает видимую область камеры)
+        :param input_source: Источник ввода игрока (None - клавиатура и мышь pygame)
+        """
+        screen_width, screen_height = screen.get_size()
+        self.screen = screen
+
+        # Создаем мир ECS
+        self.world = World()
+        world = self.world
+
+        # Компонент прогресса игры (общий для систем и интерфейса)
+        self.game_progress = GameProgress()
+
+        # Создаем системы
+        self.camera_system = CameraSystem(world, screen_width, screen_height)
+        self.render_system = RenderSystem(world, screen, self.camera_system)
+        self.movement_system = MovementSystem(world)
+        self.player_control_system = PlayerControlSystem(world, input_source)
+        self.collision_system = CollisionSystem(world)
+        self.enemy_system = EnemySystem(world)
+        self.weapon_system = WeaponSystem(world, screen)
+        self.enemy_ai_system = EnemyAISystem(world)
+        self.health_system = HealthSystem(world, screen, self.camera_system)
+        self.portal_system = PortalSystem(world)
+        self.direction_indicator_system = DirectionIndicatorSystem(world, screen, self.camera_system)
+        self.minimap_system = MinimapSystem(world, screen)
+        self.lighting_system = LightingSystem(world, screen, self.camera_system)
+        self.particle_system = ParticleSystem(world, screen, self.camera_system)
+        self.effects_system = EffectsSystem(world, screen, self.camera_system)
+
+        # Добавляем системы в мир в порядке их выполнения
+        world.add_system(self.player_control_system)
+        world.add_system(self.enemy_ai_system)
+        world.add_system(self.movement_system)
+        world.add_system(self.collision_system)
+        world.add_system(self.enemy_system)
+        world.add_system(self.weapon_system)
+        world.add_system(self.particle_system)
+        world.add_system(self.effects_system)
+        world.add_system(self.health_system)
+        world.add_system(self.portal_system)
+        world.add_system(self.camera_system)
+        world.add_system(self.direction_indicator_system)
+        world.add_system(self.minimap_system)
+        world.add_system(self.render_system)
+        world.add_system(self.lighting_system)
+
+        # Устанавливаем систему оружия для PlayerControlSystem
+        self.player_control_system.set_weapon_system(self.weapon_system)
+
+    def add_render_passes(self):
+        """
+        Добавляет проходы отрисовки кадра в порядке наложения. Системы в world.update только
+        обновляют состояние, а на экран кадр выводится один раз в world.render.
+        Интерфейс поверх кадра (FPS, справка) вызывающий код добавляет сам после этих проходов
+        """
+        world = self.world
+        world.add_render_pass("clear", lambda: self.render_system.render_queue.fill((0, 0, 0)))
+        world.add_render_pass("world", self.render_system.render_world)
+        world.add_render_pass("particles", self.particle_system.render)
+        world.add_render_pass("darkness", self.render_system.render_darkness)
+        world.add_render_pass("lighting", self.lighting_system.render)
+        world.add_render_pass("effects", self.effects_system.render)
+        world.add_render_pass("health", lambda: self.health_system.render(self.camera_system))
+        world.add_render_pass("direction_indicator", self.direction_indicator_system.render)
+        world.add_render_pass("minimap", self.minimap_system.render)
+        world.add_render_pass("ui", self.render_system.render_ui)
+
+    def reset(self, level_width=30, level_height=30, enemy_count=3):
+        """
+        Сбрасывает игру и создает новый уровень
+        :param level_width: Ширина лабиринта в тайлах
+        :param level_height: Высота лабиринта в тайлах
+        :param enemy_count: Количество врагов на уровне
+        :return: ID сущности игрока
+        """
+        world = self.world
+
+        # Удаляем все сущности
+        world.clear_entities()
+
+        # Сбрасываем прогресс игры
+        self.game_progress.reset()
+
+        # Создаем новый уровень (лабиринт)
+        level_entities = create_level(world, level_width, level_height)
+
+        # Находим начальную позицию (вход в лабиринт)
+        entrance_pos = None
+        for entity_id in level_entities:
+            if world.has_component(entity_id, Tile):
+                tile = world.get_component(entity_id, Tile)
+                if tile.name == "entrance":
+                    entrance_pos = world.get_component(entity_id, Position)
+                    break
+
+        # Если не нашли вход, ищем любую проходимую позицию
+        if not entrance_pos:
+            walkable_positions = []
+            for entity_id in level_entities:
+                if world.has_component(entity_id, Tile):
+                    tile = world.get_component(entity_id, Tile)
+                    if tile.walkable:
+                        pos = world.get_component(entity_id, Position)
+                        walkable_positions.append((pos.x, pos.y))
+
+            if walkable_positions:
+                # Выбираем случайную проходимую позицию
+                x, y = random.choice(walkable_positions)
+                entrance_pos = Position(x, y)
+            else:
+                # Если не нашли проходимых позиций, используем дефолтную
+                entrance_pos = Position(100, 100)
+
+        # Создаем игрока
+        player_id = create_player(world, entrance_pos.x, entrance_pos.y)
+
+        # Собираем все проходимые тайлы
+        floor_tiles = []
+        for entity_id in level_entities:
+            if world.has_component(entity_id, Tile):
+                tile = world.get_component(entity_id, Tile)
+                if tile.walkable and tile.name == "floor":
+                    pos = world.get_component(entity_id, Position)
+                    floor_tiles.append((pos.x, pos.y))
+
+        # Создаем врагов на случайных проходимых тайлах
+        if floor_tiles:
+            player_pos = world.get_component(player_id, Position)
+            for _ in range(enemy_count):
+                # Выбираем случайную позицию
+                x, y = random.choice(floor_tiles)
+                distance = ((x - player_pos.x) ** 2 + (y - player_pos.y) ** 2) ** 0.5
+
+                # Если позиция слишком близко к игроку, пробуем другую
+                attempts = 0
+                while distance < 200 and attempts < 10:
+                    x, y = random.choice(floor_tiles)
+                    distance = ((x - player_pos.x) ** 2 + (y - player_pos.y) ** 2) ** 0.5
+                    attempts += 1
+
+                # Создаем врага
+                create_enemy(world, x, y)
+
+        # Устанавливаем камеру на игрока
+        self.camera_system.follow(player_id)
+
+        # Передаем компонент прогресса в систему порталов
+        self.portal_system.game_progress = self.game_progress
+
+        # Удаляем частицы и эффекты прошлого уровня
+        self.particle_system.clear()
+        self.effects_system.clear()
+
+        # Помечаем кэш стен как устаревший, чтобы обновить его
+        if hasattr(self.lighting_system, 'wall_cache_dirty'):
+            self.lighting_system.wall_cache_dirty = True
+
+        return player_id
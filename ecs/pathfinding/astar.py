@@ -0,0 +1,144 @@
+import heapq
+
+class AStarPathfinder:
+    """
+    Реализация алгоритма A* для поиска кратчайшего пути с манхэттенской эвристикой.
+    Интерфейс и результаты совпадают с DijkstraPathfinder, но карта проходимости
+    строится один раз, а расстояния хранятся в плоском массиве, который не нужно
+    очищать между запросами: актуальность значения определяется номером поколения
+    """
+
+    def __init__(self, level_map, width, height):
+        """
+        Инициализирует поиск пути
+        :param level_map: Карта уровня (двумерный массив)
+        :param width: Ширина карты
+        :param height: Высота карты
+        """
+        self.level_map = level_map
+        self.width = width
+        self.height = height
+        self.tile_size = 32
+
+        # Карта проходимости: 1 - проходимый тайл (код 2, 3 или 4), индекс = y * width + x
+        size = width * height
+        self.walkable = bytearray(size)
+        for y in range(height):
+            row = level_map[y]
+            for x in range(width):
+                if row[x] in (2, 3, 4):
+                    self.walkable[y * width + x] = 1
+
+        # Расстояния от старта и поколение, в котором они были записаны
+        self.distances = [0] * size
+        self.generations = [0] * size
+        self.generation = 0
+
+    def find_path(self, start_x, start_y, target_x, target_y, max_distance=100):
+        """
+        Находит кратчайший путь от начальной точки до целевой
+        :param start_x: Начальная позиция X
+        :param start_y: Начальная позиция Y
+        :param target_x: Целевая позиция X
+        :param target_y: Целевая позиция Y
+        :param max_distance: Максимальное расстояние поиска
+        :return: Список точек пути [(x1, y1), (x2, y2), ...] или пустой список, если путь не найден
+        """
+        tile_size = self.tile_size
+        width = self.width
+        height = self.height
+        walkable = self.walkable
+
+        # Переводим мировые координаты в координаты тайлов
+        start_tx, start_ty = int(start_x // tile_size), int(start_y // tile_size)
+        target_tx, target_ty = int(target_x // tile_size), int(target_y // tile_size)
+
+        # Проверяем, что начальная и целевая точки находятся в пределах карты и проходимы
+        if not (0 <= start_tx < width and 0 <= start_ty < height and
+                0 <= target_tx < width and 0 <= target_ty < height):
+            return []
+
+        start = start_ty * width + start_tx
+        target = target_ty * width + target_tx
+        if not walkable[start] or not walkable[target] or start == target:
+            return []
+
+        # Новое поколение делает все старые расстояния недействительными
+        self.generation += 1
+        generation = self.generation
+        distances = self.distances
+        generations = self.generations
+
+        distances[start] = 0
+        generations[start] = generation
+
+        # Приоритетная очередь: (оценка f = g + h, индекс клетки)
+        queue = [(abs(start_tx - target_tx) + abs(start_ty - target_ty), start)]
+
+        # Длина кратчайшего пути до цели (None, пока цель не извлечена из очереди)
+        target_distance = None
+
+        while queue:
+            estimate, current = heapq.heappop(queue)
+
+            # После нахождения цели раскрываем все клетки с оценкой не больше длины пути:
+            # среди них все клетки всех кратчайших путей, нужные для восстановления
+            if target_distance is not None and estimate > target_distance:
+                break
+
+            x = current % width
+            y = current // width
+            distance = distances[current]
+
+            # Пропускаем устаревшие записи очереди
+            if estimate != distance + abs(x - target_tx) + abs(y - target_ty):
+                continue
+
+            if current == target:
+                target_distance = distance
+                continue
+
+            # Дальше максимального расстояния поиск не продолжается
+            if distance >= max_distance + 1:
+                continue
+
+            next_distance = distance + 1
+
+            # Соседи по четырем направлениям (верх, право, низ, лево)
+            for neighbor, nx, ny in ((current - width, x, y - 1), (current + 1, x + 1, y),
+                                     (current + width, x, y + 1), (current - 1, x - 1, y)):
+                if not (0 <= nx < width and 0 <= ny < height) or not walkable[neighbor]:
+                    continue
+
+                if generations[neighbor] == generation and distances[neighbor] <= next_distance:
+                    continue
+
+                distances[neighbor] = next_distance
+                generations[neighbor] = generation
+                heapq.heappush(queue, (next_distance + abs(nx - target_tx) + abs(ny - target_ty), neighbor))
+
+        if target_distance is None:
+            return []
+
+        # Восстанавливаем путь от цели к началу. Из соседей, которые на шаг ближе к началу,
+        # выбираем клетку с наименьшими координатами (x, y) - в этом порядке алгоритм
+        # Дейкстры извлекает равноудаленные клетки, поэтому пути совпадают
+        path = []
+        current = target
+        distance = target_distance
+        while current != start:
+            x = current % width
+            y = current // width
+            path.append((x * tile_size + tile_size // 2, y * tile_size + tile_size // 2))
+
+            distance -= 1
+            for neighbor, nx, ny in ((current - 1, x - 1, y), (current - width, x, y - 1),
+                                     (current + width, x, y + 1), (current + 1, x + 1, y)):
+                if (0 <= nx < width and 0 <= ny < height and generations[neighbor] == generation
+                        and distances[neighbor] == distance):
+                    current = neighbor
+                    break
+
+        # Возвращаем путь в правильном порядке (от начала к концу)
+        path.reverse()
+        return path
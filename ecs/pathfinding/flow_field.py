@@ -0,0 +1,151 @@
+from collections import deque
+
+class FlowField:
+    """
+    Поле расстояний (flow field) до общей цели. Один обход в ширину от клетки цели
+    дает каждой проходимой клетке число шагов до нее, и любой агент находит следующий
+    шаг за O(1), спускаясь в соседнюю клетку с меньшим расстоянием
+    """
+
+    def __init__(self, level_map, width, height):
+        """
+        Инициализирует поле
+        :param level_map: Карта уровня (двумерный массив)
+        :param width: Ширина карты
+        :param height: Высота карты
+        """
+        self.width = width
+        self.height = height
+        self.tile_size = 32
+
+        # Карта проходимости: 1 - проходимый тайл (код 2, 3 или 4), индекс = y * width + x
+        self.walkable = bytearray(width * height)
+        for y in range(height):
+            row = level_map[y]
+            for x in range(width):
+                if row[x] in (2, 3, 4):
+                    self.walkable[y * width + x] = 1
+
+        # Расстояния до цели в шагах (-1 - клетка недостижима)
+        self.distances = [-1] * (width * height)
+        self.target_tile = None  # Клетка цели, от которой построено поле
+        self.build_count = 0  # Сколько раз поле перестраивалось
+
+    def update(self, target_x, target_y):
+        """
+        Перестраивает поле, если цель перешла в другую клетку
+        :param target_x: Мировая координата X цели
+        :param target_y: Мировая координата Y цели
+        :return: True, если поле было перестроено
+        """
+        target_tile = (int(target_x // self.tile_size), int(target_y // self.tile_size))
+        if target_tile == self.target_tile:
+            return False
+
+        self.target_tile = target_tile
+        self._build(*target_tile)
+        return True
+
+    def _build(self, target_tx, target_ty):
+        """
+        Строит поле расстояний обходом в ширину от клетки цели
+        :param target_tx: Координата X клетки цели
+        :param target_ty: Координата Y клетки цели
+        """
+        width = self.width
+        height = self.height
+        walkable = self.walkable
+        distances = [-1] * (width * height)
+        self.distances = distances
+        self.build_count += 1
+
+        if not (0 <= target_tx < width and 0 <= target_ty < height):
+            return
+
+        target = target_ty * width + target_tx
+        if not walkable[target]:
+            return
+
+        distances[target] = 0
+        queue = deque([target])
+
+        while queue:
+            current = queue.popleft()
+            x = current % width
+            next_distance = distances[current] + 1
+
+            # Соседи по четырем направлениям (верх, право, низ, лево)
+            if current >= width:
+                neighbor = current - width
+                if walkable[neighbor] and distances[neighbor] < 0:
+                    distances[neighbor] = next_distance
+                    queue.append(neighbor)
+            if x < width - 1:
+                neighbor = current + 1
+                if walkable[neighbor] and distances[neighbor] < 0:
+                    distances[neighbor] = next_distance
+                    queue.append(neighbor)
+            if current < (height - 1) * width:
+                neighbor = current + width
+                if walkable[neighbor] and distances[neighbor] < 0:
+                    distances[neighbor] = next_distance
+                    queue.append(neighbor)
+            if x > 0:
+                neighbor = current - 1
+                if walkable[neighbor] and distances[neighbor] < 0:
+                    distances[neighbor] = next_distance
+                    queue.append(neighbor)
+
+    def get_distance(self, x, y):
+        """
+        Возвращает расстояние от мировой точки до цели
+        :param x: Мировая координата X
+        :param y: Мировая координата Y
+        :return: Число шагов до цели или -1, если клетка недостижима
+        """
+        tx, ty = int(x // self.tile_size), int(y // self.tile_size)
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            return self.distances[ty * self.width + tx]
+        return -1
+
+    def get_next_point(self, x, y):
+        """
+        Возвращает центр следующей клетки на пути к цели
+        :param x: Мировая координата X
+        :param y: Мировая координата Y
+        :return: Кортеж (x, y) центра соседней клетки или None, если точка уже в клетке цели
+                 или цель недостижима
+        """
+        tile_size = self.tile_size
+        width = self.width
+        tx, ty = int(x // tile_size), int(y // tile_size)
+        if not (0 <= tx < width and 0 <= ty < self.height):
+            return None
+
+        distances = self.distances
+        current = ty * width + tx
+        distance = distances[current]
+        if distance <= 0:
+            return None
+
+        # Спускаемся в соседа, который на шаг ближе к цели (при равенстве - с меньшими (x, y))
+        for neighbor, nx, ny in ((current - 1, tx - 1, ty), (current - width, tx, ty - 1),
+                                 (current + width, tx, ty + 1), (current + 1, tx + 1, ty)):
+            if 0 <= nx < width and 0 <= ny < self.height and distances[neighbor] == distance - 1:
+                return nx * tile_size + tile_size // 2, ny * tile_size + tile_size // 2
+
+        return None
+
+    def get_path(self, x, y):
+        """
+        Возвращает путь к цели, полученный спуском по полю
+        :param x: Мировая координата X
+        :param y: Мировая координата Y
+        :return: Список точек пути [(x1, y1), (x2, y2), ...] или пустой список
+        """
+        path = []
+        point = self.get_next_point(x, y)
+        while point:
+            path.append(point)
+            point = self.get_next_point(*point)
+        return path
@@ -0,0 +1,132 @@
+import heapq
+import time
+
+class PathScheduler:
+    """
+    Очередь запросов поиска пути с бюджетом времени на кадр. Запросы обслуживаются
+    по приоритету (ближние к цели и давно не обновлявшиеся - раньше), повторный
+    запрос той же сущности объединяется с ожидающим, а обработка распределяется
+    по кадрам, чтобы пересчет путей не создавал рывков
+    """
+
+    def __init__(self, find_path, budget_ms=2.0, staleness_weight=100):
+        """
+        Инициализирует очередь
+        :param find_path: Функция поиска пути (start_x, start_y, target_x, target_y) -> путь
+        :param budget_ms: Бюджет времени на обработку запросов за кадр в миллисекундах
+        :param staleness_weight: Сколько пикселей расстояния "стоит" одна секунда ожидания
+        """
+        self.find_path = find_path
+        self.budget_ms = budget_ms
+        self.staleness_weight = staleness_weight
+
+        self.queue = []  # Куча записей [приоритет, номер, ID сущности, аргументы]
+        self.pending = {}  # ID сущности -> запись в куче
+        self.sequence = 0  # Номер запроса (при равном приоритете раньше обслуживается старший)
+        self.needs_heapify = False  # Приоритеты ожидающих записей изменились
+
+        # Счетчики
+        self.frame_time_ms = 0  # Время обработки в последнем кадре
+        self.frame_processed = 0  # Обработано запросов в последнем кадре
+        self.total_processed = 0
+        self.total_coalesced = 0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self):
+        """Количество ожидающих запросов"""
+        return len(self.pending)
+
+    def request(self, entity_id, start_x, start_y, target_x, target_y, distance=0, staleness=0):
+        """
+        Ставит запрос пути в очередь или обновляет ожидающий запрос сущности
+        :param entity_id: ID сущности
+        :param start_x: Начальная координата X
+        :param start_y: Начальная координата Y
+        :param target_x: Целевая координата X
+        :param target_y: Целевая координата Y
+        :param distance: Расстояние до цели (чем меньше, тем выше приоритет)
+        :param staleness: Сколько секунд путь сущности не обновлялся (чем больше, тем выше приоритет)
+        """
+        priority = distance - staleness * self.staleness_weight
+        args = (start_x, start_y, target_x, target_y)
+
+        entry = self.pending.get(entity_id)
+        if entry is not None:
+            # Объединяем с ожидающим запросом: путь будет построен от актуальной позиции
+            entry[3] = args
+            if entry[0] != priority:
+                entry[0] = priority
+                self.needs_heapify = True
+            self.total_coalesced += 1
+            return
+
+        self.sequence += 1
+        entry = [priority, self.sequence, entity_id, args]
+        self.pending[entity_id] = entry
+        heapq.heappush(self.queue, entry)
+        self.max_queue_depth = max(self.max_queue_depth, len(self.pending))
+
+    def cancel(self, entity_id):
+        """
+        Отменяет ожидающий запрос сущности
+        :param entity_id: ID сущности
+        """
+        entry = self.pending.pop(entity_id, None)
+        if entry is not None:
+            # Запись остается в куче и будет пропущена при извлечении
+            entry[3] = None
+
+    def clear(self):
+        """Отменяет все ожидающие запросы"""
+        self.queue.clear()
+        self.pending.clear()
+        self.needs_heapify = False
+
+    def process(self):
+        """
+        Обрабатывает запросы в пределах бюджета времени кадра (минимум один запрос)
+        :return: Список кортежей (ID сущности, путь)
+        """
+        results = []
+        start_time = time.perf_counter()
+        deadline = start_time + self.budget_ms / 1000
+
+        if self.needs_heapify:
+            heapq.heapify(self.queue)
+            self.needs_heapify = False
+
+        queue = self.queue
+        while queue:
+            entry = heapq.heappop(queue)
+            args = entry[3]
+
+            # Пропускаем отмененные запросы
+            if args is None:
+                continue
+
+            entity_id = entry[2]
+            del self.pending[entity_id]
+            results.append((entity_id, self.find_path(*args)))
+
+            if time.perf_counter() >= deadline:
+                break
+
+        self.frame_time_ms = (time.perf_counter() - start_time) * 1000
+        self.frame_processed = len(results)
+        self.total_processed += len(results)
+        return results
+
+    def get_stats(self):
+        """
+        Возвращает счетчики очереди
+        :return: Словарь со счетчиками
+        """
+        return {
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'frame_time_ms': self.frame_time_ms,
+            'frame_processed': self.frame_processed,
+            'total_processed': self.total_processed,
+            'total_coalesced': self.total_coalesced,
+        }
@@ -16,12 +16,18 @@ class CameraSystem(System):
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.target_id = None
-        self.offset_x = 0
+        self.offset_x = 0  # Смещение, с которым выводится кадр
         self.offset_y = 0
+        self.follow_x = 0  # Положение камеры, плавно следующей за целью
+        self.follow_y = 0
+        self.view_held = False  # Смещение вывода меняется только через sync_view (режим грязных прямоугольников)
         self.smoothness = 0.1  # Параметр сглаживания движения камеры (0-1)
         self.zoom = 4.0  # Масштаб камеры (1.0 = без масштабирования, > 1.0 = приближение)
         self.target_zoom = 4.0  # Целевой масштаб для плавного изменения
         self.zoom_smoothness = 0.05  # Параметр сглаживания изменения масштаба
+        
+        # Живое представление запроса игроков
+        self.player_query = world.query(Player, Position)
     
     def follow(self, entity_id):
         """
@@ -48,7 +54,7 @@ class CameraSystem(System):
         """
         if self.target_id is None:
             # Если нет цели, ищем игрока
-            player_entities = self.world.get_entities_with_components(Player, Position)
+            player_entities = self.player_query
             if player_entities:
                 self.target_id = player_entities[0]
         
@@ -64,12 +70,28 @@ class CameraSystem(System):
             target_offset_y = position.y - self.screen_height / (2 * self.zoom)
             
             # Плавно перемещаем камеру к целевому положению
-            self.offset_x += (target_offset_x - self.offset_x) * self.smoothness
-            self.offset_y += (target_offset_y - self.offset_y) * self.smoothness
+            self.follow_x += (target_offset_x - self.follow_x) * self.smoothness
+            self.follow_y += (target_offset_y - self.follow_y) * self.smoothness
+        
+        if not self.view_held:
+            self.sync_view()
+    
+    def sync_view(self):
+        """Переносит смещение вывода в текущее положение камеры"""
+        self.offset_x = self.follow_x
+        self.offset_y = self.follow_y
+    
+    def get_follow_offset(self):
+        """
+        Возвращает положение камеры, следующей за целью (при удержанном смещении вывода
+        может отличаться от get_camera_offset)
+        :return: Кортеж (offset_x, offset_y)
+        """
+        return (self.follow_x, self.follow_y)
     
     def get_camera_offset(self):
         """
-        Возвращает текущее смещение камеры
+        Возвращает смещение, с которым выводится кадр
         :return: Кортеж (offset_x, offset_y)
         """
         return (self.offset_x, self.offset_y)
@@ -81,25 +103,45 @@ class CameraSystem(System):
         """
         return self.zoom
     
+    def set_screen_size(self, screen_width, screen_height):
+        """
+        Устанавливает размер экрана (например, после изменения размера окна)
+        :param screen_width: Ширина экрана
+        :param screen_height: Высота экрана
+        """
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+    
+    def get_visible_rect(self, margin=0):
+        """
+        Возвращает видимую область в мировых координатах
+        :param margin: Запас с каждой стороны в мировых единицах
+        :return: Кортеж (left, top, right, bottom)
+        """
+        return (self.offset_x - margin,
+                self.offset_y - margin,
+                self.offset_x + self.screen_width / self.zoom + margin,
+                self.offset_y + self.screen_height / self.zoom + margin)
+    
+    def is_visible(self, x, y, margin=0):
+        """
+        Проверяет, попадает ли мировая точка в видимую область
+        :param x: Мировая координата X
+        :param y: Мировая координата Y
+        :param margin: Запас с каждой стороны в мировых единицах
+        :return: True, если точка видима
+        """
+        return (self.offset_x - margin <= x <= self.offset_x + self.screen_width / self.zoom + margin and
+                self.offset_y - margin <= y <= self.offset_y + self.screen_height / self.zoom + margin)
+    
     def world_to_screen(self, x, y):
         """
-        Преобразует мировые координаты в экранные с учетом масштаба
+        Преобразует мировые координаты в экранные с учетом масштаба. Точки вне экрана
+        преобразуются так же, отсечение выполняет вызывающий код (см. get_visible_rect и is_visible)
         :param x: Мировая координата X
         :param y: Мировая координата Y
         :return: Кортеж экранных координат (screen_x, screen_y)
         """
-        # Быстрая проверка, находится ли объект в видимой области
-        # Добавляем запас в 100 пикселей с каждой стороны
-        margin = 100
-        visible_left = self.offset_x - margin
-        visible_right = self.offset_x + self.screen_width / self.zoom + margin
-        visible_top = self.offset_y - margin
-        visible_bottom = self.offset_y + self.screen_height / self.zoom + margin
-        
-        # Если объект находится далеко за пределами экрана, возвращаем координаты за пределами экрана
-        if x < visible_left or x > visible_right or y < visible_top or y > visible_bottom:
-            return (-1000, -1000)  # Координаты за пределами экрана
-        
         screen_x = (x - self.offset_x) * self.zoom
         screen_y = (y - self.offset_y) * self.zoom
         return (screen_x, screen_y)
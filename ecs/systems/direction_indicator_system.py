@@ -2,6 +2,8 @@ import pygame
 import math
 from ecs.systems.system import System
 from ecs.components.components import Position, Player, Tile, DirectionIndicator, Portal
+from ecs.utils.render_queue import RenderQueue
+from ecs.utils.text_renderer import get_text_renderer
 
 class DirectionIndicatorSystem(System):
     """
@@ -14,10 +16,14 @@ class DirectionIndicatorSystem(System):
         self.camera_system = camera_system
         self.portal_positions = []  # Позиции всех порталов на уровне
         self.indicator_color = (255, 0, 255)  # Яркий розовый цвет для лучшей видимости
-        self.font = pygame.font.SysFont(None, 24)  # Увеличенный шрифт для лучшей видимости
+        self.text_renderer = get_text_renderer(24)  # Увеличенный шрифт для лучшей видимости
         self.pulse_timer = 0  # Таймер для пульсации
         self.debug = False  # Полностью отключаем отладочный вывод
         
+        # Живые представления запросов
+        self.portal_query = world.query(Portal, Position)
+        self.player_query = world.query(Player, Position)
+    
     def update(self, dt):
         """
         Обновляет указатель направления
@@ -29,7 +35,7 @@ class DirectionIndicatorSystem(System):
             self.pulse_timer = 0
             
         # Находим все порталы в мире
-        portal_entities = self.world.get_entities_with_components(Portal, Position)
+        portal_entities = self.portal_query
         
         # Обновляем позиции порталов
         self.portal_positions = []
@@ -37,24 +43,32 @@ class DirectionIndicatorSystem(System):
             portal_pos = self.world.get_component(portal_id, Position)
             self.portal_positions.append((portal_pos.x, portal_pos.y))
         
-    def render(self, camera=None):
+        # Стрелка пульсирует, а расстояние меняет ширину, поэтому в режиме грязных
+        # прямоугольников их области заявляются до подготовки кадра
+        render_queue = self.world.get_resource(RenderQueue)
+        if render_queue and render_queue.collect_upcoming:
+            for indicator in self._get_indicators():
+                for rect in self._get_indicator_rects(indicator):
+                    render_queue.mark_upcoming(rect)
+    
+    def _get_indicators(self):
         """
-        Отрисовывает указатель направления к порталу
-        :param camera: Камера для преобразования координат (не используется, так как у нас есть self.camera_system)
+        Вычисляет указатели к порталам в экранных координатах
+        :return: Список кортежей (позиция игрока, конец стрелки, угол в градусах, длина наконечника,
+                 текст расстояния)
         """
-        # Если нет порталов, нечего отображать
-        if not self.portal_positions:
-            return
-            
-        # Находим игрока
-        player_entities = self.world.get_entities_with_components(Player, Position)
-        if not player_entities:
-            return
-            
+        # Если нет порталов или игрока, указателей нет
+        player_entities = self.player_query
+        if not self.portal_positions or not player_entities:
+            return []
+        
         player_id = player_entities[0]
         player_pos = self.world.get_component(player_id, Position)
         
-        # Для каждого портала рисуем указатель направления
+        # Получаем экранные координаты игрока
+        player_screen_x, player_screen_y = self.camera_system.world_to_screen(player_pos.x, player_pos.y)
+        
+        indicators = []
         for portal_x, portal_y in self.portal_positions:
             # Вычисляем направление к порталу
             dx = portal_x - player_pos.x
@@ -66,10 +80,7 @@ class DirectionIndicatorSystem(System):
             # Вычисляем угол направления к порталу (нужен для рисования стрелки)
             angle = math.degrees(math.atan2(dy, dx))
             
-            # Получаем экранные координаты игрока
-            player_screen_x, player_screen_y = self.camera_system.world_to_screen(player_pos.x, player_pos.y)
-            
-            # Рисуем указатель (стрелку)
+            # Длина стрелки
             indicator_radius = 40  # Радиус от игрока, на котором рисуется указатель
             
             # Пульсация для привлечения внимания
@@ -80,6 +91,38 @@ class DirectionIndicatorSystem(System):
             arrow_end_x = player_screen_x + indicator_radius * math.cos(math.radians(angle))
             arrow_end_y = player_screen_y + indicator_radius * math.sin(math.radians(angle))
             
+            arrow_size = 10  # Длина наконечника
+            indicators.append(((player_screen_x, player_screen_y), (arrow_end_x, arrow_end_y), angle,
+                               arrow_size, f"{int(distance)}"))
+        return indicators
+    
+    def _get_indicator_rects(self, indicator):
+        """
+        Возвращает области экрана, которые занимает указатель
+        :param indicator: Указатель (см. _get_indicators)
+        :return: Кортеж (область стрелки, область текста расстояния)
+        """
+        (player_screen_x, player_screen_y), (arrow_end_x, arrow_end_y), _, arrow_size, distance_text = indicator
+        # Стрелка с наконечником не выходит из круга этого радиуса (с запасом на толщину линии)
+        reach = math.hypot(arrow_end_x - player_screen_x, arrow_end_y - player_screen_y) + arrow_size + 2
+        left = math.floor(player_screen_x - reach)
+        top = math.floor(player_screen_y - reach)
+        arrow_rect = pygame.Rect(left, top, math.ceil(player_screen_x + reach) + 1 - left,
+                                 math.ceil(player_screen_y + reach) + 1 - top)
+        distance_rect = self.text_renderer.get_rect(distance_text, (arrow_end_x + 5, arrow_end_y + 5), cache=False)
+        return arrow_rect, distance_rect
+    
+    def render(self, camera=None):
+        """
+        Отрисовывает указатель направления к порталу
+        :param camera: Камера для преобразования координат (не используется, так как у нас есть self.camera_system)
+        """
+        render_queue = self.world.get_resource(RenderQueue)
+        
+        # Для каждого портала рисуем указатель направления
+        for indicator in self._get_indicators():
+            (player_screen_x, player_screen_y), (arrow_end_x, arrow_end_y), angle, arrow_size, distance_text = indicator
+            
             # Рисуем линию стрелки
             pygame.draw.line(self.screen, self.indicator_color, 
                             (player_screen_x, player_screen_y), 
@@ -87,7 +130,6 @@ class DirectionIndicatorSystem(System):
                             3)
             
             # Рисуем наконечник стрелки
-            arrow_size = 10
             arrow_angle1 = math.radians(angle + 150)
             arrow_angle2 = math.radians(angle - 150)
             
@@ -103,5 +145,11 @@ class DirectionIndicatorSystem(System):
                                 (arrow_point2_x, arrow_point2_y)])
             
             # Рисуем расстояние до портала
-            distance_text = self.font.render(f"{int(distance)}", True, self.indicator_color)
-            self.screen.blit(distance_text, (arrow_end_x + 5, arrow_end_y + 5)) 
\ No newline at end of file
+            # Расстояние меняется почти каждый кадр, поэтому собирается из атласа глифов
+            self.text_renderer.draw(self.screen, distance_text, (arrow_end_x + 5, arrow_end_y + 5),
+                                    self.indicator_color, cache=False)
+            
+            # Нарисованный указатель стирается в следующем кадре
+            if render_queue:
+                for rect in self._get_indicator_rects(indicator):
+                    render_queue.mark_dirty(rect)
@@ -0,0 +1,245 @@
+import heapq
+import pygame
+from ecs.systems.system import System
+from ecs.utils.render_queue import RenderQueue
+from ecs.utils.text_renderer import get_text_renderer
+
+# Виды эффектов
+EFFECT_FLASH = 0  # Вспышка попадания: круг, сжимающийся к концу жизни
+EFFECT_TEXT = 1  # Всплывающий текст (урон, лечение)
+
+class Effect:
+    """Запись временного визуального эффекта. Записи переиспользуются через пул EffectsSystem"""
+
+    __slots__ = ('kind', 'x', 'y', 'color', 'size', 'velocity_y', 'surface', 'start', 'lifetime', 'index')
+
+    def __init__(self):
+        self.kind = EFFECT_FLASH
+        self.x = 0.0
+        self.y = 0.0
+        self.color = (255, 255, 255)
+        self.size = 0  # Начальный радиус вспышки
+        self.velocity_y = 0.0  # Скорость всплытия текста
+        self.surface = None  # Отрендеренный текст
+        self.start = 0.0  # Время создания (по часам системы)
+        self.lifetime = 0.0
+        self.index = -1  # Позиция в списке активных эффектов
+
+class EffectsSystem(System):
+    """
+    Система временных визуальных эффектов: вспышки попаданий и всплывающие числа урона.
+    Эффекты хранятся в пуле записей, истекают по куче времен окончания (O(log N) на
+    истекший эффект вместо перебора и list.remove) и выводятся одним пакетом через
+    очередь отрисовки. Число новых эффектов за кадр ограничено бюджетом
+    """
+
+    def __init__(self, world, screen, camera_system, max_effects=512, frame_budget=64):
+        """
+        Инициализирует систему эффектов
+        :param world: Мир ECS
+        :param screen: Поверхность Pygame для отрисовки
+        :param camera_system: Система камеры для преобразования координат
+        :param max_effects: Максимальное число одновременно активных эффектов
+        :param frame_budget: Максимальное число новых эффектов за кадр (None - без ограничения)
+        """
+        super().__init__(world)
+        self.screen = screen
+        self.camera_system = camera_system
+        self.text_renderer = get_text_renderer(24)
+        self.max_effects = max_effects
+        self.frame_budget = frame_budget
+        self.offscreen_margin = 32  # Запас видимой области (в мировых единицах)
+
+        self.time = 0.0  # Часы системы (сумма dt)
+        self.active = []  # Активные эффекты
+        self.expiry = []  # Куча (время окончания, номер, эффект)
+        self.pool = []  # Свободные записи
+        self.sequence = 0  # Номер эффекта (при равном времени окончания первым истекает старший)
+        self.flash_surfaces = {}  # (цвет, радиус) -> поверхность вспышки
+
+        # Счетчики
+        self.frame_spawned = 0  # Создано эффектов в текущем кадре
+        self.dropped = 0  # Эффектов отброшено из-за бюджета или емкости
+        self.drawn = 0  # Эффектов выведено в последнем кадре
+
+    def add_flash(self, x, y, color, size=20, lifetime=0.3):
+        """
+        Добавляет вспышку попадания
+        :param x: Координата X
+        :param y: Координата Y
+        :param color: Цвет вспышки
+        :param size: Начальный радиус вспышки
+        :param lifetime: Время жизни в секундах
+        :return: Запись эффекта или None, если бюджет исчерпан
+        """
+        effect = self._spawn(EFFECT_FLASH, x, y, lifetime)
+        if effect is not None:
+            effect.color = color
+            effect.size = size
+        return effect
+
+    def add_text(self, x, y, text, color, lifetime=1.0, velocity_y=-30):
+        """
+        Добавляет всплывающий текст
+        :param x: Координата X
+        :param y: Координата Y
+        :param text: Текст
+        :param color: Цвет текста
+        :param lifetime: Время жизни в секундах
+        :param velocity_y: Скорость всплытия (отрицательная - вверх)
+        :return: Запись эффекта или None, если бюджет исчерпан
+        """
+        effect = self._spawn(EFFECT_TEXT, x, y, lifetime)
+        if effect is not None:
+            effect.color = color
+            effect.velocity_y = velocity_y
+            # Одинаковые числа урона берутся из кэша строк
+            effect.surface = self.text_renderer.render(text, color)
+        return effect
+
+    def _spawn(self, kind, x, y, lifetime):
+        """
+        Берет запись из пула и ставит ее в очередь истечения
+        :param kind: Вид эффекта (EFFECT_*)
+        :param x: Координата X
+        :param y: Координата Y
+        :param lifetime: Время жизни в секундах
+        :return: Запись эффекта или None, если бюджет кадра или емкость исчерпаны
+        """
+        if (self.frame_budget is not None and self.frame_spawned >= self.frame_budget) or len(self.active) >= self.max_effects:
+            self.dropped += 1
+            return None
+        self.frame_spawned += 1
+
+        effect = self.pool.pop() if self.pool else Effect()
+        effect.kind = kind
+        effect.x = x
+        effect.y = y
+        effect.surface = None
+        effect.start = self.time
+        effect.lifetime = lifetime
+        effect.index = len(self.active)
+        self.active.append(effect)
+
+        self.sequence += 1
+        heapq.heappush(self.expiry, (self.time + lifetime, self.sequence, effect))
+        return effect
+
+    def clear(self):
+        """Удаляет все эффекты"""
+        for effect in self.active:
+            effect.surface = None
+            self.pool.append(effect)
+        self.active.clear()
+        self.expiry.clear()
+
+    def update(self, dt):
+        """
+        Обновляет эффекты: удаляет истекшие и сдвигает всплывающий текст
+        :param dt: Время, прошедшее с последнего обновления (в секундах)
+        """
+        self.time += dt
+        self.frame_spawned = 0
+
+        # Извлекаем из кучи только истекшие эффекты
+        expiry = self.expiry
+        active = self.active
+        while expiry and expiry[0][0] <= self.time:
+            effect = heapq.heappop(expiry)[2]
+
+            # Удаление перестановкой последнего активного эффекта на место истекшего
+            last = active.pop()
+            if last is not effect:
+                active[effect.index] = last
+                last.index = effect.index
+            effect.surface = None
+            self.pool.append(effect)
+
+        for effect in active:
+            if effect.kind == EFFECT_TEXT:
+                effect.y += effect.velocity_y * dt
+
+        # Новые вспышки и всплывающий текст выходят за области прошлого кадра, поэтому
+        # в режиме грязных прямоугольников области эффектов заявляются до подготовки кадра
+        render_queue = self.world.get_resource(RenderQueue)
+        if render_queue and render_queue.collect_upcoming:
+            for surface, dest, _, _ in self._build_commands():
+                render_queue.mark_upcoming(surface.get_rect(topleft=dest))
+
+    def render(self, camera=None):
+        """
+        Отрисовывает все видимые эффекты одним пакетом команд
+        :param camera: Камера для преобразования координат (не используется, так как у нас есть self.camera_system)
+        """
+        self.drawn = 0
+        if not self.active:
+            return
+
+        commands = self._build_commands()
+        render_queue = self.world.get_resource(RenderQueue)
+        if render_queue:
+            render_queue.extend(commands, source="effects")
+            render_queue.flush()
+            for surface, dest, _, _ in commands:
+                render_queue.mark_dirty(surface.get_rect(topleft=dest))
+        else:
+            self.screen.blits(commands, doreturn=False)
+
+        self.drawn = len(commands)
+
+    def _build_commands(self):
+        """
+        Строит команды вывода видимых эффектов
+        :return: Список команд (поверхность, позиция, область, флаги)
+        """
+        camera_system = self.camera_system
+        time_now = self.time
+        commands = []
+        for effect in self.active:
+            # Пропускаем эффекты вне экрана
+            if not camera_system.is_visible(effect.x, effect.y, self.offscreen_margin):
+                continue
+
+            screen_x, screen_y = camera_system.world_to_screen(effect.x, effect.y)
+            if effect.kind == EFFECT_TEXT:
+                commands.append((effect.surface, (int(screen_x), int(screen_y)), None, 0))
+            else:
+                # Вспышка сжимается к концу жизни
+                progress = (time_now - effect.start) / effect.lifetime
+                radius = int(effect.size * (1 - progress))
+                surface = self._get_flash_surface(effect.color, radius)
+                half = surface.get_width() // 2
+                commands.append((surface, (int(screen_x) - half, int(screen_y) - half), None, 0))
+        return commands
+
+    def _get_flash_surface(self, color, radius):
+        """
+        Возвращает поверхность вспышки: круг цвета вспышки с белой серединой
+        :param color: Цвет вспышки
+        :param radius: Радиус круга
+        :return: Поверхность (закэширована по цвету и радиусу)
+        """
+        key = (color, radius)
+        surface = self.flash_surfaces.get(key)
+        if surface is None:
+            # Для более заметного эффекта внутренний круг не меньше 2 пикселей
+            inner_radius = max(2, radius // 2)
+            half = max(radius, inner_radius)
+            surface = pygame.Surface((half * 2 + 1, half * 2 + 1), pygame.SRCALPHA)
+            if radius > 0:
+                pygame.draw.circle(surface, color, (half, half), radius)
+            pygame.draw.circle(surface, (255, 255, 255), (half, half), inner_radius)
+            self.flash_surfaces[key] = surface
+        return surface
+
+    def get_stats(self):
+        """
+        Возвращает счетчики системы эффектов
+        :return: Словарь со счетчиками
+        """
+        return {
+            'active': len(self.active),
+            'pooled': len(self.pool),
+            'drawn': self.drawn,
+            'dropped': self.dropped,
+        }
@@ -3,7 +3,9 @@ import pygame
 import random
 from ecs.systems.system import System
 from ecs.components.components import Position, Velocity, Enemy, Player, Health, Weapon, PathDebug
-from ecs.pathfinding.dijkstra import DijkstraPathfinder
+from ecs.pathfinding.astar import AStarPathfinder
+from ecs.pathfinding.flow_field import FlowField
+from ecs.pathfinding.path_scheduler import PathScheduler
 
 class EnemyAISystem(System):
     """Система для управления искусственным интеллектом врагов"""
@@ -17,8 +19,23 @@ class EnemyAISystem(System):
         self.path_update_timer = 0
         self.path_update_interval = 0.5  # Обновляем путь каждые 0.5 секунды
         self.enemy_paths = {}  # Словарь для хранения путей врагов
+        self.use_flow_field = True  # Общее поле расстояний до игрока вместо поиска пути для каждого врага
+        self.flow_field = None
+        
+        # Очередь запросов пути для режима без поля: пути пересчитываются по мере устаревания
+        # и в пределах бюджета времени кадра, а не все в одном кадре
+        self.path_scheduler = PathScheduler(self._find_path, budget_ms=2.0)
+        self.path_times = {}  # ID врага -> время получения текущего пути
+        self.elapsed_time = 0
         self.debug_mode = False  # Отключаем режим отладки для отображения путей
         self.weapon_system = None  # Reference to the weapon system for bosses to shoot
+        
+        # Живые представления запросов
+        self.all_enemies_query = world.query(Enemy)
+        self.enemy_query = world.query(Enemy, Position, Velocity)
+        self.player_query = world.query(Player, Position)
+        # Данные о путях удаленного врага больше не нужны
+        self.all_enemies_query.add_listener(lambda entity_id: None, self._forget_enemy)
     
     def set_level_map(self, level_map, width, height):
         """
@@ -30,7 +47,11 @@ class EnemyAISystem(System):
         self.level_map = level_map
         self.map_width = width
         self.map_height = height
-        self.pathfinder = DijkstraPathfinder(level_map, width, height)
+        self.pathfinder = AStarPathfinder(level_map, width, height)
+        self.flow_field = FlowField(level_map, width, height)
+        self.enemy_paths.clear()
+        self.path_times.clear()
+        self.path_scheduler.clear()
     
     def update(self, dt):
         """
@@ -42,21 +63,22 @@ class EnemyAISystem(System):
             return
         
         # Обновляем таймер для пересчета путей
+        self.elapsed_time += dt
         self.path_update_timer += dt
         should_update_paths = self.path_update_timer >= self.path_update_interval
         
         # Update shoot cooldowns for boss enemies
-        enemy_entities = self.world.get_entities_with_components(Enemy)
+        enemy_entities = self.all_enemies_query
         for enemy_id in enemy_entities:
             enemy = self.world.get_component(enemy_id, Enemy)
             if enemy.shoot_cooldown > 0:
                 enemy.shoot_cooldown -= dt
         
         # Получаем всех врагов
-        enemy_entities = self.world.get_entities_with_components(Enemy, Position, Velocity)
+        enemy_entities = self.enemy_query
         
         # Получаем игрока
-        player_entities = self.world.get_entities_with_components(Player, Position)
+        player_entities = self.player_query
         
         if not player_entities:
             return  # Если игрока нет, ничего не делаем
@@ -67,8 +89,23 @@ class EnemyAISystem(System):
         # Если нужно обновить пути
         if should_update_paths:
             self.path_update_timer = 0
-            # Очищаем старые пути
-            self.enemy_paths.clear()
+            # Очищаем старые точки поля (пути из очереди устаревают по отдельности)
+            if self.use_flow_field:
+                self.enemy_paths.clear()
+        
+        if self.use_flow_field:
+            # Поле расстояний перестраивается, только когда игрок переходит в другую клетку
+            self.flow_field.update(player_pos.x, player_pos.y)
+        else:
+            # Забираем пути, построенные в пределах бюджета кадра
+            for enemy_id, path in self.path_scheduler.process():
+                if not self.world.entity_exists(enemy_id):
+                    self.path_times.pop(enemy_id, None)
+                    continue
+                self.enemy_paths[enemy_id] = path
+                self.path_times[enemy_id] = self.elapsed_time
+                if self.debug_mode:
+                    self._update_path_debug(enemy_id, path)
         
         # Обновляем поведение каждого врага
         for enemy_id in enemy_entities:
@@ -122,19 +159,24 @@ class EnemyAISystem(System):
                     # Normal enemy behavior - use pathfinding
                     # Если игрок в зоне обнаружения, используем поиск пути
                     
-                    # Если нужно обновить путь или у этого врага еще нет пути
-                    if should_update_paths or enemy_id not in self.enemy_paths:
-                        # Находим путь к игроку
-                        path = self._find_path(enemy_pos.x, enemy_pos.y, player_pos.x, player_pos.y)
-                        self.enemy_paths[enemy_id] = path
-                        
-                        # Обновляем или добавляем компонент PathDebug для отображения пути
-                        if self.debug_mode:
-                            if self.world.has_component(enemy_id, PathDebug):
-                                path_debug = self.world.get_component(enemy_id, PathDebug)
-                                path_debug.path = path
-                            else:
-                                self.world.add_component(enemy_id, PathDebug(path))
+                    if self.use_flow_field:
+                        # Следующая точка берется из общего поля, когда предыдущая достигнута
+                        if not self.enemy_paths.get(enemy_id):
+                            next_point = self.flow_field.get_next_point(enemy_pos.x, enemy_pos.y)
+                            self.enemy_paths[enemy_id] = [next_point] if next_point else []
+                            
+                            # Обновляем или добавляем компонент PathDebug для отображения пути
+                            if self.debug_mode:
+                                self._update_path_debug(enemy_id, self.flow_field.get_path(enemy_pos.x, enemy_pos.y))
+                    
+                    else:
+                        # Если путь устарел или у этого врага еще нет пути, ставим запрос в очередь
+                        # (повторные запросы объединяются, пока старый путь продолжает использоваться)
+                        staleness = self.elapsed_time - self.path_times.get(enemy_id, 0)
+                        if enemy_id not in self.path_times or staleness >= self.path_update_interval:
+                            self.path_scheduler.request(enemy_id, enemy_pos.x, enemy_pos.y,
+                                                        player_pos.x, player_pos.y,
+                                                        distance=distance, staleness=staleness)
                 
                 # Если у врага есть путь
                 if enemy_id in self.enemy_paths and self.enemy_paths[enemy_id]:
@@ -196,12 +238,35 @@ class EnemyAISystem(System):
                 # Очищаем путь
                 if enemy_id in self.enemy_paths:
                     self.enemy_paths[enemy_id] = []
+                self.path_scheduler.cancel(enemy_id)
+                self.path_times.pop(enemy_id, None)
                 
                 # Очищаем компонент PathDebug
                 if self.debug_mode and self.world.has_component(enemy_id, PathDebug):
                     path_debug = self.world.get_component(enemy_id, PathDebug)
                     path_debug.path = []
     
+    def _forget_enemy(self, enemy_id):
+        """
+        Удаляет путь, время его получения и запрос пути врага, покинувшего мир
+        :param enemy_id: ID врага
+        """
+        self.enemy_paths.pop(enemy_id, None)
+        self.path_times.pop(enemy_id, None)
+        self.path_scheduler.cancel(enemy_id)
+    
+    def _update_path_debug(self, enemy_id, path):
+        """
+        Обновляет или добавляет компонент PathDebug для отображения пути
+        :param enemy_id: ID врага
+        :param path: Путь врага
+        """
+        if self.world.has_component(enemy_id, PathDebug):
+            path_debug = self.world.get_component(enemy_id, PathDebug)
+            path_debug.path = path
+        else:
+            self.world.add_component(enemy_id, PathDebug(path))
+    
     def set_weapon_system(self, weapon_system):
         """
         Set the weapon system reference
@@ -244,7 +309,7 @@ class EnemyAISystem(System):
     
     def _find_path(self, start_x, start_y, target_x, target_y):
         """
-        Находит путь от начальной точки к целевой используя алгоритм Дейкстры
+        Находит путь от начальной точки к целевой используя алгоритм A*
         :param start_x: Начальная координата X
         :param start_y: Начальная координата Y
         :param target_x: Целевая координата X
@@ -5,16 +5,23 @@ from ecs.components.components import Position, Velocity, Enemy, Player
 class EnemySystem(System):
     """Система для управления поведением врагов"""
     
+    def __init__(self, world):
+        super().__init__(world)
+        
+        # Живые представления запросов
+        self.enemy_query = world.query(Enemy, Position, Velocity)
+        self.player_query = world.query(Player, Position)
+    
     def update(self, dt):
         """
         Обновляет поведение врагов
         :param dt: Время, прошедшее с последнего обновления (в секундах)
         """
         # Получаем всех врагов
-        enemy_entities = self.world.get_entities_with_components(Enemy, Position, Velocity)
+        enemy_entities = self.enemy_query
         
         # Получаем игрока
-        player_entities = self.world.get_entities_with_components(Player, Position)
+        player_entities = self.player_query
         
         if not player_entities:
             return
@@ -1,23 +1,42 @@
 import pygame
 from ecs.systems.system import System
 from ecs.components.components import Health, Player, Enemy, Position
+from ecs.utils.render_queue import RenderQueue
+from ecs.utils.text_renderer import get_text_renderer
+from ecs.systems.effects_system import EffectsSystem
 
 class HealthSystem(System):
     """
     Система для обработки здоровья сущностей
     """
     
-    def __init__(self, world, screen):
+    def __init__(self, world, screen, camera_system=None):
+        """
+        Инициализирует систему здоровья
+        :param world: Мир ECS
+        :param screen: Поверхность Pygame для отрисовки
+        :param camera_system: Система камеры (для областей полосок здоровья до подготовки кадра)
+        """
         super().__init__(world)
         self.screen = screen
-        self.font = pygame.font.SysFont(None, 24)
+        self.camera_system = camera_system
+        self.text_renderer = get_text_renderer(24)
         self.damage_color = (255, 0, 0)  # Красный цвет для индикации урона
         self.heal_color = (0, 255, 0)    # Зеленый цвет для индикации лечения
-        self.damage_indicators = []  # Список индикаторов урона/лечения
         self.indicator_lifetime = 1.0  # Время жизни индикатора в секундах
+        self.offscreen_margin = 32  # Запас видимой области для полосок здоровья (в мировых единицах)
+        self.bar_surfaces = {}  # (ширина, высота, заполнено пикселей, цвет, цвет фона) -> поверхность полоски
         
         # Получаем систему порталов для доступа к GameProgress
         self.portal_system = None
+        
+        # Система эффектов, которая выводит индикаторы урона/лечения
+        self.effects_system = None
+        
+        # Живые представления запросов
+        self.health_query = world.query(Health)
+        self.health_position_query = world.query(Health, Position)
+        self.player_query = world.query(Player, Health)
     
     def update(self, dt):
         """
@@ -31,14 +50,18 @@ class HealthSystem(System):
                     self.portal_system = system
                     break
         
-        # Обновляем индикаторы урона/лечения
-        self.update_damage_indicators(dt)
-        
         # Обработка регенерации здоровья
-        entities = self.world.get_entities_with_components(Health)
+        entities = self.health_query
         for entity_id in entities:
             health = self.world.get_component(entity_id, Health)
             
+            # Отсчет временной неуязвимости после урона
+            if health.invulnerable:
+                health.invulnerable_timer -= dt
+                if health.invulnerable_timer <= 0:
+                    health.invulnerable = False
+                    health.invulnerable_timer = 0
+            
             # Обработка регенерации
             if health.regeneration_rate > 0:
                 health.regeneration_timer += dt
@@ -54,6 +77,13 @@ class HealthSystem(System):
                 # Иначе удаляем сущность
                 elif self.world.has_component(entity_id, Enemy):
                     self.handle_enemy_death(entity_id)
+        
+        # Полоски движутся вместе с сущностями и могут выйти за области прошлого кадра,
+        # поэтому в режиме грязных прямоугольников их области заявляются до подготовки кадра
+        render_queue = self.world.get_resource(RenderQueue)
+        if render_queue and render_queue.collect_upcoming and self.camera_system:
+            for surface, dest, _, _ in self._build_bar_commands(self.camera_system):
+                render_queue.mark_upcoming(surface.get_rect(topleft=dest))
     
     def damage_entity(self, entity_id, damage, attacker_id=None):
         """
@@ -177,85 +207,34 @@ class HealthSystem(System):
         # Создаем текст индикатора
         text = f"+{amount}" if is_healing else f"-{amount}"
         
-        # Добавляем индикатор в список
-        self.damage_indicators.append({
-            'x': x + offset_x,
-            'y': y + offset_y,
-            'text': text,
-            'color': color,
-            'lifetime': self.indicator_lifetime,
-            'velocity_y': -30  # Скорость движения индикатора вверх
-        })
-    
-    def update_damage_indicators(self, dt):
-        """
-        Обновляет индикаторы урона/лечения
-        :param dt: Время, прошедшее с последнего обновления
-        """
-        # Обновляем все индикаторы
-        for indicator in self.damage_indicators[:]:
-            # Уменьшаем время жизни
-            indicator['lifetime'] -= dt
-            
-            # Перемещаем индикатор вверх
-            indicator['y'] += indicator['velocity_y'] * dt
-            
-            # Если время жизни истекло, удаляем индикатор
-            if indicator['lifetime'] <= 0:
-                self.damage_indicators.remove(indicator)
+        # Получаем систему эффектов, если еще не получили
+        if not self.effects_system:
+            self.effects_system = next((system for system in self.world.systems if isinstance(system, EffectsSystem)), None)
+        
+        # Индикатор всплывает вверх и исчезает (выводится системой эффектов)
+        if self.effects_system:
+            self.effects_system.add_text(x + offset_x, y + offset_y, text, color, self.indicator_lifetime, velocity_y=-30)
     
     def render(self, camera):
         """
-        Отрисовывает индикаторы урона/лечения и полоски здоровья
+        Отрисовывает полоски здоровья
         :param camera: Камера для преобразования координат
         """
-        # Отрисовываем индикаторы урона/лечения
-        for indicator in self.damage_indicators:
-            # Преобразуем координаты с учетом камеры
-            screen_x, screen_y = camera.world_to_screen(indicator['x'], indicator['y'])
-            
-            # Настраиваем прозрачность в зависимости от оставшегося времени жизни
-            alpha = int(255 * (indicator['lifetime'] / self.indicator_lifetime))
-            color = (indicator['color'][0], indicator['color'][1], indicator['color'][2], alpha)
-            
-            # Отрисовываем текст
-            text_surface = self.font.render(indicator['text'], True, color)
-            self.screen.blit(text_surface, (screen_x, screen_y))
+        render_queue = self.world.get_resource(RenderQueue)
+        commands = self._build_bar_commands(camera)
         
-        # Отрисовываем полоски здоровья для сущностей
-        entities = self.world.get_entities_with_components(Health, Position)
-        
-        for entity_id in entities:
-            health = self.world.get_component(entity_id, Health)
-            position = self.world.get_component(entity_id, Position)
-            
-            # Преобразуем координаты с учетом камеры
-            screen_x, screen_y = camera.world_to_screen(position.x, position.y)
-            
-            # Определяем размер полоски здоровья
-            bar_width = 30
-            bar_height = 5
-            
-            # Определяем цвет полоски здоровья
-            health_ratio = health.current / health.maximum
-            if health_ratio > 0.7:
-                color = (0, 255, 0)  # Зеленый
-            elif health_ratio > 0.3:
-                color = (255, 255, 0)  # Желтый
-            else:
-                color = (255, 0, 0)  # Красный
-            
-            # Отрисовываем фон полоски здоровья
-            pygame.draw.rect(self.screen, (0, 0, 0), 
-                            (screen_x - bar_width/2, screen_y - 20, bar_width, bar_height))
-            
-            # Отрисовываем полоску здоровья
-            current_width = bar_width * health_ratio
-            pygame.draw.rect(self.screen, color, 
-                            (screen_x - bar_width/2, screen_y - 20, current_width, bar_height))
+        # Выводим полоски одним вызовом Surface.blits
+        if render_queue:
+            render_queue.extend(commands, source="health")
+            render_queue.flush()
+            # Нарисованные полоски стираются в следующем кадре
+            for surface, dest, _, _ in commands:
+                render_queue.mark_dirty(surface.get_rect(topleft=dest))
+        else:
+            self.screen.blits(commands, doreturn=False)
         
         # Отрисовываем полоску здоровья игрока в углу экрана
-        player_entities = self.world.get_entities_with_components(Player, Health)
+        player_entities = self.player_query
         if player_entities:
             player_id = player_entities[0]
             health = self.world.get_component(player_id, Health)
@@ -266,28 +245,16 @@ class HealthSystem(System):
             bar_x = 20
             bar_y = self.screen.get_height() - 40
             
-            # Определяем цвет полоски здоровья
-            health_ratio = health.current / health.maximum
-            if health_ratio > 0.7:
-                color = (0, 255, 0)  # Зеленый
-            elif health_ratio > 0.3:
-                color = (255, 255, 0)  # Желтый
-            else:
-                color = (255, 0, 0)  # Красный
-            
-            # Отрисовываем фон полоски здоровья
-            pygame.draw.rect(self.screen, (50, 50, 50), 
-                            (bar_x, bar_y, bar_width, bar_height))
-            
             # Отрисовываем полоску здоровья
-            current_width = bar_width * health_ratio
-            pygame.draw.rect(self.screen, color, 
-                            (bar_x, bar_y, current_width, bar_height))
+            bar_surface = self._get_bar_surface(bar_width, bar_height, health.current / health.maximum, (50, 50, 50))
+            self.screen.blit(bar_surface, (bar_x, bar_y))
+            if render_queue:
+                # Область полоски и текста в углу экрана (включая информацию о прогрессе)
+                render_queue.mark_dirty((bar_x, bar_y, bar_width + 220, bar_height + 20))
             
             # Отрисовываем текст с количеством здоровья
             health_text = f"HP: {health.current}/{health.maximum}"
-            text_surface = self.font.render(health_text, True, (255, 255, 255))
-            self.screen.blit(text_surface, (bar_x + 10, bar_y + 2))
+            self.text_renderer.draw(self.screen, health_text, (bar_x + 10, bar_y + 2), (255, 255, 255))
             
             # Отрисовываем информацию о прогрессе, если доступна
             if self.portal_system and hasattr(self.portal_system, 'game_progress'):
@@ -298,10 +265,61 @@ class HealthSystem(System):
                 score_text = f"Счет: {progress.total_score}"
                 kills_text = f"Убито: {progress.enemies_killed}"
                 
-                level_surface = self.font.render(level_text, True, (255, 255, 255))
-                score_surface = self.font.render(score_text, True, (255, 255, 255))
-                kills_surface = self.font.render(kills_text, True, (255, 255, 255))
-                
-                self.screen.blit(level_surface, (bar_x + bar_width + 20, bar_y))
-                self.screen.blit(score_surface, (bar_x + bar_width + 20, bar_y + 20))
-                self.screen.blit(kills_surface, (bar_x + bar_width + 120, bar_y + 20)) 
\ No newline at end of file
+                self.text_renderer.draw(self.screen, level_text, (bar_x + bar_width + 20, bar_y), (255, 255, 255))
+                self.text_renderer.draw(self.screen, score_text, (bar_x + bar_width + 20, bar_y + 20), (255, 255, 255))
+                self.text_renderer.draw(self.screen, kills_text, (bar_x + bar_width + 120, bar_y + 20), (255, 255, 255))
+    
+    def _build_bar_commands(self, camera):
+        """
+        Строит команды вывода полосок здоровья сущностей, видимых камерой
+        :param camera: Камера для преобразования координат
+        :return: Список команд (поверхность, позиция, область, флаги)
+        """
+        commands = []
+        for entity_id in self.health_position_query:
+            health = self.world.get_component(entity_id, Health)
+            position = self.world.get_component(entity_id, Position)
+            
+            # Пропускаем сущности вне экрана
+            if not camera.is_visible(position.x, position.y, self.offscreen_margin):
+                continue
+            
+            # Преобразуем координаты с учетом камеры
+            screen_x, screen_y = camera.world_to_screen(position.x, position.y)
+            
+            # Определяем размер полоски здоровья
+            bar_width = 30
+            bar_height = 5
+            
+            bar_surface = self._get_bar_surface(bar_width, bar_height, health.current / health.maximum, (0, 0, 0))
+            # Позиция целая: blit отбрасывает дробную часть, а Rect области округлял бы ее
+            commands.append((bar_surface, (int(screen_x - bar_width/2), int(screen_y - 20)), None, 0))
+        return commands
+    
+    def _get_bar_surface(self, width, height, health_ratio, background):
+        """
+        Возвращает поверхность полоски здоровья. Поверхности кэшируются по числу заполненных
+        пикселей, поэтому полоска перерисовывается только при изменении здоровья
+        :param width: Ширина полоски
+        :param height: Высота полоски
+        :param health_ratio: Доля оставшегося здоровья
+        :param background: Цвет фона полоски
+        :return: Поверхность полоски
+        """
+        # Определяем цвет полоски здоровья
+        if health_ratio > 0.7:
+            color = (0, 255, 0)  # Зеленый
+        elif health_ratio > 0.3:
+            color = (255, 255, 0)  # Желтый
+        else:
+            color = (255, 0, 0)  # Красный
+        
+        filled = max(0, int(width * health_ratio))
+        key = (width, height, filled, color, background)
+        surface = self.bar_surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((width, height))
+            surface.fill(background)
+            surface.fill(color, (0, 0, filled, height))
+            self.bar_surfaces[key] = surface
+        return surface
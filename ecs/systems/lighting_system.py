@@ -1,14 +1,18 @@
 import pygame
 import math
+import time
 from ecs.systems.system import System
-from ecs.components.components import Position, Player, Velocity, Tile
+from ecs.components.components import Position, Player, Velocity
+from ecs.utils.tile_grid import TileGrid
+from ecs.utils.render_queue import RenderQueue
+from ecs.utils.visibility import build_wall_segments, compute_visibility_polygon
 
 class LightingSystem(System):
-    """Система для создания эффекта освещения с использованием упрощенного Raycasting"""
+    """Система для создания эффекта освещения: свечение вокруг игрока и конус фонарика по многоугольнику видимости"""
     
     def __init__(self, world, screen, camera_system=None):
         """
-        Инициализирует систему освещения на основе упрощенного Raycasting
+        Инициализирует систему освещения
         :param world: Мир ECS
         :param screen: Поверхность Pygame для отрисовки
         :param camera_system: Система камеры для преобразования координат
@@ -18,10 +22,10 @@ class LightingSystem(System):
         self.camera_system = camera_system
         
         # Параметры освещения (упрощенные)
-        self.max_ray_length = 250      # Уменьшенная максимальная длина луча
-        self.ray_count = 60            # Сильно уменьшено количество лучей для оптимизации
+        self.max_ray_length = 250      # Дальность фонарика
         self.fov = 120                 # Угол обзора в градусах
         self.darkness_alpha = 180      # Затемнение (0-255)
+        self.cone_alpha = 120          # Насколько конус фонарика ослабляет затемнение (0-255)
         
         # Параметры мерцания
         self.flicker_intensity = 0.05  # Уменьшена интенсивность мерцания
@@ -33,17 +37,21 @@ class LightingSystem(System):
         self.last_player_pos = (0, 0)
         self.last_player_direction = 0
         
-        # Создаем поверхность для затемнения
-        self.darkness_surface = pygame.Surface((screen.get_width(), screen.get_height()), pygame.SRCALPHA)
+        # Постоянные буферы затемнения и конуса света размером с экран (пересоздаются в resize)
+        self.darkness_surface = None
+        self.light_surface = None
+        self.light_key = None  # Параметры, для которых построено darkness_surface (None - не построено)
+        self.resize(screen.get_width(), screen.get_height())
+        
+        # Счетчики стоимости прохода освещения
+        self.frame_time_ms = 0  # Время отрисовки в последнем кадре
+        self.rebuild_count = 0  # Сколько раз карта освещения перестраивалась
+        self.reuse_count = 0  # Сколько раз карта освещения выводилась без перестройки
         
         # Кэшируем стены для оптимизации
         self.wall_cache = []
         self.wall_cache_dirty = True
         
-        # Предварительно вычисляем углы для лучей
-        self.ray_angles = []
-        self.update_ray_angles()
-        
         # Параметры света вокруг игрока
         self.player_light_radius = 180  # Радиус света вокруг игрока
         self.use_only_player_light = True  # Флаг для использования только света вокруг игрока
@@ -59,7 +67,21 @@ class LightingSystem(System):
         # Оптимизация: кэшируем последний полигон света
         self.last_light_polygon = []
         self.last_player_screen_pos = (0, 0)
+        self.last_light_direction = 0
         
+        # Живые представления запросов
+        self.player_query = world.query(Player, Position)
+    
+    def resize(self, width, height):
+        """
+        Пересоздает буферы освещения под новый размер экрана
+        :param width: Ширина экрана
+        :param height: Высота экрана
+        """
+        self.darkness_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.light_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.light_key = None
+    
     def create_glow_surface(self):
         """Предварительно создает поверхность свечения для оптимизации"""
         glow_radius = self.player_light_radius
@@ -71,15 +93,9 @@ class LightingSystem(System):
             alpha = int(240 * (1 - r / glow_radius))
             pygame.draw.circle(self.glow_surface, (0, 0, 0, alpha), (int(glow_radius), int(glow_radius)), r, 1)
     
-    def update_ray_angles(self):
-        """Обновляет углы для лучей на основе угла обзора"""
-        self.ray_angles = []
-        half_fov = self.fov / 2
-        angle_step = self.fov / (self.ray_count - 1) if self.ray_count > 1 else 0
-        
-        for i in range(self.ray_count):
-            angle = -half_fov + (i * angle_step)
-            self.ray_angles.append(math.radians(angle))
+    def update_light_cone(self):
+        """Сбрасывает кэшированный конус света после изменения угла обзора или дальности"""
+        self.last_light_polygon = []
     
     def update(self, dt):
         """
@@ -98,7 +114,7 @@ class LightingSystem(System):
         self.update_timer = 0.0  # Сбрасываем таймер
             
         # Находим игрока
-        player_entities = self.world.get_entities_with_components(Player, Position)
+        player_entities = self.player_query
         if not player_entities:
             return
         
@@ -126,58 +142,34 @@ class LightingSystem(System):
             self.wall_cache_dirty = False
     
     def update_wall_cache(self):
-        """Обновляет кэш стен для оптимизации расчетов"""
+        """Обновляет кэш стен: контур стен уровня из слитых отрезков"""
         self.wall_cache = []
+        self.last_light_polygon = []
         
-        # Получаем все тайлы-стены
-        tile_entities = self.world.get_entities_with_components(Tile, Position)
-        
-        # Оптимизация: ограничиваем количество стен для проверки
-        max_walls = 200  # Максимальное количество стен для проверки
-        wall_count = 0
+        # Стены берем из сетки тайлов уровня
+        tile_grid = self.world.get_resource(TileGrid)
+        if not tile_grid:
+            return
         
-        for entity_id in tile_entities:
-            tile = self.world.get_component(entity_id, Tile)
-            if not tile.walkable:  # Стена
-                pos = self.world.get_component(entity_id, Position)
-                
-                # Оптимизация: проверяем только стены в радиусе видимости
-                player_x, player_y = self.last_player_pos
-                dx = pos.x - player_x
-                dy = pos.y - player_y
-                distance = math.sqrt(dx * dx + dy * dy)
-                
-                # Если стена слишком далеко, пропускаем ее
-                if distance > self.max_ray_length * 1.5:
-                    continue
-                
-                # Сохраняем координаты углов тайла (для проверки пересечений)
-                tile_size = 32  # Размер тайла
-                half_size = tile_size / 2
-                
-                # Координаты углов тайла
-                x1, y1 = pos.x - half_size, pos.y - half_size  # Верхний левый
-                x2, y2 = pos.x + half_size, pos.y - half_size  # Верхний правый
-                x3, y3 = pos.x + half_size, pos.y + half_size  # Нижний правый
-                x4, y4 = pos.x - half_size, pos.y + half_size  # Нижний левый
-                
-                # Добавляем стороны тайла (для проверки пересечений)
-                self.wall_cache.append(((x1, y1), (x2, y2)))  # Верхняя сторона
-                self.wall_cache.append(((x2, y2), (x3, y3)))  # Правая сторона
-                self.wall_cache.append(((x3, y3), (x4, y4)))  # Нижняя сторона
-                self.wall_cache.append(((x4, y4), (x1, y1)))  # Левая сторона
-                
-                wall_count += 4
-                if wall_count >= max_walls:
-                    break
+        self.wall_cache = build_wall_segments(tile_grid)
     
     def render(self, camera=None):
         """
         Отрисовывает эффект освещения
         :param camera: Камера для преобразования координат
         """
-        # Применяем эффект Raycasting
-        self._apply_raycasting()
+        start_time = time.perf_counter()
+        
+        # При перерисовке по областям камера и игрок не сдвигались - выводим затемнение прошлого кадра
+        render_queue = self.world.get_resource(RenderQueue)
+        if render_queue and render_queue.partial_frame and self.light_key is not None:
+            render_queue.blit_screen(self.darkness_surface)
+            self.reuse_count += 1
+        else:
+            # Строим и выводим карту освещения
+            self._apply_raycasting()
+        
+        self.frame_time_ms = (time.perf_counter() - start_time) * 1000
     
     def _update_flicker(self, dt):
         """
@@ -189,72 +181,9 @@ class LightingSystem(System):
         flicker_offset = math.sin(self.flicker_timer) * self.flicker_intensity
         self.current_flicker = 1.0 + flicker_offset
     
-    def _ray_cast(self, start_x, start_y, angle, max_distance):
-        """
-        Выполняет упрощенный Raycasting из заданной точки в заданном направлении
-        :param start_x: Начальная X координата
-        :param start_y: Начальная Y координата
-        :param angle: Угол луча в радианах
-        :param max_distance: Максимальная длина луча
-        :return: Точка пересечения с ближайшей стеной или конечная точка луча
-        """
-        # Вычисляем конечную точку луча
-        end_x = start_x + math.cos(angle) * max_distance
-        end_y = start_y - math.sin(angle) * max_distance  # Отрицательный Y для соответствия координатам экрана
-        
-        closest_intersection = None
-        closest_distance = float('inf')
-        
-        # Проверяем пересечения со всеми стенами
-        for wall in self.wall_cache:
-            # Проверяем пересечение луча со стеной
-            intersection = self._line_intersection(
-                start_x, start_y, end_x, end_y,
-                wall[0][0], wall[0][1], wall[1][0], wall[1][1]
-            )
-            
-            if intersection:
-                # Вычисляем расстояние до пересечения
-                dx = intersection[0] - start_x
-                dy = intersection[1] - start_y
-                distance = math.sqrt(dx * dx + dy * dy)
-                
-                # Если это ближайшее пересечение, сохраняем его
-                if distance < closest_distance:
-                    closest_distance = distance
-                    closest_intersection = intersection
-        
-        # Если нет пересечений, возвращаем конечную точку луча
-        return closest_intersection if closest_intersection else (end_x, end_y)
-    
-    def _line_intersection(self, x1, y1, x2, y2, x3, y3, x4, y4):
-        """
-        Проверяет пересечение двух отрезков (оптимизированная версия)
-        :return: Координаты точки пересечения или None, если пересечения нет
-        """
-        # Вычисляем определитель
-        den = (y4 - y3) * (x2 - x1) - (x4 - x3) * (y2 - y1)
-        
-        # Если определитель равен 0, линии параллельны
-        if abs(den) < 0.0001:  # Небольшой порог для численной стабильности
-            return None
-            
-        # Вычисляем параметры t и u
-        ua = ((x4 - x3) * (y1 - y3) - (y4 - y3) * (x1 - x3)) / den
-        ub = ((x2 - x1) * (y1 - y3) - (y2 - y1) * (x1 - x3)) / den
-        
-        # Если параметры в диапазоне [0, 1], есть пересечение
-        if 0 <= ua <= 1 and 0 <= ub <= 1:
-            # Вычисляем координаты точки пересечения
-            x = x1 + ua * (x2 - x1)
-            y = y1 + ua * (y2 - y1)
-            return x, y
-            
-        return None
-    
     def _apply_raycasting(self):
         """
-        Применяет эффект освещения с использованием упрощенного Raycasting
+        Применяет эффект освещения: строит конус фонарика по многоугольнику видимости и свечение вокруг игрока
         """
         # Получаем позицию игрока
         player_x, player_y = self.last_player_pos
@@ -262,71 +191,100 @@ class LightingSystem(System):
         # Преобразуем позицию игрока в экранные координаты
         player_screen_x, player_screen_y = self.camera_system.world_to_screen(player_x, player_y)
         
-        # Создаем новую поверхность для затемнения
-        self.darkness_surface = pygame.Surface((self.screen.get_width(), self.screen.get_height()), pygame.SRCALPHA)
-        self.darkness_surface.fill((0, 0, 0, self.darkness_alpha))
-        
-        # Создаем поверхность для света (полностью прозрачная)
-        light_surface = pygame.Surface((self.screen.get_width(), self.screen.get_height()), pygame.SRCALPHA)
+        complete_polygon = None
         
         # Если включен режим "только свет вокруг игрока", не рисуем конус света
         if not self.use_only_player_light:
             # Оптимизация: если игрок не двигался, используем кэшированный полигон
             if (abs(player_screen_x - self.last_player_screen_pos[0]) < 1 and 
                 abs(player_screen_y - self.last_player_screen_pos[1]) < 1 and 
+                self.last_light_direction == self.last_player_direction and
                 len(self.last_light_polygon) > 0):
                 # Используем кэшированный полигон
                 light_polygon = self.last_light_polygon
             else:
-                # Учитываем мерцание в длине лучей
+                # Учитываем мерцание в дальности света
                 max_ray_length = self.max_ray_length * self.current_flicker
                 
-                # Получаем точки для полигона света
-                light_polygon = []
-                
-                # Направление взгляда игрока
-                direction = self.last_player_direction
+                # Сектор обзора в экранных углах (ось Y направлена вниз, поэтому угол меняет знак)
+                half_fov = math.radians(self.fov) / 2
+                start_angle = -(self.last_player_direction + half_fov)
                 
-                # Выполняем Raycasting для каждого угла в поле зрения
-                for ray_angle in self.ray_angles:
-                    # Вычисляем абсолютный угол луча
-                    absolute_angle = direction + ray_angle
-                    
-                    # Выполняем Raycasting
-                    end_x, end_y = self._ray_cast(player_x, player_y, absolute_angle, max_ray_length)
-                    
-                    # Преобразуем мировые координаты в экранные
-                    screen_x, screen_y = self.camera_system.world_to_screen(end_x, end_y)
-                    
-                    # Добавляем точку в полигон
-                    light_polygon.append((screen_x, screen_y))
+                # Строим многоугольник видимости и переводим его в экранные координаты
+                visible = compute_visibility_polygon(player_x, player_y, self.wall_cache, max_ray_length,
+                                                     start_angle, math.radians(self.fov))
+                light_polygon = [self.camera_system.world_to_screen(x, y) for x, y in visible]
                 
                 # Кэшируем полигон и позицию игрока
                 self.last_light_polygon = light_polygon
                 self.last_player_screen_pos = (player_screen_x, player_screen_y)
+                self.last_light_direction = self.last_player_direction
             
-            # Создаем градиентное освещение с затуханием по краям
+            # Формируем полный список точек полигона (при полном обзоре игрок внутри многоугольника)
             if len(light_polygon) > 2:
-                # Формируем полный список точек полигона
-                complete_polygon = [(player_screen_x, player_screen_y)] + light_polygon
-                
-                # Рисуем основной полигон света
-                pygame.draw.polygon(light_surface, (0, 0, 0, 0), complete_polygon)
+                if self.fov >= 360:
+                    complete_polygon = light_polygon
+                else:
+                    complete_polygon = [(player_screen_x, player_screen_y)] + light_polygon
         
-        # Накладываем свет на затемнение с использованием вычитания альфа-канала
-        self.darkness_surface.blit(light_surface, (0, 0), special_flags=pygame.BLEND_RGBA_SUB)
+        # Положение свечения вокруг игрока
+        glow_radius = self.player_light_radius
+        glow_pos = (int(player_screen_x - glow_radius), int(player_screen_y - glow_radius)) if self.glow_surface else None
         
-        # Используем предварительно созданную поверхность свечения
-        if self.glow_surface:
-            # Накладываем свечение на затемнение
-            glow_radius = self.player_light_radius
-            self.darkness_surface.blit(self.glow_surface, 
-                                    (int(player_screen_x - glow_radius), int(player_screen_y - glow_radius)), 
-                                    special_flags=pygame.BLEND_RGBA_SUB)
+        # Карта освещения перестраивается, только если изменились свечение, конус или затемнение
+        key = (self.darkness_alpha, glow_radius, glow_pos, tuple(complete_polygon) if complete_polygon else None)
+        if key != self.light_key:
+            self._build_light_map(key, complete_polygon)
+            self.rebuild_count += 1
+        else:
+            self.reuse_count += 1
         
         # Накладываем затемнение на экран
         self.screen.blit(self.darkness_surface, (0, 0))
     
+    def _build_light_map(self, key, complete_polygon):
+        """
+        Строит карту освещения в постоянном буфере darkness_surface. Если прошлая карта отличается
+        только положением свечения, заново заливается лишь его прошлая область
+        :param key: Параметры карты (затемнение, радиус свечения, позиция свечения, полигон конуса)
+        :param complete_polygon: Полигон конуса света в экранных координатах или None
+        """
+        darkness_alpha, glow_radius, glow_pos, _ = key
+        darkness_color = (0, 0, 0, darkness_alpha)
+        previous = self.light_key
+        
+        if (previous is not None and previous[0] == darkness_alpha and previous[2] is not None
+                and previous[3] is None and complete_polygon is None):
+            # Заливка без смешивания полностью восстанавливает затемнение в прошлой области свечения
+            previous_size = int(previous[1] * 2)
+            self.darkness_surface.fill(darkness_color, (previous[2][0], previous[2][1], previous_size, previous_size))
+        else:
+            self.darkness_surface.fill(darkness_color)
+        
+        if complete_polygon:
+            # Рисуем основной полигон света и вычитаем его из затемнения
+            self.light_surface.fill((0, 0, 0, 0))
+            pygame.draw.polygon(self.light_surface, (0, 0, 0, self.cone_alpha), complete_polygon)
+            self.darkness_surface.blit(self.light_surface, (0, 0), special_flags=pygame.BLEND_RGBA_SUB)
+        
+        # Используем предварительно созданную поверхность свечения
+        if glow_pos is not None:
+            self.darkness_surface.blit(self.glow_surface, glow_pos, special_flags=pygame.BLEND_RGBA_SUB)
+        
+        self.light_key = key
+    
+    def get_stats(self):
+        """
+        Возвращает счетчики стоимости прохода освещения
+        :return: Словарь со счетчиками
+        """
+        return {
+            'frame_time_ms': self.frame_time_ms,
+            'rebuild_count': self.rebuild_count,
+            'reuse_count': self.reuse_count,
+            'buffer_bytes': 2 * self.darkness_surface.get_width() * self.darkness_surface.get_height() * 4,
+        }
+    
     def set_player_light_only(self, value):
         """
         Устанавливает режим освещения только вокруг игрока
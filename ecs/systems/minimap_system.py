@@ -2,6 +2,8 @@ import pygame
 import math
 from ecs.systems.system import System
 from ecs.components.components import Minimap, Position, Player
+from ecs.utils.render_queue import RenderQueue
+from ecs.utils.text_renderer import get_text_renderer
 
 class MinimapSystem(System):
     """
@@ -13,6 +15,10 @@ class MinimapSystem(System):
         self.player_position = None
         self.pulse_timer = 0
         
+        # Живые представления запросов
+        self.player_query = world.query(Player, Position)
+        self.minimap_query = world.query(Minimap)
+    
     def update(self, dt):
         """
         Обновляет мини-карту
@@ -22,7 +28,7 @@ class MinimapSystem(System):
         self.pulse_timer += dt
         
         # Получаем позицию игрока
-        player_entities = self.world.get_entities_with_components(Player, Position)
+        player_entities = self.player_query
         if player_entities:
             player_id = player_entities[0]
             self.player_position = self.world.get_component(player_id, Position)
@@ -32,7 +38,7 @@ class MinimapSystem(System):
         Отрисовывает мини-карту
         :param camera: Камера для преобразования координат (не используется для мини-карты)
         """
-        minimap_entities = self.world.get_entities_with_components(Minimap)
+        minimap_entities = self.minimap_query
         if not minimap_entities:
             return
             
@@ -73,10 +79,14 @@ class MinimapSystem(System):
         self.screen.blit(display_surface, minimap.position)
         
         # Добавляем заголовок мини-карты
-        font = pygame.font.SysFont(None, 20)
-        title_surface = font.render("КАРТА", True, (255, 255, 255))
+        title_surface = get_text_renderer(20).render("КАРТА", (255, 255, 255))
         self.screen.blit(title_surface, (minimap.position[0] + minimap_width // 2 - title_surface.get_width() // 2, 
                                         minimap.position[1] - 25))
+        
+        # Маркер игрока пульсирует, поэтому область мини-карты перерисовывается каждый кадр
+        render_queue = self.world.get_resource(RenderQueue)
+        if render_queue:
+            render_queue.mark_dirty((minimap.position[0], minimap.position[1] - 25, minimap_width, minimap_height + 25))
     
     # Оставляем метод draw для обратной совместимости
     def draw(self):
@@ -1,35 +1,48 @@
 from ecs.systems.system import System
 from ecs.components.components import Position, Velocity, Collider, Tile
+from ecs.utils.tile_grid import TileGrid
 
 class MovementSystem(System):
     """Система для обработки движения сущностей"""
     
+    def __init__(self, world):
+        super().__init__(world)
+        
+        # Режим разрешения столкновений со стенами по сетке тайлов: проверяются только
+        # клетки, которые перекрывает AABB сущности. Если False или сетки нет,
+        # используется полный перебор всех коллайдеров
+        self.use_tile_grid = True
+        
+        # Живые представления запросов
+        self.moving_query = world.query(Position, Velocity)
+        self.collider_query = world.query(Position, Collider)
+        self.dynamic_collider_query = world.query(Position, Collider, exclude=(Tile,))
+        self.tile_query = world.query(Position, Tile)
+        
+        # Границы уровня считаются один раз для каждой сетки тайлов (т.е. для каждого уровня)
+        self.level_bounds = None
+        self.bounds_grid = None
+    
     def update(self, dt):
         """
         Обновляет позиции всех сущностей с компонентами Position и Velocity
         :param dt: Время, прошедшее с последнего обновления (в секундах)
         """
         # Получаем все сущности с компонентами Position и Velocity
-        entities = self.world.get_entities_with_components(Position, Velocity)
+        entities = self.moving_query
         
-        # Получаем все сущности с коллайдерами (стены)
-        collision_entities = self.world.get_entities_with_components(Position, Collider)
+        # Сетка тайлов уровня (если она есть, стены проверяются по ней)
+        tile_grid = self.world.get_resource(TileGrid) if self.use_tile_grid else None
         
-        # Получаем все тайлы для проверки границ лабиринта
-        tile_entities = self.world.get_entities_with_components(Position, Tile)
+        if tile_grid:
+            # Со стенами проверяем по сетке, с остальными коллайдерами - отдельно
+            collision_entities = self.dynamic_collider_query
+        else:
+            # Получаем все сущности с коллайдерами (стены)
+            collision_entities = self.collider_query
         
         # Находим границы лабиринта
-        min_x = float('inf')
-        min_y = float('inf')
-        max_x = float('-inf')
-        max_y = float('-inf')
-        
-        for entity_id in tile_entities:
-            pos = self.world.get_component(entity_id, Position)
-            min_x = min(min_x, pos.x - 16)  # 16 - половина размера тайла
-            min_y = min(min_y, pos.y - 16)
-            max_x = max(max_x, pos.x + 16)
-            max_y = max(max_y, pos.y + 16)
+        min_x, min_y, max_x, max_y = self._get_level_bounds(tile_grid)
         
         for entity_id in entities:
             position = self.world.get_component(entity_id, Position)
@@ -49,12 +62,12 @@ class MovementSystem(System):
                 # Проверяем коллизии по X и Y отдельно для более точного определения
                 # Сначала перемещаем по X
                 position.x = new_x
-                if self._check_collisions(entity_id, collision_entities):
+                if self._check_collisions(entity_id, collision_entities, tile_grid):
                     position.x = old_x  # Возвращаем старую позицию по X
                 
                 # Затем перемещаем по Y
                 position.y = new_y
-                if self._check_collisions(entity_id, collision_entities):
+                if self._check_collisions(entity_id, collision_entities, tile_grid):
                     position.y = old_y  # Возвращаем старую позицию по Y
                 
                 # Проверяем границы лабиринта
@@ -69,11 +82,41 @@ class MovementSystem(System):
                 position.x = new_x
                 position.y = new_y
     
-    def _check_collisions(self, entity_id, collision_entities):
+    def _get_level_bounds(self, tile_grid):
+        """
+        Возвращает границы лабиринта
+        :param tile_grid: Сетка тайлов уровня или None
+        :return: Кортеж (min_x, min_y, max_x, max_y)
+        """
+        # С сеткой тайлов границы пересчитываются только при смене уровня
+        if tile_grid:
+            if tile_grid is not self.bounds_grid:
+                self.bounds_grid = tile_grid
+                self.level_bounds = tile_grid.get_bounds()
+            if self.level_bounds:
+                return self.level_bounds
+        
+        # Без сетки находим границы по всем тайлам
+        min_x = float('inf')
+        min_y = float('inf')
+        max_x = float('-inf')
+        max_y = float('-inf')
+        
+        for entity_id in self.tile_query:
+            pos = self.world.get_component(entity_id, Position)
+            min_x = min(min_x, pos.x - 16)  # 16 - половина размера тайла
+            min_y = min(min_y, pos.y - 16)
+            max_x = max(max_x, pos.x + 16)
+            max_y = max(max_y, pos.y + 16)
+        
+        return min_x, min_y, max_x, max_y
+    
+    def _check_collisions(self, entity_id, collision_entities, tile_grid=None):
         """
         Проверяет столкновения между сущностью и другими сущностями с коллайдерами
         :param entity_id: ID проверяемой сущности
         :param collision_entities: Список сущностей с коллайдерами
+        :param tile_grid: Сетка тайлов уровня; если передана, стены проверяются по ней
         :return: True, если есть столкновение, иначе False
         """
         # Получаем компоненты текущей сущности
@@ -86,6 +129,10 @@ class MovementSystem(System):
         entity_top = position.y - collider.height / 2
         entity_bottom = position.y + collider.height / 2
         
+        # Стены: проверяем только клетки сетки, которые перекрывает AABB сущности
+        if tile_grid and self._check_wall_collisions(tile_grid, entity_left, entity_top, entity_right, entity_bottom):
+            return True
+        
         for other_id in collision_entities:
             # Пропускаем саму сущность
             if other_id == entity_id:
@@ -110,4 +157,26 @@ class MovementSystem(System):
                 entity_top < other_bottom and entity_bottom > other_top):
                 return True
         
-        return False 
\ No newline at end of file
+        return False
+    
+    def _check_wall_collisions(self, tile_grid, left, top, right, bottom):
+        """
+        Проверяет пересечение AABB со стенами по сетке тайлов
+        :param tile_grid: Сетка тайлов уровня
+        :param left: Левая граница AABB
+        :param top: Верхняя граница AABB
+        :param right: Правая граница AABB
+        :param bottom: Нижняя граница AABB
+        :return: True, если AABB перекрывает хотя бы одну стену
+        """
+        min_tx, min_ty, max_tx, max_ty = tile_grid.get_tile_range(left, top, right, bottom)
+        solid = tile_grid.solid
+        width = tile_grid.width
+        
+        for ty in range(min_ty, max_ty + 1):
+            row = ty * width
+            for tx in range(min_tx, max_tx + 1):
+                if solid[row + tx]:
+                    return True
+        
+        return False
\ No newline at end of file
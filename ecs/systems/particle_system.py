@@ -0,0 +1,267 @@
+import random
+import numpy as np
+import pygame
+from ecs.systems.system import System
+from ecs.utils.render_queue import RenderQueue
+
+class ParticleSystem(System):
+    """
+    Система частиц эффектов попадания. Частицы хранятся по столбцам (структура массивов)
+    в заранее выделенных массивах NumPy фиксированной емкости: обновление выполняется
+    векторно, погибшие частицы удаляются перестановкой последних живых на их место,
+    а отрисовка выводит готовые спрайты из пула (цвет, радиус, уровень затухания)
+    одним вызовом Surface.blits
+    """
+
+    def __init__(self, world, screen, camera_system, capacity=8192):
+        """
+        Инициализирует систему частиц
+        :param world: Мир ECS
+        :param screen: Поверхность Pygame для отрисовки
+        :param camera_system: Система камеры для преобразования координат
+        :param capacity: Максимальное число одновременно живущих частиц
+        """
+        super().__init__(world)
+        self.screen = screen
+        self.camera_system = camera_system
+        self.capacity = capacity
+
+        # Столбцы частиц: живые частицы занимают индексы [0, count)
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.dx = np.zeros(capacity, dtype=np.float32)
+        self.dy = np.zeros(capacity, dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.float32)
+        self.lifetime = np.ones(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.int16)  # Индекс цвета в палитре
+        self.columns = (self.x, self.y, self.dx, self.dy, self.size, self.age, self.lifetime, self.color)
+        self.count = 0
+
+        # Палитра цветов частиц
+        self.palette = []
+        self.palette_index = {}  # Цвет -> индекс в палитре
+
+        # Параметры движения и отрисовки
+        self.friction = 0.95  # Множитель скорости за обновление
+        self.fade_levels = 16  # Число уровней затухания в пуле спрайтов
+        self.sprites = {}  # (индекс цвета, радиус, уровень затухания) -> поверхность
+
+        # Счетчики
+        self.dropped = 0  # Частиц не создано из-за заполненной емкости
+        self.drawn = 0  # Частиц выведено в последнем кадре
+
+    def create_hit_effect(self, x, y, color):
+        """
+        Создает вспышку частиц в месте попадания
+        :param x: Координата X
+        :param y: Координата Y
+        :param color: Цвет частиц (r, g, b)
+        """
+        self.emit(x, y, color, random.randint(25, 35))
+
+    def emit(self, x, y, color, count, speed=(80, 250), size=(1.5, 4), lifetime=(0.3, 0.6)):
+        """
+        Создает частицы, разлетающиеся из точки во все стороны
+        :param x: Координата X
+        :param y: Координата Y
+        :param color: Цвет частиц (r, g, b); альфа-канал отбрасывается
+        :param count: Количество частиц
+        :param speed: Диапазон начальной скорости (мин, макс) в пикселях в секунду
+        :param size: Диапазон радиуса (мин, макс)
+        :param lifetime: Диапазон времени жизни (мин, макс) в секундах
+        """
+        available = self.capacity - self.count
+        if count > available:
+            self.dropped += count - available
+            count = available
+        if count <= 0:
+            return
+
+        # Генератор засевается из random, чтобы частицы повторялись при заданном random.seed
+        rng = np.random.default_rng(random.getrandbits(32))
+        angles = rng.uniform(0, 2 * np.pi, count)
+        speeds = rng.uniform(speed[0], speed[1], count)
+
+        start = self.count
+        end = start + count
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.dx[start:end] = np.cos(angles) * speeds
+        self.dy[start:end] = np.sin(angles) * speeds
+        self.size[start:end] = rng.uniform(size[0], size[1], count)
+        self.age[start:end] = 0
+        self.lifetime[start:end] = rng.uniform(lifetime[0], lifetime[1], count)
+        self.color[start:end] = self._get_color_index(tuple(color[:3]))
+        self.count = end
+
+    def _get_color_index(self, color):
+        """
+        Возвращает индекс цвета в палитре, добавляя новый цвет
+        :param color: Цвет (r, g, b)
+        :return: Индекс в палитре
+        """
+        index = self.palette_index.get(color)
+        if index is None:
+            index = self.palette_index[color] = len(self.palette)
+            self.palette.append(color)
+        return index
+
+    def clear(self):
+        """Удаляет все частицы"""
+        self.count = 0
+
+    def update(self, dt):
+        """
+        Обновляет частицы: движение, трение, старение и удаление погибших
+        :param dt: Время, прошедшее с последнего обновления (в секундах)
+        """
+        n = self.count
+        if n == 0:
+            return
+
+        dx = self.dx[:n]
+        dy = self.dy[:n]
+        self.x[:n] += dx * dt
+        self.y[:n] += dy * dt
+        dx *= self.friction
+        dy *= self.friction
+        age = self.age[:n]
+        age += dt
+
+        dead = np.flatnonzero(age >= self.lifetime[:n])
+        if len(dead):
+            self._remove(dead)
+
+        # Частицы разлетаются за пределы областей прошлого кадра, поэтому в режиме грязных
+        # прямоугольников область, охватывающая все частицы кадра, заявляется до его подготовки
+        render_queue = self.world.get_resource(RenderQueue)
+        if render_queue and render_queue.collect_upcoming:
+            geometry = self._get_screen_geometry()
+            if geometry is not None:
+                render_queue.mark_upcoming(self._get_bounds(geometry))
+
+    def _remove(self, dead):
+        """
+        Удаляет частицы, переставляя на их место последние живые частицы
+        :param dead: Отсортированные индексы удаляемых частиц
+        """
+        n = self.count
+        alive_count = n - len(dead)
+
+        # Дыры внутри новой границы заполняются живыми частицами из хвоста
+        holes = dead[dead < alive_count]
+        if len(holes):
+            tail_alive = np.ones(n - alive_count, dtype=bool)
+            tail_alive[dead[dead >= alive_count] - alive_count] = False
+            movers = np.flatnonzero(tail_alive) + alive_count
+            for column in self.columns:
+                column[holes] = column[movers]
+
+        self.count = alive_count
+
+    def render(self, camera=None):
+        """
+        Отрисовывает видимые частицы спрайтами из пула одним вызовом Surface.blits
+        :param camera: Камера для преобразования координат (не используется, так как у нас есть self.camera_system)
+        """
+        self.drawn = 0
+        geometry = self._get_screen_geometry()
+        if geometry is None:
+            return
+
+        # Уровень затухания всех видимых частиц
+        visible, screen_x, screen_y, radii = geometry
+        fade = 1 - self.age[visible] / self.lifetime[visible]
+        levels = np.clip(np.ceil(fade * self.fade_levels), 0, self.fade_levels).astype(np.int32)
+        colors = self.color[visible]
+
+        sprites = self.sprites
+        commands = []
+        for sx, sy, radius, level, color in zip(screen_x.tolist(), screen_y.tolist(), radii.tolist(),
+                                                levels.tolist(), colors.tolist()):
+            key = (color, radius, level)
+            sprite = sprites.get(key)
+            if sprite is None:
+                sprite = sprites[key] = self._create_sprite(self.palette[color], radius, level)
+            commands.append((sprite, (sx - radius, sy - radius), None, 0))
+
+        render_queue = self.world.get_resource(RenderQueue)
+        if render_queue:
+            render_queue.extend(commands, source="particles")
+            render_queue.flush()
+
+            # Нарисованная область стирается в следующем кадре
+            render_queue.mark_dirty(self._get_bounds(geometry))
+        else:
+            self.screen.blits(commands, doreturn=False)
+
+        self.drawn = len(commands)
+
+    def _get_bounds(self, geometry):
+        """
+        Вычисляет область экрана, охватывающую все видимые частицы
+        :param geometry: Результат _get_screen_geometry
+        :return: Кортеж (x, y, ширина, высота)
+        """
+        _, screen_x, screen_y, radii = geometry
+        max_radius = int(radii.max())
+        min_x = int(screen_x.min()) - max_radius
+        min_y = int(screen_y.min()) - max_radius
+        return (min_x, min_y,
+                int(screen_x.max()) + max_radius + 1 - min_x,
+                int(screen_y.max()) + max_radius + 1 - min_y)
+
+    def _get_screen_geometry(self):
+        """
+        Отбирает частицы в видимой области и переводит их в экранные координаты
+        :return: Кортеж массивов (индексы видимых частиц, экранные X, экранные Y, радиусы)
+                 или None, если видимых частиц нет
+        """
+        n = self.count
+        if n == 0:
+            return None
+
+        camera_system = self.camera_system
+        zoom = camera_system.get_zoom()
+        left, top, right, bottom = camera_system.get_visible_rect()
+
+        # Отсекаем частицы вне видимой области
+        x = self.x[:n]
+        y = self.y[:n]
+        size = self.size[:n]
+        visible = np.flatnonzero((x + size >= left) & (x - size <= right) & (y + size >= top) & (y - size <= bottom))
+        if len(visible) == 0:
+            return None
+
+        screen_x = ((x[visible] - left) * zoom).astype(np.int32)
+        screen_y = ((y[visible] - top) * zoom).astype(np.int32)
+        radii = np.maximum(1, (size[visible] * zoom).astype(np.int32))
+        return visible, screen_x, screen_y, radii
+
+    def _create_sprite(self, color, radius, level):
+        """
+        Создает спрайт частицы для пула
+        :param color: Цвет (r, g, b)
+        :param radius: Радиус на экране
+        :param level: Уровень затухания (fade_levels - полная яркость, 0 - черный)
+        :return: Поверхность с кругом
+        """
+        fade = level / self.fade_levels
+        faded = (int(color[0] * fade), int(color[1] * fade), int(color[2] * fade))
+        sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, faded, (radius, radius), radius)
+        return sprite
+
+    def get_stats(self):
+        """
+        Возвращает счетчики системы частиц
+        :return: Словарь со счетчиками
+        """
+        return {
+            'count': self.count,
+            'capacity': self.capacity,
+            'drawn': self.drawn,
+            'dropped': self.dropped,
+            'sprites': len(self.sprites),
+        }
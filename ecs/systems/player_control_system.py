@@ -4,14 +4,24 @@ from ecs.systems.system import System
 from ecs.components.components import Position, Velocity, Player, Weapon, Sprite
 from ecs.systems.camera_system import CameraSystem
 from ecs.systems.weapon_system import WeaponSystem
+from ecs.utils.input_source import PygameInput
 
 class PlayerControlSystem(System):
     """Система для обработки пользовательского ввода и управления игроком"""
     
-    def __init__(self, world):
+    def __init__(self, world, input_source=None):
+        """
+        Инициализирует систему управления игроком
+        :param world: Мир ECS
+        :param input_source: Источник ввода (None - клавиатура и мышь pygame)
+        """
         super().__init__(world)
+        self.input_source = input_source or PygameInput()
         self.weapon_system = None
         self.debug_mode = False  # Отключаем режим отладки
+        
+        # Живое представление запроса игроков
+        self.player_query = world.query(Player, Position, Velocity)
     
     def set_weapon_system(self, weapon_system):
         """
@@ -27,7 +37,7 @@ class PlayerControlSystem(System):
         :param dt: Время, прошедшее с последнего обновления (в секундах)
         """
         # Получаем все сущности с компонентами Player, Position и Velocity
-        player_entities = self.world.get_entities_with_components(Player, Position, Velocity)
+        player_entities = self.player_query
         
         if not player_entities:
             return  # Нет игроков для обработки
@@ -47,7 +57,7 @@ class PlayerControlSystem(System):
                 print(f"У игрока нет компонента Weapon!")
             
             # Получаем состояние клавиш
-            keys = pygame.key.get_pressed()
+            keys = self.input_source.get_pressed()
             
             # Сбрасываем скорость
             velocity.dx = 0
@@ -69,7 +79,7 @@ class PlayerControlSystem(System):
                 velocity.dy *= 0.7071
             
             # Получаем позицию курсора мыши
-            mouse_x, mouse_y = pygame.mouse.get_pos()
+            mouse_x, mouse_y = self.input_source.get_mouse_pos()
             camera_system = next((system for system in self.world.systems if isinstance(system, CameraSystem)), None)
             
             if camera_system:
@@ -91,7 +101,7 @@ class PlayerControlSystem(System):
                     sprite.angle = angle + 90
             
                 # Обработка стрельбы
-                mouse_buttons = pygame.mouse.get_pressed()
+                mouse_buttons = self.input_source.get_mouse_pressed()
                 if mouse_buttons[0]:  # Левая кнопка мыши
                     if self.debug_mode:
                         print(f"Клик мыши: экран({mouse_x}, {mouse_y}), мир({world_mouse_x:.1f}, {world_mouse_y:.1f})")
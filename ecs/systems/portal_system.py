@@ -4,6 +4,7 @@ from ecs.systems.system import System
 from ecs.components.components import Position, Player, Portal, Tile, GameProgress
 from ecs.factories.level_factory import create_level
 from ecs.factories.enemy_factory import create_enemy
+from ecs.utils.tile_grid import TileGrid, TILE_EXIT
 
 class PortalSystem(System):
     """
@@ -25,6 +26,10 @@ class PortalSystem(System):
         # Инициализируем компонент прогресса игры
         self.game_progress = GameProgress()
         
+        # Живые представления запросов
+        self.player_query = world.query(Player, Position)
+        self.portal_query = world.query(Portal, Position)
+        
         # Отладочный вывод при инициализации только если включен режим отладки
         if self.debug:
             print("Система порталов инициализирована")
@@ -64,7 +69,7 @@ class PortalSystem(System):
             return
             
         # Находим игрока
-        player_entities = self.world.get_entities_with_components(Player, Position)
+        player_entities = self.player_query
         if not player_entities:
             if self.debug:
                 print("PortalSystem: Игрок не найден!")
@@ -74,7 +79,7 @@ class PortalSystem(System):
         player_pos = self.world.get_component(player_id, Position)
         
         # Находим все порталы
-        portal_entities = self.world.get_entities_with_components(Portal, Position)
+        portal_entities = self.portal_query
         
         # Отладочный вывод количества найденных порталов только если включен режим отладки
         if self.debug:
@@ -83,14 +88,15 @@ class PortalSystem(System):
             else:
                 print(f"PortalSystem: Найдено порталов: {len(portal_entities)}")
         
-        # Находим все тайлы выхода (exit)
+        # Находим все тайлы выхода (exit) по сетке тайлов уровня
         exit_tiles = []
-        tile_entities = self.world.get_entities_with_components(Tile, Position)
-        for entity_id in tile_entities:
-            tile = self.world.get_component(entity_id, Tile)
-            if tile.name == "exit":
+        tile_grid = self.world.get_resource(TileGrid)
+        if tile_grid:
+            for tx, ty in tile_grid.get_tiles(TILE_EXIT):
+                entity_id = tile_grid.get_entity(tx, ty)
                 exit_pos = self.world.get_component(entity_id, Position)
-                exit_tiles.append((entity_id, exit_pos))
+                if exit_pos:
+                    exit_tiles.append((entity_id, exit_pos))
                 
         # Если нашли тайлы выхода, проверяем находится ли игрок на них
         for exit_id, exit_pos in exit_tiles:
@@ -1,11 +1,18 @@
 import pygame
 import math
+import bisect
 from ecs.systems.system import System
-from ecs.components.components import Position, Sprite, Health, Weapon, PathDebug, Player
+from ecs.components.components import Position, Sprite, Health, Weapon, PathDebug, Player, Tile
+from ecs.utils.surface_cache import SurfaceCache
+from ecs.utils.render_queue import RenderQueue
+from ecs.utils.text_renderer import get_text_renderer
+from ecs.utils.tile_grid import TileGrid
 
 class RenderSystem(System):
     """Система для отрисовки игровых объектов"""
     
+    CHUNK_TILES = 16  # Размер чанка уровня в тайлах
+    
     def __init__(self, world, screen, camera_system):
         """
         Инициализирует систему отрисовки
@@ -18,7 +25,7 @@ class RenderSystem(System):
         self.camera_system = camera_system
         
         # Создаем шрифт для отображения текста
-        self.font = pygame.font.SysFont(None, 24)
+        self.text_renderer = get_text_renderer(24)
         
         # Загружаем или создаем текстуры для интерфейса
         self.ui_textures = self._create_ui_textures()
@@ -28,12 +35,53 @@ class RenderSystem(System):
         
         # Создаем поверхность для затемнения
         self.darkness_surface = None
+        self.darkness_color = (0, 0, 0, 180)  # RGBA: черный с 70% непрозрачности
+        self.darkness_composite = None  # Затемнение с вырезанным светом, выведенное в последнем кадре
+        self.darkness_key = None  # Параметры, для которых построено darkness_composite
+        self.vignette_only = False  # Дешевый режим: неподвижная виньетка вместо круга вокруг игрока
         self.light_radius = 300  # Радиус света вокруг игрока
         
         # Предварительно создаем градиентные маски для разных масштабов
         self.light_masks = {}
         self.current_zoom = 0
         self.update_darkness_surface()
+        
+        # Кэш преобразованных изображений спрайтов (сбрасывается при смене масштаба)
+        self.surface_cache = SurfaceCache(max_bytes=32 * 1024 * 1024)
+        
+        # Очередь команд отрисовки, общая для систем (ресурс мира)
+        self.render_queue = RenderQueue(screen)
+        world.add_resource(self.render_queue)
+        
+        # Режим перерисовки только изменившихся областей экрана (грязных прямоугольников)
+        self.dirty_rects_enabled = False
+        self.full_redraw_threshold = 0.5  # Сдвиг камеры (в пикселях экрана), после которого кадр перерисовывается целиком
+        self.max_dirty_rects = 8  # При большем числе областей кадр перерисовывается целиком
+        self.max_dirty_area = 0.5  # Доля площади экрана, начиная с которой кадр перерисовывается целиком
+        self.full_redraw_requested = True
+        self.drawn_view = None  # Состояние камеры и игрока при последней полной перерисовке
+        self.drawn_sprites = set()  # Спрайты последнего кадра: (id изображения, x, y, ширина, высота)
+        self.sprite_commands = None  # Команды спрайтов текущего кадра, построенные в prepare_frame
+        
+        # Уровень разбит на чанки CHUNK_TILES x CHUNK_TILES тайлов. Поверхность чанка
+        # запекается при первом появлении чанка на экране
+        self.chunk_size = self.CHUNK_TILES * 32  # Размер чанка в мировых единицах
+        self.chunk_tiles = {}  # (cx, cy) -> список ID тайлов, спрайты которых перекрывают чанк
+        self.chunk_surfaces = {}  # (cx, cy) -> запеченная поверхность чанка
+        self.chunks_key = None  # Ключ актуальности разбиения (сетка тайлов, число тайлов)
+        
+        # Живые представления запросов
+        self.tile_sprite_query = world.query(Tile, Sprite, Position)
+        self.dynamic_sprite_query = world.query(Sprite, Position, exclude=(Tile,))
+        self.player_query = world.query(Player, Position)
+        self.path_query = world.query(PathDebug, Position)
+        
+        # Динамические спрайты, разложенные по слоям. Корзины поддерживаются подписками на
+        # представление запроса, поэтому спрайты не сортируются каждый кадр
+        self.sprite_layers = {}  # Слой -> {ID сущности: (Sprite, Position)}
+        self.sprite_entity_layers = {}  # ID сущности -> слой, в корзине которого она лежит
+        self.sorted_layers = []  # Слои, для которых есть корзины, по возрастанию
+        self.dynamic_sprite_query.add_listener(self._add_to_layer, self._remove_from_layer)
     
     def update_darkness_surface(self):
         """Обновляет поверхность затемнения"""
@@ -41,7 +89,10 @@ class RenderSystem(System):
         self.darkness_surface = pygame.Surface((self.screen.get_width(), self.screen.get_height()), pygame.SRCALPHA)
         
         # Заполняем поверхность полупрозрачным черным цветом
-        self.darkness_surface.fill((0, 0, 0, 180))  # RGBA: черный с 70% непрозрачности
+        self.darkness_surface.fill(self.darkness_color)
+        
+        # Построенное затемнение больше не соответствует экрану
+        self.darkness_key = None
     
     def _create_light_mask(self, radius):
         """
@@ -68,7 +119,7 @@ class RenderSystem(System):
     
     def update(self, dt):
         """
-        Отрисовывает все объекты
+        Обновляет состояние отрисовки (сама отрисовка выполняется в проходах render_*)
         :param dt: Время, прошедшее с последнего обновления (в секундах)
         """
         # Проверяем, изменился ли масштаб камеры
@@ -78,111 +129,496 @@ class RenderSystem(System):
             self.light_masks = {}
             self.current_zoom = current_zoom
         
-        # Очищаем экран
-        self.screen.fill((0, 0, 0))
-        
-        # Получаем все сущности со спрайтами и позициями
-        sprite_entities = self.world.get_entities_with_components(Sprite, Position)
-        
-        # Сортируем сущности по слою спрайта (чтобы отрисовывать в правильном порядке)
-        sprite_entities.sort(key=lambda entity_id: self.world.get_component(entity_id, Sprite).layer)
+        # Строки интерфейса меняют ширину вместе со значениями, поэтому их области
+        # заявляются до подготовки кадра
+        if self.render_queue.collect_upcoming:
+            for text, pos in self._get_ui_texts():
+                self.render_queue.mark_upcoming(self.text_renderer.get_rect(text, pos))
+    
+    def request_full_redraw(self):
+        """Требует перерисовать следующий кадр целиком (например, после изменения настроек или смены экрана)"""
+        self.full_redraw_requested = True
+    
+    def prepare_frame(self):
+        """
+        Готовит кадр к отрисовке: начинает кадр очереди отрисовки, а в режиме грязных
+        прямоугольников определяет области экрана, которые нужно перерисовать
+        :return: Список прямоугольников для перерисовки или None, если кадр перерисовывается целиком
+        """
+        render_queue = self.render_queue
+        render_queue.begin_frame()
+        
+        # Пока режим был выключен, системы не заявляли области кадра заранее
+        if self.dirty_rects_enabled and not render_queue.collect_upcoming:
+            self.full_redraw_requested = True
+        render_queue.collect_upcoming = self.dirty_rects_enabled
+        
+        # В режиме грязных прямоугольников смещение вывода камеры меняется только при полной
+        # перерисовке: сдвиг камеры меньше порога откладывается, а не рисуется частью кадра
+        camera_system = self.camera_system
+        camera_system.view_held = self.dirty_rects_enabled
+        view = self._get_view() if self.dirty_rects_enabled else None
+        full_redraw = view is None or self._needs_full_redraw(view)
+        if full_redraw:
+            camera_system.sync_view()
+        
+        # Команды спрайтов строятся один раз за кадр (со смещением вывода этого кадра):
+        # по ним ищутся изменившиеся области, и их же выводит проход render_world
+        self.sprite_commands = self._build_sprite_commands()
+        
+        if self.dirty_rects_enabled:
+            dirty_rects = self._find_dirty_rects(view, full_redraw)
+        else:
+            dirty_rects = self._full_redraw(None)
+        render_queue.partial_frame = dirty_rects is not None
+        render_queue.frame_rects = dirty_rects
+        return dirty_rects
+    
+    def _find_dirty_rects(self, view, full_redraw):
+        """
+        Определяет области экрана, которые изменились с прошлого кадра
+        :param view: Текущее состояние (см. _get_view)
+        :param full_redraw: Кадр перерисовывается целиком (см. _needs_full_redraw)
+        :return: Список прямоугольников или None, если кадр нужно перерисовать целиком
+        """
+        # Спрайты текущего кадра в том виде, в котором они будут выведены
+        sprites = set()
+        for image, dest, _, _ in self.sprite_commands:
+            width, height = image.get_size()
+            sprites.add((id(image), int(dest[0]), int(dest[1]), width, height))
+        previous_sprites = self.drawn_sprites
+        self.drawn_sprites = sprites
+        
+        if full_redraw:
+            return self._full_redraw(view)
+        
+        # Перерисовываем появившиеся, исчезнувшие и изменившиеся спрайты, а также области,
+        # которые системы нарисовали в прошлом кадре и заявили на текущий
+        screen_rect = self.screen.get_rect()
+        rects = [pygame.Rect(key[1:]) for key in previous_sprites ^ sprites]
+        rects.extend(pygame.Rect(rect) for rect in self.render_queue.get_dirty_rects())
+        
+        merged = []
+        for rect in rects:
+            rect = rect.clip(screen_rect)
+            if not rect.width or not rect.height:
+                continue
+            # Объединяем пересекающиеся области, чтобы не перерисовывать их дважды
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        
+        # Много мелких областей или большая общая площадь дешевле перерисовать целиком.
+        # Кадр выводится с прежним смещением камеры, поэтому состояние полной перерисовки не меняется
+        if (len(merged) > self.max_dirty_rects or
+                sum(rect.width * rect.height for rect in merged) > screen_rect.width * screen_rect.height * self.max_dirty_area):
+            return None
+        return merged
+    
+    def _get_view(self):
+        """
+        Возвращает состояние, от которого зависит весь кадр: положение камеры, позиция игрока
+        (затемнение и свет привязаны к игроку), масштаб и размер экрана
+        :return: Кортеж (камера X, камера Y, игрок X, игрок Y, масштаб, размер экрана), координаты
+                 в пикселях экрана (мировые, умноженные на масштаб)
+        """
+        zoom = self.camera_system.get_zoom()
+        follow_x, follow_y = self.camera_system.get_follow_offset()
+        player_x, player_y = -1, -1
+        if self.player_query:
+            player_pos = self.world.get_component(self.player_query[0], Position)
+            player_x, player_y = player_pos.x * zoom, player_pos.y * zoom
+        return (follow_x * zoom, follow_y * zoom, player_x, player_y, zoom, self.screen.get_size())
+    
+    def _needs_full_redraw(self, view):
+        """
+        Проверяет, нужно ли перерисовать кадр целиком: после запроса, при включенной отладке,
+        изменении масштаба или размера экрана, при любом сдвиге игрока (затемнение и свет
+        частичного кадра берутся из прошлого) и при сдвиге камеры больше порога относительно
+        последней полной перерисовки
+        :param view: Текущее состояние (см. _get_view)
+        :return: True, если нужна полная перерисовка
+        """
+        drawn = self.drawn_view
+        if self.full_redraw_requested or self.debug or drawn is None or drawn[2:] != view[2:]:
+            return True
+        threshold = self.full_redraw_threshold
+        return abs(view[0] - drawn[0]) > threshold or abs(view[1] - drawn[1]) > threshold
+    
+    def _full_redraw(self, view):
+        """
+        Запоминает состояние полной перерисовки
+        :param view: Текущее состояние (см. _get_view) или None вне режима грязных прямоугольников
+        :return: None (кадр перерисовывается целиком)
+        """
+        self.drawn_view = view
+        self.full_redraw_requested = view is None
+        return None
+    
+    def render_world(self):
+        """Проход отрисовки мира: статический слой уровня, динамические спрайты и отладочные пути"""
+        # Тайлы уровня рисуются блитами видимых чанков
+        self._render_static_layer()
+        
+        # Команды отрисовки остальных спрайтов (спрайты уже идут по возрастанию слоя) берутся
+        # из prepare_frame, а без подготовки кадра строятся здесь
+        commands = self.sprite_commands
+        if commands is None:
+            commands = self._build_sprite_commands()
+        self.sprite_commands = None
+        
+        # Выводим все спрайты одним вызовом Surface.blits
+        self.render_queue.extend(commands, source="render")
+        self.render_queue.flush()
         
-        # Отрисовываем каждую сущность
-        for entity_id in sprite_entities:
-            sprite = self.world.get_component(entity_id, Sprite)
-            position = self.world.get_component(entity_id, Position)
-            
+        # Отрисовываем пути (для отладки)
+        if self.debug:
+            self._render_paths()
+    
+    def _build_sprite_commands(self):
+        """
+        Строит команды отрисовки динамических спрайтов, попадающих в видимую область
+        :return: Список команд (поверхность, позиция, область, флаги) в порядке отрисовки
+        """
+        zoom = self.camera_system.get_zoom()
+        self.surface_cache.set_zoom(zoom)
+        
+        # Отбираем сущности, попадающие в видимую область, до любых преобразований координат.
+        # Корзины обходятся по возрастанию слоя
+        visible_sprites, moved = self._collect_visible_sprites()
+        if moved:
+            # У спрайтов изменился слой - переносим их в новые корзины и отбираем заново
+            for entity_id in moved:
+                self._add_to_layer(entity_id)
+            visible_sprites, _ = self._collect_visible_sprites()
+        
+        commands = []
+        for sprite, position in visible_sprites:
             # Преобразуем мировые координаты в экранные с учетом камеры
             screen_x, screen_y = self.camera_system.world_to_screen(position.x, position.y)
             
             # Создаем прямоугольник для отрисовки
             rect = pygame.Rect(
-                screen_x - sprite.width / 2 * self.camera_system.get_zoom(),
-                screen_y - sprite.height / 2 * self.camera_system.get_zoom(),
-                sprite.width * self.camera_system.get_zoom(),
-                sprite.height * self.camera_system.get_zoom()
+                screen_x - sprite.width / 2 * zoom,
+                screen_y - sprite.height / 2 * zoom,
+                sprite.width * zoom,
+                sprite.height * zoom
             )
             
-            # Проверяем, находится ли объект в пределах экрана
-            screen_rect = pygame.Rect(0, 0, self.screen.get_width(), self.screen.get_height())
-            if not screen_rect.colliderect(rect):
-                continue  # Пропускаем объекты вне экрана
-            
-            # Если у спрайта есть изображение, отрисовываем его
-            if sprite.image:
-                # Если у спрайта есть угол поворота, поворачиваем изображение
-                if sprite.angle != 0:
-                    # Масштабируем изображение до нужного размера с учетом масштаба камеры
-                    scaled_image = pygame.transform.scale(sprite.image, (
-                        int(sprite.width * self.camera_system.get_zoom()),
-                        int(sprite.height * self.camera_system.get_zoom())
-                    ))
-                    # Поворачиваем изображение
-                    rotated_image = pygame.transform.rotate(scaled_image, -sprite.angle)  # Отрицательный угол для правильного поворота
-                    # Получаем прямоугольник повернутого изображения
-                    rotated_rect = rotated_image.get_rect(center=rect.center)
-                    # Отрисовываем повернутое изображение
-                    self.screen.blit(rotated_image, rotated_rect)
-                else:
-                    # Отрисовываем изображение без поворота
-                    scaled_image = pygame.transform.scale(sprite.image, (
-                        int(sprite.width * self.camera_system.get_zoom()),
-                        int(sprite.height * self.camera_system.get_zoom())
-                    ))
-                    self.screen.blit(scaled_image, rect)
-            else:
-                # Если у спрайта нет изображения, отрисовываем прямоугольник с цветом
-                pygame.draw.rect(self.screen, sprite.color, rect)
-        
-        # Отрисовываем частицы эффектов попадания
-        self._render_hit_particles()
+            image, dest = self._get_sprite_blit(sprite, rect, zoom)
+            commands.append((image, dest, None, 0))
+        return commands
+    
+    def _collect_visible_sprites(self):
+        """
+        Отбирает динамические спрайты, попадающие в видимую область
+        :return: Кортеж (список пар (Sprite, Position) в порядке отрисовки,
+                 список ID сущностей, у спрайтов которых изменился слой)
+        """
+        view_left, view_top, view_right, view_bottom = self.camera_system.get_visible_rect()
+        visible_sprites = []
+        moved = []
+        
+        for layer in self.sorted_layers:
+            for entity_id, (sprite, position) in self.sprite_layers[layer].items():
+                if sprite.layer != layer:
+                    moved.append(entity_id)
+                    continue
+                
+                half_width = sprite.width / 2
+                half_height = sprite.height / 2
+                if (position.x + half_width < view_left or position.x - half_width > view_right or
+                        position.y + half_height < view_top or position.y - half_height > view_bottom):
+                    continue  # Пропускаем объекты вне экрана
+                visible_sprites.append((sprite, position))
+        
+        return visible_sprites, moved
+    
+    def _add_to_layer(self, entity_id):
+        """
+        Кладет динамический спрайт в корзину его слоя (при повторном вызове - перекладывает)
+        :param entity_id: ID сущности
+        """
+        self._remove_from_layer(entity_id)
+        
+        sprite = self.world.get_component(entity_id, Sprite)
+        position = self.world.get_component(entity_id, Position)
+        layer = sprite.layer
+        
+        bucket = self.sprite_layers.get(layer)
+        if bucket is None:
+            bucket = self.sprite_layers[layer] = {}
+            bisect.insort(self.sorted_layers, layer)
+        bucket[entity_id] = (sprite, position)
+        self.sprite_entity_layers[entity_id] = layer
+    
+    def _remove_from_layer(self, entity_id):
+        """
+        Убирает динамический спрайт из корзины слоя
+        :param entity_id: ID сущности
+        """
+        layer = self.sprite_entity_layers.pop(entity_id, None)
+        if layer is None:
+            return
         
-        # Отрисовываем пути (для отладки)
-        if self.debug:
-            self._render_paths()
+        bucket = self.sprite_layers[layer]
+        del bucket[entity_id]
+        if not bucket:
+            # Пустые корзины удаляем, чтобы не обходить их каждый кадр
+            del self.sprite_layers[layer]
+            self.sorted_layers.remove(layer)
+    
+    def _get_sprite_blit(self, sprite, rect, scale):
+        """
+        Возвращает изображение спрайта и позицию для вывода в указанный прямоугольник
+        :param sprite: Компонент Sprite
+        :param rect: Прямоугольник спрайта на поверхности
+        :param scale: Масштаб отрисовки
+        :return: Кортеж (поверхность, позиция)
+        """
+        # Если у спрайта нет изображения, выводим залитый цветом прямоугольник
+        if not sprite.image:
+            return self.surface_cache.get_solid(sprite.color, rect.width, rect.height), rect.topleft
+        
+        # Масштабированное, повернутое и отраженное изображение берется из кэша
+        image = self.surface_cache.get(sprite.image, int(sprite.width * scale), int(sprite.height * scale),
+                                       sprite.angle, sprite.flip_x, sprite.flip_y, sprite.color_overlay)
+        
+        # Повернутое изображение больше исходного, поэтому центрируем его
+        if sprite.angle != 0:
+            return image, image.get_rect(center=rect.center)
+        return image, rect.topleft
+    
+    def _draw_sprite(self, surface, sprite, rect, scale):
+        """
+        Отрисовывает спрайт в указанный прямоугольник
+        :param surface: Поверхность для отрисовки
+        :param sprite: Компонент Sprite
+        :param rect: Прямоугольник спрайта на поверхности
+        :param scale: Масштаб отрисовки
+        """
+        image, dest = self._get_sprite_blit(sprite, rect, scale)
+        surface.blit(image, dest)
+    
+    def _split_into_chunks(self, tile_grid):
+        """
+        Распределяет тайлы уровня по чанкам. Спрайт, выходящий за границы чанка (например, портал),
+        попадает во все чанки, которые он перекрывает
+        :param tile_grid: Сетка тайлов уровня (ключ актуальности разбиения)
+        """
+        tile_entities = sorted(self.tile_sprite_query, key=lambda entity_id: self.world.get_component(entity_id, Sprite).layer)
         
-        # Применяем эффект затемнения с градиентным кругом
-        self._render_darkness_effect()
+        self.chunk_size = self.CHUNK_TILES * (tile_grid.tile_size if tile_grid else 32)
+        self.chunk_tiles = {}
+        self.chunk_surfaces = {}
+        self.chunks_key = (tile_grid, len(tile_entities))
         
-        # Отрисовываем пользовательский интерфейс
-        self._render_ui()
+        chunk_size = self.chunk_size
+        for entity_id in tile_entities:
+            sprite = self.world.get_component(entity_id, Sprite)
+            position = self.world.get_component(entity_id, Position)
+            min_cx = int((position.x - sprite.width / 2) // chunk_size)
+            min_cy = int((position.y - sprite.height / 2) // chunk_size)
+            max_cx = int(math.ceil((position.x + sprite.width / 2) / chunk_size)) - 1
+            max_cy = int(math.ceil((position.y + sprite.height / 2) / chunk_size)) - 1
+            for cy in range(min_cy, max_cy + 1):
+                for cx in range(min_cx, max_cx + 1):
+                    self.chunk_tiles.setdefault((cx, cy), []).append(entity_id)
     
-    def _render_darkness_effect(self):
-        """Отрисовывает эффект затемнения с градиентным кругом вокруг игрока"""
+    def _bake_chunk(self, chunk):
+        """
+        Запекает спрайты тайлов чанка в одну поверхность в мировом масштабе (1 пиксель = 1 единица мира).
+        Тайлы неподвижны, поэтому чанк строится один раз на уровень
+        :param chunk: Координаты чанка (cx, cy)
+        :return: Поверхность чанка
+        """
+        chunk_size = self.chunk_size
+        origin_x = chunk[0] * chunk_size
+        origin_y = chunk[1] * chunk_size
+        surface = pygame.Surface((chunk_size, chunk_size))
+        surface.fill((0, 0, 0))
+        
+        for entity_id in self.chunk_tiles[chunk]:
+            sprite = self.world.get_component(entity_id, Sprite)
+            position = self.world.get_component(entity_id, Position)
+            rect = pygame.Rect(position.x - sprite.width / 2 - origin_x, position.y - sprite.height / 2 - origin_y,
+                               sprite.width, sprite.height)
+            self._draw_sprite(surface, sprite, rect, 1)
+        
+        self.chunk_surfaces[chunk] = surface
+        return surface
+    
+    def _render_static_layer(self):
+        """
+        Отрисовывает тайлы уровня: для каждого видимого чанка видимая часть его поверхности
+        масштабируется под камеру и выводится одним блитом. Чанки вне экрана не затрагиваются
+        """
+        # Разбиение перестраивается при смене уровня (новая сетка тайлов) или числа тайлов
+        tile_grid = self.world.get_resource(TileGrid)
+        key = self.chunks_key
+        if key is None or key[0] is not tile_grid or key[1] != len(self.tile_sprite_query):
+            self._split_into_chunks(tile_grid)
+        
+        if not self.chunk_tiles:
+            return
+        
+        # В частичном кадре чанки выводятся отдельно в каждую область кадра
+        clip = self.screen.get_clip()
+        frame_rects = self.render_queue.frame_rects
+        for rect in (frame_rects if frame_rects is not None else (clip,)):
+            rect = rect.clip(clip)
+            if rect.width and rect.height:
+                self._render_static_rect(rect)
+    
+    def _render_static_rect(self, clip):
+        """
+        Выводит видимые чанки уровня в прямоугольную область экрана
+        :param clip: Область экрана (pygame.Rect)
+        """
+        zoom = self.camera_system.get_zoom()
+        offset_x, offset_y = self.camera_system.get_camera_offset()
+        chunk_size = self.chunk_size
+        
+        # Видимая область в целых мировых координатах и диапазон чанков, который она перекрывает
+        view_left = int(math.floor(offset_x + clip.left / zoom))
+        view_top = int(math.floor(offset_y + clip.top / zoom))
+        view_right = int(math.ceil(offset_x + clip.right / zoom))
+        view_bottom = int(math.ceil(offset_y + clip.bottom / zoom))
+        
+        for cy in range(view_top // chunk_size, (view_bottom - 1) // chunk_size + 1):
+            for cx in range(view_left // chunk_size, (view_right - 1) // chunk_size + 1):
+                chunk = (cx, cy)
+                if chunk not in self.chunk_tiles:
+                    continue
+                
+                surface = self.chunk_surfaces.get(chunk)
+                if surface is None:
+                    surface = self._bake_chunk(chunk)
+                
+                # Видимая часть чанка в мировых координатах
+                chunk_x = cx * chunk_size
+                chunk_y = cy * chunk_size
+                left = max(view_left, chunk_x)
+                top = max(view_top, chunk_y)
+                right = min(view_right, chunk_x + chunk_size)
+                bottom = min(view_bottom, chunk_y + chunk_size)
+                
+                # Границы соседних чанков округляются одинаково, поэтому между ними нет щелей
+                dest_x = round((left - offset_x) * zoom)
+                dest_y = round((top - offset_y) * zoom)
+                dest_width = round((right - offset_x) * zoom) - dest_x
+                dest_height = round((bottom - offset_y) * zoom) - dest_y
+                if dest_width <= 0 or dest_height <= 0:
+                    continue
+                
+                visible = surface.subsurface((left - chunk_x, top - chunk_y, right - left, bottom - top))
+                self.screen.blit(pygame.transform.scale(visible, (dest_width, dest_height)), (dest_x, dest_y))
+    
+    def render_darkness(self):
+        """Проход отрисовки затемнения с градиентным кругом вокруг игрока"""
         # Получаем игрока
-        player_entities = self.world.get_entities_with_components(Player, Position)
+        player_entities = self.player_query
         if not player_entities:
             return
             
-        player_id = player_entities[0]
-        player_pos = self.world.get_component(player_id, Position)
-        
-        # Преобразуем позицию игрока в экранные координаты
-        screen_x, screen_y = self.camera_system.world_to_screen(player_pos.x, player_pos.y)
-        
-        # Создаем копию поверхности затемнения
-        darkness_copy = self.darkness_surface.copy()
+        # При перерисовке по областям камера и игрок не сдвигались - выводим затемнение прошлого кадра
+        if self.render_queue.partial_frame and self.darkness_composite is not None:
+            self._blit_darkness()
+            return
         
         # Радиус света зависит от масштаба камеры
         light_radius = int(self.light_radius * self.camera_system.get_zoom())
+        size = self.screen.get_size()
+        
+        if self.vignette_only:
+            # Виньетка строится один раз для размера экрана и радиуса и не следит за игроком
+            key = ('vignette', size, light_radius)
+            if key != self.darkness_key:
+                self._build_vignette(size, light_radius)
+                self.darkness_key = key
+        else:
+            player_id = player_entities[0]
+            player_pos = self.world.get_component(player_id, Position)
+            
+            # Преобразуем позицию игрока в экранные координаты
+            screen_x, screen_y = self.camera_system.world_to_screen(player_pos.x, player_pos.y)
+            mask_pos = (int(screen_x - light_radius), int(screen_y - light_radius))
+            
+            # Затемнение перестраивается, только если сдвинулся круг света, изменился его радиус или размер экрана
+            key = ('light', size, light_radius, mask_pos)
+            if key != self.darkness_key:
+                self._update_darkness_composite(size, light_radius, mask_pos)
+                self.darkness_key = key
         
-        # Используем кэшированную маску или создаем новую
-        light_mask_key = light_radius
-        if light_mask_key not in self.light_masks:
-            self.light_masks[light_mask_key] = self._create_light_mask(light_radius)
+        # Отображаем затемнение на экране
+        self._blit_darkness()
+    
+    def _blit_darkness(self):
+        """Выводит построенное затемнение на экран"""
+        if self.vignette_only:
+            self.render_queue.blit_screen(self.darkness_composite, pygame.BLEND_RGB_MULT)
+        else:
+            self.render_queue.blit_screen(self.darkness_composite)
+    
+    def _get_light_mask(self, light_radius):
+        """
+        Возвращает градиентную маску света, создавая ее при первом обращении
+        :param light_radius: Радиус света на экране
+        :return: Поверхность маски
+        """
+        light_mask = self.light_masks.get(light_radius)
+        if light_mask is None:
+            light_mask = self.light_masks[light_radius] = self._create_light_mask(light_radius)
+        return light_mask
+    
+    def _update_darkness_composite(self, size, light_radius, mask_pos):
+        """
+        Обновляет затемнение с вырезанным кругом света. Поверхность создается заново только при
+        смене размера экрана или режима; при сдвиге круга восстанавливается лишь его прошлая область
+        :param size: Размер экрана (ширина, высота)
+        :param light_radius: Радиус света на экране
+        :param mask_pos: Левый верхний угол маски света на экране
+        """
+        light_mask = self._get_light_mask(light_radius)
+        composite = self.darkness_composite
+        previous = self.darkness_key
         
-        light_mask = self.light_masks[light_mask_key]
+        if composite is None or previous is None or previous[0] != 'light' or previous[1] != size:
+            composite = self.darkness_composite = pygame.Surface(size, pygame.SRCALPHA)
+            composite.fill(self.darkness_color)
+        else:
+            # Заливка без смешивания полностью восстанавливает затемнение в прошлой области круга
+            previous_radius, previous_pos = previous[2], previous[3]
+            composite.fill(self.darkness_color, (previous_pos[0], previous_pos[1], previous_radius * 2, previous_radius * 2))
         
         # Вырезаем круг из поверхности затемнения
-        darkness_copy.blit(light_mask, (screen_x - light_radius, screen_y - light_radius), special_flags=pygame.BLEND_RGBA_SUB)
-        
-        # Отображаем затемнение на экране
-        self.screen.blit(darkness_copy, (0, 0))
+        composite.blit(light_mask, mask_pos, special_flags=pygame.BLEND_RGBA_SUB)
+    
+    def _build_vignette(self, size, light_radius):
+        """
+        Строит виньетку - затемнение с кругом света в центре экрана. Виньетка хранится как
+        непрозрачная поверхность-множитель: умножение цвета дешевле смешивания по альфа-каналу
+        :param size: Размер экрана (ширина, высота)
+        :param light_radius: Радиус света на экране
+        """
+        darkness = pygame.Surface(size, pygame.SRCALPHA)
+        darkness.fill(self.darkness_color)
+        darkness.blit(self._get_light_mask(light_radius),
+                      (size[0] // 2 - light_radius, size[1] // 2 - light_radius),
+                      special_flags=pygame.BLEND_RGBA_SUB)
+        
+        # Затемнение поверх белого дает множитель 255 - альфа для каждого пикселя
+        vignette = pygame.Surface(size)
+        vignette.fill((255, 255, 255))
+        vignette.blit(darkness, (0, 0))
+        self.darkness_composite = vignette
     
     def _render_paths(self):
         """Отрисовывает пути для отладки"""
         # Получаем все сущности с путями
-        path_entities = self.world.get_entities_with_components(PathDebug, Position)
+        path_entities = self.path_query
         
         for entity_id in path_entities:
             path_debug = self.world.get_component(entity_id, PathDebug)
@@ -238,10 +674,10 @@ class RenderSystem(System):
         pygame.draw.rect(self.screen, color, fill_rect)  # Заполнение
         pygame.draw.rect(self.screen, (200, 200, 200), bg_rect, 1)  # Граница
     
-    def _render_ui(self):
-        """Отрисовка пользовательского интерфейса"""
+    def render_ui(self):
+        """Проход отрисовки пользовательского интерфейса"""
         # Получаем игрока
-        player_entities = self.world.get_entities_with_components(Player, Position)
+        player_entities = self.player_query
         if not player_entities:
             return
             
@@ -252,12 +688,10 @@ class RenderSystem(System):
             return
             
         health = self.world.get_component(player_id, Health)
-        weapon = self.world.get_component(player_id, "Weapon")
+        (health_text, health_pos), (ammo_text, ammo_pos) = self._get_ui_texts()
         
         # Отрисовка здоровья
-        health_text = f"Здоровье: {health.current}/{health.maximum}"
-        health_surface = self.font.render(health_text, True, (255, 255, 255))
-        self.screen.blit(health_surface, (10, 10))
+        self.render_queue.mark_dirty(self.text_renderer.draw(self.screen, health_text, health_pos, (255, 255, 255)))
         
         # Отрисовка полоски здоровья
         health_percent = health.current / health.maximum
@@ -268,6 +702,7 @@ class RenderSystem(System):
         
         # Фон полоски здоровья
         pygame.draw.rect(self.screen, (100, 100, 100), (health_bar_x, health_bar_y, health_bar_width, health_bar_height))
+        self.render_queue.mark_dirty((health_bar_x, health_bar_y, health_bar_width, health_bar_height))
         
         # Полоска здоровья
         health_width = int(health_bar_width * health_percent)
@@ -280,9 +715,25 @@ class RenderSystem(System):
         pygame.draw.rect(self.screen, health_color, (health_bar_x, health_bar_y, health_width, health_bar_height))
         
         # Отрисовка боеприпасов
-        ammo_text = f"Патроны: {weapon.current_ammo}/{weapon.max_ammo}"
-        ammo_surface = self.font.render(ammo_text, True, (255, 255, 255))
-        self.screen.blit(ammo_surface, (10, 70))
+        self.render_queue.mark_dirty(self.text_renderer.draw(self.screen, ammo_text, ammo_pos, (255, 255, 255)))
+    
+    def _get_ui_texts(self):
+        """
+        Возвращает строки интерфейса с числами здоровья и боеприпасов игрока
+        :return: Список пар (текст, позиция); пустой, если игрока нет
+        """
+        player_entities = self.player_query
+        if not player_entities:
+            return []
+        
+        player_id = player_entities[0]
+        if not self.world.has_component(player_id, Health) or not self.world.has_component(player_id, "Weapon"):
+            return []
+        
+        health = self.world.get_component(player_id, Health)
+        weapon = self.world.get_component(player_id, "Weapon")
+        return [(f"Здоровье: {health.current}/{health.maximum}", (10, 10)),
+                (f"Патроны: {weapon.current_ammo}/{weapon.max_ammo}", (10, 70))]
     
     def _create_ui_textures(self):
         """
@@ -309,110 +760,11 @@ class RenderSystem(System):
         
         return textures
     
-    def _render_hit_particles(self):
-        """Отрисовывает частицы эффектов попадания"""
-        # Получаем систему столкновений
-        from ecs.systems.collision_system import CollisionSystem
-        collision_system = next((system for system in self.world.systems if isinstance(system, CollisionSystem)), None)
-        
-        if not collision_system or not hasattr(collision_system, 'hit_effects'):
-            return
-        
-        # Отрисовываем частицы для каждого эффекта
-        for effect in collision_system.hit_effects:
-            for particle in effect['particles']:
-                try:
-                    # Преобразуем мировые координаты частицы в экранные
-                    screen_x, screen_y = self.camera_system.world_to_screen(particle['x'], particle['y'])
-                    
-                    # Вычисляем размер частицы с учетом масштаба камеры
-                    size = particle['size'] * self.camera_system.get_zoom()
-                    
-                    # Вычисляем прозрачность частицы в зависимости от оставшегося времени жизни
-                    fade = 1 - (particle['timer'] / particle['lifetime'])
-                    
-                    # Получаем цвет частицы и применяем затухание
-                    color = particle['color']
-                    r = max(0, min(255, int(color[0] * fade)))
-                    g = max(0, min(255, int(color[1] * fade)))
-                    b = max(0, min(255, int(color[2] * fade)))
-                    
-                    # Отрисовываем частицу как круг
-                    pygame.draw.circle(self.screen, (r, g, b), (int(screen_x), int(screen_y)), max(1, int(size)))
-                except Exception as e:
-                    # Если возникла ошибка при отрисовке частицы, пропускаем её
-                    print(f"Ошибка при отрисовке частицы: {e}") 
-
     def render(self, camera=None):
         """
-        Отрисовывает все объекты на экране
+        Отрисовывает все объекты на экране (мир, затемнение и интерфейс)
         :param camera: Камера для преобразования координат (не используется, так как у нас есть self.camera_system)
         """
-        # Очищаем экран
-        self.screen.fill((0, 0, 0))
-        
-        # Получаем все сущности со спрайтами и позициями
-        sprite_entities = self.world.get_entities_with_components(Sprite, Position)
-        
-        # Сортируем сущности по слою спрайта (чтобы отрисовывать в правильном порядке)
-        sprite_entities.sort(key=lambda entity_id: self.world.get_component(entity_id, Sprite).layer)
-        
-        # Отрисовываем каждую сущность
-        for entity_id in sprite_entities:
-            sprite = self.world.get_component(entity_id, Sprite)
-            position = self.world.get_component(entity_id, Position)
-            
-            # Преобразуем мировые координаты в экранные с учетом камеры
-            screen_x, screen_y = self.camera_system.world_to_screen(position.x, position.y)
-            
-            # Создаем прямоугольник для отрисовки
-            rect = pygame.Rect(
-                screen_x - sprite.width / 2 * self.camera_system.get_zoom(),
-                screen_y - sprite.height / 2 * self.camera_system.get_zoom(),
-                sprite.width * self.camera_system.get_zoom(),
-                sprite.height * self.camera_system.get_zoom()
-            )
-            
-            # Проверяем, находится ли объект в пределах экрана
-            screen_rect = pygame.Rect(0, 0, self.screen.get_width(), self.screen.get_height())
-            if not screen_rect.colliderect(rect):
-                continue  # Пропускаем объекты вне экрана
-            
-            # Если у спрайта есть изображение, отрисовываем его
-            if sprite.image:
-                # Если у спрайта есть угол поворота, поворачиваем изображение
-                if sprite.angle != 0:
-                    # Масштабируем изображение до нужного размера с учетом масштаба камеры
-                    scaled_image = pygame.transform.scale(sprite.image, (
-                        int(sprite.width * self.camera_system.get_zoom()),
-                        int(sprite.height * self.camera_system.get_zoom())
-                    ))
-                    # Поворачиваем изображение
-                    rotated_image = pygame.transform.rotate(scaled_image, -sprite.angle)  # Отрицательный угол для правильного поворота
-                    # Получаем прямоугольник повернутого изображения
-                    rotated_rect = rotated_image.get_rect(center=rect.center)
-                    # Отрисовываем повернутое изображение
-                    self.screen.blit(rotated_image, rotated_rect)
-                else:
-                    # Отрисовываем изображение без поворота
-                    scaled_image = pygame.transform.scale(sprite.image, (
-                        int(sprite.width * self.camera_system.get_zoom()),
-                        int(sprite.height * self.camera_system.get_zoom())
-                    ))
-                    self.screen.blit(scaled_image, rect)
-            else:
-                # Если у спрайта нет изображения, отрисовываем прямоугольник с цветом
-                pygame.draw.rect(self.screen, sprite.color, rect)
-        
-        # Отрисовываем частицы эффектов попадания
-        self._render_hit_particles()
-        
-        # Отрисовываем пути (для отладки)
-        if self.debug:
-            self._render_paths()
-        
-        # Применяем эффект затемнения с градиентным кругом
-        self._render_darkness_effect()
-        
-        # Отрисовываем пользовательский интерфейс
-        self._render_ui() 
\ No newline at end of file
+        self.render_world()
+        self.render_darkness()
+        self.render_ui()
@@ -2,8 +2,12 @@ import pygame
 import math
 import random
 from ecs.systems.system import System
-from ecs.components.components import Position, Velocity, Weapon, Bullet, Sprite, Collider, Tile, Health, Player, Enemy
+from ecs.components.components import Position, Velocity, Weapon, Bullet, Sprite, Collider, Health, Player, Enemy
+from ecs.utils.geometry import segment_aabb_entry
+from ecs.systems.effects_system import EffectsSystem
+from ecs.utils.spatial_hash import SpatialHash
 from ecs.utils.sprite_manager import sprite_manager
+from ecs.utils.tile_grid import TileGrid
 
 def create_bullet_texture():
     """
@@ -36,9 +40,16 @@ class WeaponSystem(System):
         super().__init__(world)
         self.screen = screen
         self.bullet_color = (255, 255, 0)  # Желтый цвет для пуль
-        self.bullet_hit_effects = []  # Эффекты попадания пуль
         self.effect_lifetime = 0.3  # Время жизни эффекта в секундах
+        self.spatial_hash_margin = 16  # Запас области поиска целей в пространственном хэше
         self.bullet_texture = create_bullet_texture()  # Загружаем текстуру пули
+        
+        # Живые представления запросов
+        self.weapon_query = world.query(Weapon)
+        self.bullet_query = world.query(Bullet, Position, Velocity)
+        self.unsprited_bullet_query = world.query(Bullet, Position, exclude=(Sprite,))
+        self.enemy_query = world.query(Enemy, Position)
+        self.player_query = world.query(Player, Position, Collider)
         print(f"Инициализация WeaponSystem: текстура пули {'загружена' if self.bullet_texture else 'не загружена'}")
     
     def update(self, dt):
@@ -52,9 +63,6 @@ class WeaponSystem(System):
         # Обновляем пули
         self._update_bullets(dt)
         
-        # Обновляем эффекты попадания пуль
-        self._update_bullet_hit_effects(dt)
-        
         # Проверяем пули без спрайтов и добавляем их
         self._ensure_bullet_sprites()
     
@@ -63,7 +71,7 @@ class WeaponSystem(System):
         Проверяет все пули и добавляет спрайты, если их нет
         """
         # Получаем все сущности с компонентами пули и позиции
-        bullet_entities = self.world.get_entities_with_components(Bullet, Position)
+        bullet_entities = self.unsprited_bullet_query
         
         for entity_id in bullet_entities:
             # Проверяем, есть ли у пули спрайт
@@ -89,7 +97,7 @@ class WeaponSystem(System):
         :param dt: Время, прошедшее с последнего обновления
         """
         # Получаем все сущности с компонентом оружия
-        weapon_entities = self.world.get_entities_with_components(Weapon)
+        weapon_entities = self.weapon_query
         
         for entity_id in weapon_entities:
             weapon = self.world.get_component(entity_id, Weapon)
@@ -111,11 +119,16 @@ class WeaponSystem(System):
     
     def _update_bullets(self, dt):
         """
-        Обновляет состояние пуль
+        Обновляет состояние пуль. Столкновения обрабатываются в два этапа: сначала
+        собираются контакты всех пуль за кадр, затем они разом применяются
         :param dt: Время, прошедшее с последнего обновления
         """
+        tile_grid = self.world.get_resource(TileGrid)
+        level_bounds = tile_grid.get_bounds() if tile_grid else None
+        contacts = []
+        
         # Получаем все сущности с компонентами пули и позиции
-        bullet_entities = self.world.get_entities_with_components(Bullet, Position, Velocity)
+        bullet_entities = self.bullet_query
         
         for entity_id in bullet_entities:
             bullet = self.world.get_component(entity_id, Bullet)
@@ -133,135 +146,157 @@ class WeaponSystem(System):
             position.x += velocity.dx * dt
             position.y += velocity.dy * dt
             
-            # Проверяем столкновения пули
-            self._check_bullet_collisions(entity_id, bullet, position)
+            # Если пуля вышла за пределы уровня, удаляем её
+            if level_bounds:
+                min_x, min_y, max_x, max_y = level_bounds
+                if position.x < min_x or position.x > max_x or position.y < min_y or position.y > max_y:
+                    self.world.delete_entity(entity_id)
+                    continue
+            
+            # Ищем столкновение на всем пути пули с момента прошлой проверки
+            # (включая перемещение в MovementSystem)
+            start_x = bullet.prev_x if bullet.prev_x is not None else position.x - velocity.dx * dt
+            start_y = bullet.prev_y if bullet.prev_y is not None else position.y - velocity.dy * dt
+            bullet.prev_x = position.x
+            bullet.prev_y = position.y
+            
+            contact = self._find_bullet_contact(bullet, tile_grid, start_x, start_y, position.x, position.y)
+            if contact:
+                contacts.append((entity_id, bullet) + contact)
+        
+        if contacts:
+            self._resolve_bullet_hits(contacts)
     
-    def _check_bullet_collisions(self, bullet_id, bullet, bullet_pos):
+    def _find_bullet_contact(self, bullet, tile_grid, start_x, start_y, end_x, end_y):
         """
-        Проверяет столкновения пули с другими сущностями
-        :param bullet_id: ID пули
+        Находит первое столкновение пули на отрезке ее движения. Стены ищутся шагом DDA
+        по сетке тайлов, цели - через пространственный хэш; срабатывает ближайшее
+        к началу отрезка попадание
         :param bullet: Компонент пули
-        :param bullet_pos: Компонент позиции пули
+        :param tile_grid: Сетка тайлов уровня (или None)
+        :param start_x: Координата X начала отрезка
+        :param start_y: Координата Y начала отрезка
+        :param end_x: Координата X конца отрезка
+        :param end_y: Координата Y конца отрезка
+        :return: Кортеж (ID цели или None для стены, x, y) или None, если столкновения нет
         """
-        # Проверяем столкновения с стенами
-        wall_entities = self.world.get_entities_with_components(Tile, Position, Collider)
-        for wall_id in wall_entities:
-            tile = self.world.get_component(wall_id, Tile)
-            if not tile.walkable:  # Проверяем только непроходимые тайлы (стены)
-                wall_pos = self.world.get_component(wall_id, Position)
-                wall_collider = self.world.get_component(wall_id, Collider)
-                
-                # Проверяем столкновение пули со стеной
-                if self._check_collision(bullet_pos.x, bullet_pos.y, bullet.radius,
-                                        wall_pos.x, wall_pos.y, wall_collider.width, wall_collider.height):
-                    # Создаем эффект попадания в стену
-                    self._create_bullet_hit_effect(bullet_pos.x, bullet_pos.y, (150, 150, 150))
-                    
-                    # Удаляем пулю
-                    self.world.delete_entity(bullet_id)
-                    return
-        
-        # Проверяем столкновения с врагами
-        enemy_entities = self.world.get_entities_with_components(Enemy, Position)
-        for enemy_id in enemy_entities:
-            # Пропускаем, если пуля принадлежит этому врагу
-            if bullet.owner == enemy_id:
+        radius = bullet.radius
+        
+        # Ближайшая стена на пути пули
+        wall_t = None
+        if tile_grid:
+            wall_hit = tile_grid.raycast(start_x, start_y, end_x, end_y)
+            if wall_hit:
+                wall_t = wall_hit[0]
+            elif tile_grid.find_solid_in_circle(end_x, end_y, radius):
+                wall_t = 1.0
+        
+        # Ближайшая цель на пути пули (враги и игрок)
+        target_t = None
+        target_id = None
+        for candidate_id in self._get_bullet_candidates(start_x, start_y, end_x, end_y, radius):
+            # Пропускаем, если пуля принадлежит этой сущности
+            if candidate_id == bullet.owner:
                 continue
-                
-            # Проверяем наличие коллайдера у врага
-            if not self.world.has_component(enemy_id, Collider):
+            
+            if candidate_id not in self.enemy_query and candidate_id not in self.player_query:
                 continue
-                
-            enemy_pos = self.world.get_component(enemy_id, Position)
-            enemy_collider = self.world.get_component(enemy_id, Collider)
             
-            # Проверяем столкновение пули с врагом
-            if self._check_collision(bullet_pos.x, bullet_pos.y, bullet.radius,
-                                    enemy_pos.x, enemy_pos.y, enemy_collider.width, enemy_collider.height):
-                # Наносим урон врагу
-                if self.world.has_component(enemy_id, Health):
-                    health = self.world.get_component(enemy_id, Health)
-                    
-                    # Получаем систему здоровья
-                    health_system = next((system for system in self.world.systems if hasattr(system, 'damage_entity')), None)
-                    if health_system:
-                        # Наносим урон
-                        damage_dealt = health_system.damage_entity(enemy_id, bullet.damage, bullet.owner)
-                        
-                        # Создаем эффект попадания
-                        if damage_dealt > 0:
-                            self._create_bullet_hit_effect(bullet_pos.x, bullet_pos.y, (255, 0, 0))
-                            print(f"Нанесен урон врагу {enemy_id}: {damage_dealt} урона. Осталось здоровья: {health.current}")
-                        
-                        # Проверяем, убит ли враг
-                        if health.current <= 0:
-                            print(f"Враг {enemy_id} убит!")
-                            # Вызываем handle_entity_death для правильной обработки смерти врага
-                            health_system.handle_entity_death(enemy_id)
-                            
-                            # Удаляем пулю
-                            if self.world.entity_exists(bullet_id):
-                                self.world.delete_entity(bullet_id)
-                            return
-                
-                # Удаляем пулю
-                if self.world.entity_exists(bullet_id):
-                    self.world.delete_entity(bullet_id)
-                return
-        
-        # Проверяем столкновения с игроком
-        player_entities = self.world.get_entities_with_components(Player, Position, Collider)
-        for player_id in player_entities:
-            # Пропускаем, если пуля принадлежит игроку
-            if bullet.owner == player_id:
+            # Проверяем наличие коллайдера у цели
+            collider = self.world.get_component(candidate_id, Collider)
+            if not collider:
                 continue
-                
-            player_pos = self.world.get_component(player_id, Position)
-            player_collider = self.world.get_component(player_id, Collider)
             
-            # Проверяем столкновение пули с игроком
-            if self._check_collision(bullet_pos.x, bullet_pos.y, bullet.radius,
-                                    player_pos.x, player_pos.y, player_collider.width, player_collider.height):
-                # Наносим урон игроку
-                if self.world.has_component(player_id, Health):
-                    # Получаем систему здоровья
-                    health_system = next((system for system in self.world.systems if hasattr(system, 'damage_entity')), None)
-                    if health_system:
-                        # Наносим урон
-                        damage_dealt = health_system.damage_entity(player_id, bullet.damage, bullet.owner)
-                        
-                        # Создаем эффект попадания
-                        if damage_dealt > 0:
-                            self._create_bullet_hit_effect(bullet_pos.x, bullet_pos.y, (0, 0, 255))
-                
-                # Удаляем пулю
-                if self.world.entity_exists(bullet_id):
-                    self.world.delete_entity(bullet_id)
-                return
+            position = self.world.get_component(candidate_id, Position)
+            
+            # Отрезок против прямоугольника цели, расширенного на радиус пули
+            reach_x = collider.width / 2 + radius
+            reach_y = collider.height / 2 + radius
+            t = segment_aabb_entry(start_x, start_y, end_x, end_y,
+                                   position.x - reach_x, position.y - reach_y,
+                                   position.x + reach_x, position.y + reach_y)
+            if t is not None and (target_t is None or t < target_t):
+                target_t = t
+                target_id = candidate_id
+        
+        if wall_t is not None and (target_t is None or wall_t < target_t):
+            return None, start_x + (end_x - start_x) * wall_t, start_y + (end_y - start_y) * wall_t
+        
+        if target_id is not None:
+            return target_id, start_x + (end_x - start_x) * target_t, start_y + (end_y - start_y) * target_t
+        
+        return None
     
-    def _check_collision(self, x1, y1, radius, x2, y2, width, height):
+    def _resolve_bullet_hits(self, contacts):
         """
-        Проверяет столкновение круга (пули) с прямоугольником (коллайдером)
-        :param x1: X координата центра круга
-        :param y1: Y координата центра круга
-        :param radius: Радиус круга
-        :param x2: X координата центра прямоугольника
-        :param y2: Y координата центра прямоугольника
-        :param width: Ширина прямоугольника
-        :param height: Высота прямоугольника
-        :return: True, если есть столкновение, иначе False
+        Применяет все контакты пуль за кадр: наносит урон через систему здоровья,
+        удаляет пули и убитых врагов и создает эффекты попадания
+        :param contacts: Список кортежей (ID пули, компонент пули, ID цели или None, x, y)
         """
-        # Находим ближайшую точку прямоугольника к центру круга
-        closest_x = max(x2 - width/2, min(x1, x2 + width/2))
-        closest_y = max(y2 - height/2, min(y1, y2 + height/2))
-        
-        # Вычисляем расстояние от центра круга до ближайшей точки прямоугольника
-        distance_x = x1 - closest_x
-        distance_y = y1 - closest_y
-        distance_squared = distance_x * distance_x + distance_y * distance_y
-        
-        # Если расстояние меньше радиуса, есть столкновение
-        return distance_squared < (radius * radius)
+        # Получаем систему здоровья, систему частиц попаданий и систему эффектов
+        health_system = next((system for system in self.world.systems if hasattr(system, 'damage_entity')), None)
+        particle_system = next((system for system in self.world.systems if hasattr(system, 'create_hit_effect')), None)
+        effects_system = next((system for system in self.world.systems if isinstance(system, EffectsSystem)), None)
+        
+        for bullet_id, bullet, target_id, hit_x, hit_y in contacts:
+            # Пуля поглощается при любом контакте
+            if self.world.entity_exists(bullet_id):
+                self.world.delete_entity(bullet_id)
+            
+            if target_id is None:
+                # Попадание в стену
+                self._create_bullet_hit_effect(effects_system, hit_x, hit_y, (150, 150, 150))
+                if particle_system:
+                    particle_system.create_hit_effect(hit_x, hit_y, (150, 150, 0))
+                continue
+            
+            # Цель могла погибнуть от другой пули в этом же кадре
+            if not self.world.entity_exists(target_id) or not health_system:
+                continue
+            
+            health = self.world.get_component(target_id, Health)
+            if not health:
+                continue
+            
+            # Наносим урон
+            damage_dealt = health_system.damage_entity(target_id, bullet.damage, bullet.owner)
+            is_enemy = target_id in self.enemy_query
+            
+            # Создаем эффект попадания
+            if damage_dealt > 0:
+                if is_enemy:
+                    self._create_bullet_hit_effect(effects_system, hit_x, hit_y, (255, 0, 0))
+                    if particle_system:
+                        particle_system.create_hit_effect(hit_x, hit_y, (255, 0, 0))
+                    print(f"Нанесен урон врагу {target_id}: {damage_dealt} урона. Осталось здоровья: {health.current}")
+                else:
+                    self._create_bullet_hit_effect(effects_system, hit_x, hit_y, (0, 0, 255))
+            
+            # Проверяем, убит ли враг (смерть игрока обрабатывает HealthSystem.update)
+            if is_enemy and health.current <= 0:
+                print(f"Враг {target_id} убит!")
+                health_system.handle_enemy_death(target_id)
+    
+    def _get_bullet_candidates(self, start_x, start_y, end_x, end_y, radius):
+        """
+        Возвращает сущности, в которые может попасть пуля на отрезке движения
+        :param start_x: Координата X начала отрезка
+        :param start_y: Координата Y начала отрезка
+        :param end_x: Координата X конца отрезка
+        :param end_y: Координата Y конца отрезка
+        :param radius: Радиус пули
+        :return: Список ID сущностей-кандидатов
+        """
+        spatial_hash = self.world.get_resource(SpatialHash)
+        if spatial_hash is None:
+            # Без широкой фазы проверяем всех врагов и игрока
+            return list(self.enemy_query) + list(self.player_query)
+        
+        # Хэш построен CollisionSystem до выталкивания сущностей из стен,
+        # поэтому область поиска берется с запасом
+        margin = radius + self.spatial_hash_margin
+        return spatial_hash.query(min(start_x, end_x) - margin, min(start_y, end_y) - margin,
+                                  max(start_x, end_x) + margin, max(start_y, end_y) + margin)
     
     def fire_bullet(self, entity_id, target_x, target_y):
         """
@@ -390,154 +425,13 @@ class WeaponSystem(System):
         
         return True
     
-    def _create_bullet_hit_effect(self, x, y, color):
+    def _create_bullet_hit_effect(self, effects_system, x, y, color):
         """
-        Создает эффект попадания пули
+        Создает вспышку попадания пули
+        :param effects_system: Система эффектов (None - вспышка не создается)
         :param x: X координата эффекта
         :param y: Y координата эффекта
         :param color: Цвет эффекта
         """
-        # Добавляем эффект в список
-        print(f"Создаю эффект попадания в позиции ({x}, {y}) с цветом {color}")
-        num_particles = random.randint(25, 35)
-        print(f"Создаю {num_particles} частиц для эффекта")
-        
-        self.bullet_hit_effects.append({
-            'x': x,
-            'y': y,
-            'color': color,
-            'size': 10,
-            'max_size': 20,
-            'lifetime': self.effect_lifetime,
-            'timer': 0
-        })
-    
-    def _update_bullet_hit_effects(self, dt):
-        """
-        Обновляет эффекты попадания пуль
-        :param dt: Время, прошедшее с последнего обновления
-        """
-        # Обновляем все эффекты
-        for effect in self.bullet_hit_effects[:]:
-            # Увеличиваем таймер
-            effect['timer'] += dt
-            
-            # Если время жизни истекло, удаляем эффект
-            if effect['timer'] >= effect['lifetime']:
-                self.bullet_hit_effects.remove(effect)
-                print(f"Удален эффект попадания, осталось эффектов: {len(self.bullet_hit_effects)}")
-                continue
-            
-            # Обновляем размер эффекта
-            progress = effect['timer'] / effect['lifetime']
-            effect['size'] = effect['max_size'] * (1 - progress)
-    
-    def render(self, camera):
-        """
-        Отрисовывает пули и эффекты попадания
-        :param camera: Камера для преобразования координат
-        """
-        # Отрисовка пуль не требуется, так как они имеют компонент Sprite и отрисовываются RenderSystem
-        
-        # Отрисовываем эффекты попадания
-        for effect in self.bullet_hit_effects:
-            # Преобразуем координаты с учетом камеры
-            screen_x, screen_y = camera.world_to_screen(effect["x"], effect["y"])
-            
-            # Рисуем эффект попадания (круг)
-            pygame.draw.circle(self.screen, effect["color"], (int(screen_x), int(screen_y)), int(effect["size"]))
-            
-            # Для более заметного эффекта, рисуем внутренний круг
-            inner_size = max(2, int(effect["size"] // 2))
-            pygame.draw.circle(self.screen, (255, 255, 255), (int(screen_x), int(screen_y)), inner_size)
-
-    def _check_bullet_collision(self, bullet_id, bullet_entity):
-        """
-        Проверяет столкновение пули с сущностями
-        :param bullet_id: ID пули
-        :param bullet_entity: Компоненты пули
-        :return: True, если пуля столкнулась с чем-то, False в противном случае
-        """
-        bullet_pos = bullet_entity['position']
-        bullet_component = bullet_entity['bullet']
-        
-        # Если пуля принадлежит игроку, проверяем столкновение с врагами
-        if bullet_component.owner is not None and self.world.has_component(bullet_component.owner, Player):
-            # Проверяем столкновение с врагами
-            enemy_entities = self.world.get_entities_with_components(Position, Enemy)
-            
-            for enemy_id in enemy_entities:
-                # Проверяем, есть ли у врага коллайдер
-                if not self.world.has_component(enemy_id, Collider):
-                    continue
-                
-                enemy_pos = self.world.get_component(enemy_id, Position)
-                enemy_collider = self.world.get_component(enemy_id, Collider)
-                
-                # Проверяем столкновение пули с врагом
-                if self._check_circle_rect_collision(
-                    bullet_pos.x, bullet_pos.y, bullet_component.radius,
-                    enemy_pos.x, enemy_pos.y, enemy_collider.width, enemy_collider.height
-                ):
-                    # Наносим урон врагу
-                    if self.health_system:
-                        damage = self.health_system.damage_entity(enemy_id, bullet_component.damage, bullet_component.owner)
-                        if damage > 0:
-                            print(f"Нанесен урон врагу {enemy_id}: {damage} урона. Осталось здоровья: {self.world.get_component(enemy_id, Health).current}")
-                    
-                    # Создаем эффект попадания
-                    self._create_hit_effect(bullet_pos.x, bullet_pos.y, (150, 150, 0))
-                    
-                    return True
-        else:
-            # Если пуля принадлежит врагу или никому, проверяем столкновение с игроком
-            player_entities = self.world.get_entities_with_components(Position, Player)
-            
-            for player_id in player_entities:
-                # Проверяем, есть ли у игрока коллайдер
-                if not self.world.has_component(player_id, Collider):
-                    continue
-                
-                player_pos = self.world.get_component(player_id, Position)
-                player_collider = self.world.get_component(player_id, Collider)
-                
-                # Проверяем столкновение пули с игроком
-                if self._check_circle_rect_collision(
-                    bullet_pos.x, bullet_pos.y, bullet_component.radius,
-                    player_pos.x, player_pos.y, player_collider.width, player_collider.height
-                ):
-                    # Наносим урон игроку
-                    if self.health_system:
-                        damage = self.health_system.damage_entity(player_id, bullet_component.damage, bullet_component.owner)
-                        if damage > 0:
-                            print(f"ВАЖНО: Нанесен урон игроку: {damage} урона. Осталось здоровья: {self.world.get_component(player_id, Health).current}")
-                    
-                    # Создаем эффект попадания
-                    self._create_hit_effect(bullet_pos.x, bullet_pos.y, (255, 0, 0))
-                    
-                    return True
-        
-        # Проверяем столкновение со стенами
-        wall_entities = self.world.get_entities_with_components(Position, Tile, Collider)
-        
-        for wall_id in wall_entities:
-            wall_tile = self.world.get_component(wall_id, Tile)
-            
-            # Пропускаем проходимые тайлы
-            if wall_tile.walkable:
-                continue
-            
-            wall_pos = self.world.get_component(wall_id, Position)
-            wall_collider = self.world.get_component(wall_id, Collider)
-            
-            # Проверяем столкновение пули со стеной
-            if self._check_circle_rect_collision(
-                bullet_pos.x, bullet_pos.y, bullet_component.radius,
-                wall_pos.x, wall_pos.y, wall_collider.width, wall_collider.height
-            ):
-                # Создаем эффект попадания
-                self._create_hit_effect(bullet_pos.x, bullet_pos.y, (150, 150, 150))
-                
-                return True
-        
-        return False 
\ No newline at end of file
+        if effects_system:
+            effects_system.add_flash(x, y, color, size=20, lifetime=self.effect_lifetime)
@@ -0,0 +1,34 @@
+def segment_aabb_entry(x0, y0, x1, y1, left, top, right, bottom):
+    """
+    Находит точку входа отрезка в прямоугольник (тест "слэбов")
+    :param x0: Начальная координата X отрезка
+    :param y0: Начальная координата Y отрезка
+    :param x1: Конечная координата X отрезка
+    :param y1: Конечная координата Y отрезка
+    :param left: Левая граница прямоугольника
+    :param top: Верхняя граница прямоугольника
+    :param right: Правая граница прямоугольника
+    :param bottom: Нижняя граница прямоугольника
+    :return: Доля отрезка t (0..1) до точки входа или None, если пересечения нет
+    """
+    t_enter = 0.0
+    t_exit = 1.0
+
+    for start, delta, low, high in ((x0, x1 - x0, left, right), (y0, y1 - y0, top, bottom)):
+        if delta == 0:
+            # Отрезок параллелен оси: он должен лежать между границами
+            if start <= low or start >= high:
+                return None
+            continue
+
+        t1 = (low - start) / delta
+        t2 = (high - start) / delta
+        if t1 > t2:
+            t1, t2 = t2, t1
+
+        t_enter = max(t_enter, t1)
+        t_exit = min(t_exit, t2)
+        if t_enter > t_exit:
+            return None
+
+    return t_enter
@@ -0,0 +1,83 @@
+import pygame
+
+class PygameInput:
+    """Источник ввода игрока: текущее состояние клавиатуры и мыши pygame"""
+
+    def get_pressed(self):
+        """
+        Возвращает состояние клавиш
+        :return: Последовательность, индексируемая кодом клавиши pygame
+        """
+        return pygame.key.get_pressed()
+
+    def get_mouse_pos(self):
+        """
+        Возвращает позицию курсора
+        :return: Кортеж (x, y) в экранных координатах
+        """
+        return pygame.mouse.get_pos()
+
+    def get_mouse_pressed(self):
+        """
+        Возвращает состояние кнопок мыши
+        :return: Кортеж (левая, средняя, правая)
+        """
+        return pygame.mouse.get_pressed()
+
+class PressedKeys:
+    """Состояние клавиш из множества нажатых кодов, индексируется как результат pygame.key.get_pressed"""
+
+    def __init__(self, keys):
+        """
+        :param keys: Множество кодов нажатых клавиш
+        """
+        self.keys = keys
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+class ScriptedInput:
+    """
+    Источник ввода с состоянием, которое задает код, а не устройство. Используется
+    при запуске без окна: сценарий перед каждым тиком выставляет клавиши и мышь
+    """
+
+    def __init__(self):
+        """Инициализирует ввод: ничего не нажато, курсор в начале экрана"""
+        self.keys = set()  # Коды нажатых клавиш
+        self.mouse_pos = (0, 0)
+        self.mouse_buttons = (False, False, False)
+
+    def set_state(self, keys=(), mouse_pos=None, mouse_buttons=None):
+        """
+        Задает состояние ввода на следующий тик
+        :param keys: Коды нажатых клавиш (остальные считаются отпущенными)
+        :param mouse_pos: Позиция курсора (None - не менять)
+        :param mouse_buttons: Кортеж (левая, средняя, правая) (None - не менять)
+        """
+        self.keys = set(keys)
+        if mouse_pos is not None:
+            self.mouse_pos = mouse_pos
+        if mouse_buttons is not None:
+            self.mouse_buttons = mouse_buttons
+
+    def get_pressed(self):
+        """
+        Возвращает состояние клавиш
+        :return: Объект, индексируемый кодом клавиши pygame
+        """
+        return PressedKeys(self.keys)
+
+    def get_mouse_pos(self):
+        """
+        Возвращает позицию курсора
+        :return: Кортеж (x, y) в экранных координатах
+        """
+        return self.mouse_pos
+
+    def get_mouse_pressed(self):
+        """
+        Возвращает состояние кнопок мыши
+        :return: Кортеж (левая, средняя, правая)
+        """
+        return self.mouse_buttons
@@ -0,0 +1,229 @@
+import csv
+import time
+import numpy as np
+import pygame
+from ecs.world import QueryView
+from ecs.utils.text_renderer import get_text_renderer
+
+class FrameProfiler:
+    """
+    Покадровый профилировщик систем. Мир записывает время каждого update и прохода
+    отрисовки (perf_counter_ns), профилировщик суммирует замеры за кадр и хранит их
+    в кольцевых буферах последних history кадров. По буферам строятся перцентили
+    для оверлея и выгрузка покадровых замеров в CSV
+    """
+
+    def __init__(self, history=600):
+        """
+        Инициализирует профилировщик
+        :param history: Число последних кадров в кольцевых буферах
+        """
+        self.history = history
+        self.frame_index = 0  # Число завершенных кадров
+        self.current = {}  # Имя замера -> наносекунды в текущем кадре
+
+        # Кольцевые буферы: позиция кадра = frame_index % history
+        self.samples = {}  # Имя замера -> массив наносекунд по кадрам
+        self.frame_ns = np.zeros(history, dtype=np.int64)  # Полное время кадра (между end_frame)
+        self.work_ns = np.zeros(history, dtype=np.int64)  # Сумма замеров кадра
+        self.entities = np.zeros(history, dtype=np.int32)  # Число сущностей в конце кадра
+        self.last_end = None  # Время окончания предыдущего кадра
+
+        # Оверлей перестраивается не каждый кадр: вывод десятков строк дороже самих замеров
+        self.overlay_interval = 30  # Перестраивать оверлей раз в столько кадров
+        self.overlay_rows = 16  # Максимальное число строк систем в оверлее
+        self.overlay_surface = None
+        self.overlay_frame = -1  # Кадр, на котором оверлей был построен
+
+    def record(self, name, elapsed_ns):
+        """
+        Добавляет замер к текущему кадру (повторные замеры с тем же именем суммируются)
+        :param name: Имя замера, например "update:MovementSystem"
+        :param elapsed_ns: Длительность в наносекундах
+        """
+        current = self.current
+        current[name] = current.get(name, 0) + elapsed_ns
+
+    def end_frame(self, entity_count=0):
+        """
+        Завершает кадр: переносит замеры кадра в кольцевые буферы
+        :param entity_count: Число сущностей в мире
+        """
+        now = time.perf_counter_ns()
+        slot = self.frame_index % self.history
+        current = self.current
+
+        for name in current:
+            if name not in self.samples:
+                self.samples[name] = np.zeros(self.history, dtype=np.int64)
+        for name, buffer in self.samples.items():
+            buffer[slot] = current.get(name, 0)
+
+        self.work_ns[slot] = sum(current.values())
+        self.frame_ns[slot] = now - self.last_end if self.last_end is not None else self.work_ns[slot]
+        self.entities[slot] = entity_count
+        self.last_end = now
+        self.frame_index += 1
+        current.clear()
+
+    def reset(self):
+        """Очищает накопленную историю кадров"""
+        self.frame_index = 0
+        self.current.clear()
+        self.samples.clear()
+        self.last_end = None
+        self.overlay_frame = -1
+
+    def _ordered(self, buffer, frames=None):
+        """
+        Возвращает значения кольцевого буфера от старых кадров к новым
+        :param buffer: Кольцевой буфер
+        :param frames: Число последних кадров (None - вся история)
+        :return: Массив значений
+        """
+        count = min(self.frame_index, self.history)
+        if frames is not None:
+            count = min(count, frames)
+        end = self.frame_index % self.history
+        if count <= end:
+            return buffer[end - count:end]
+        return np.concatenate((buffer[self.history - (count - end):], buffer[:end]))
+
+    def get_average_frame_ms(self, frames=30):
+        """
+        Возвращает среднее полное время кадра
+        :param frames: Число последних кадров для усреднения
+        :return: Миллисекунды (0, если кадров еще нет)
+        """
+        values = self._ordered(self.frame_ns, frames)
+        return float(values.mean()) / 1e6 if len(values) else 0.0
+
+    def get_summary(self):
+        """
+        Возвращает статистику замеров по истории кадров
+        :return: Список словарей (name, last, mean, p50, p95, p99 - в миллисекундах),
+                 отсортированный по убыванию среднего
+        """
+        if self.frame_index == 0 or not self.samples:
+            return []
+
+        # Порядок кадров для перцентилей не важен, поэтому все замеры считаются одной матрицей
+        count = min(self.frame_index, self.history)
+        last_slot = (self.frame_index - 1) % self.history
+        names = list(self.samples)
+        matrix = np.stack([self.samples[name] for name in names])[:, :count] / 1e6
+        p50, p95, p99 = np.percentile(matrix, (50, 95, 99), axis=1)
+        means = matrix.mean(axis=1)
+
+        summary = []
+        for i, name in enumerate(names):
+            summary.append({
+                'name': name,
+                'last': float(matrix[i, last_slot]),
+                'mean': float(means[i]),
+                'p50': float(p50[i]),
+                'p95': float(p95[i]),
+                'p99': float(p99[i]),
+            })
+        summary.sort(key=lambda row: row['mean'], reverse=True)
+        return summary
+
+    def dump_csv(self, path):
+        """
+        Записывает покадровые замеры истории в CSV (одна строка на кадр, времена в миллисекундах)
+        :param path: Путь к файлу
+        :return: Число записанных кадров
+        """
+        names = sorted(self.samples)
+        count = min(self.frame_index, self.history)
+        columns = [self._ordered(self.samples[name]) for name in names]
+        frame_ns = self._ordered(self.frame_ns)
+        work_ns = self._ordered(self.work_ns)
+        entities = self._ordered(self.entities)
+        first_frame = self.frame_index - count
+
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame', 'frame_ms', 'work_ms', 'entities'] + names)
+            for i in range(count):
+                writer.writerow([first_frame + i, f"{frame_ns[i] / 1e6:.3f}", f"{work_ns[i] / 1e6:.3f}", int(entities[i])]
+                                + [f"{column[i] / 1e6:.3f}" for column in columns])
+        return count
+
+    def render_overlay(self, surface, pos, world=None):
+        """
+        Выводит оверлей с временем систем: последний кадр, p50/p95/p99 и число сущностей
+        :param surface: Целевая поверхность
+        :param pos: Левый верхний угол оверлея (x, y)
+        :param world: Мир ECS для подсчета сущностей систем (None - без подсчета)
+        :return: Прямоугольник оверлея
+        """
+        return surface.blit(self.overlay_surface, self.get_overlay_rect(pos, world))
+    
+    def get_overlay_rect(self, pos, world=None):
+        """
+        Перестраивает оверлей, если подошел срок, и возвращает его прямоугольник без вывода
+        (позволяет заявить область оверлея до подготовки кадра)
+        :param pos: Левый верхний угол оверлея (x, y)
+        :param world: Мир ECS для подсчета сущностей систем (None - без подсчета)
+        :return: Прямоугольник оверлея
+        """
+        if self.overlay_surface is None or self.frame_index - self.overlay_frame >= self.overlay_interval:
+            self.overlay_surface = self._build_overlay(world)
+            self.overlay_frame = self.frame_index
+        return self.overlay_surface.get_rect(topleft=pos)
+
+    def _build_overlay(self, world):
+        """
+        Строит поверхность оверлея по текущей истории кадров
+        :param world: Мир ECS для подсчета сущностей систем (None - без подсчета)
+        :return: Поверхность оверлея
+        """
+        text = get_text_renderer(20)
+        white = (255, 255, 255)
+        gray = (170, 170, 170)
+        line_height = text.height + 2
+        columns = (0, 230, 290, 350, 410, 470)  # Смещения столбцов: имя, мс, p50, p95, p99, сущности
+
+        counts = self._get_entity_counts(world) if world is not None else {}
+        summary = self.get_summary()[:self.overlay_rows]
+        frame_values = self._ordered(self.frame_ns)
+        frame_p95, frame_p99 = (np.percentile(frame_values, (95, 99)) / 1e6) if len(frame_values) else (0.0, 0.0)
+        entity_count = int(self.entities[(self.frame_index - 1) % self.history]) if self.frame_index else 0
+
+        width = columns[-1] + 60
+        height = line_height * (len(summary) + 2) + 8
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+
+        y = 4
+        text.draw(overlay, f"Кадр: {self.get_average_frame_ms():.2f} мс  p95 {frame_p95:.2f}  p99 {frame_p99:.2f}"
+                           f"  Сущностей: {entity_count}", (4, y), white, cache=False)
+        y += line_height
+        for offset, title in zip(columns, ("Система", "мс", "p50", "p95", "p99", "сущн.")):
+            text.draw(overlay, title, (4 + offset, y), gray)
+        y += line_height
+
+        for row in summary:
+            values = (f"{row['last']:.2f}", f"{row['p50']:.2f}", f"{row['p95']:.2f}", f"{row['p99']:.2f}")
+            text.draw(overlay, row['name'], (4, y), white)
+            for offset, value in zip(columns[1:], values):
+                text.draw(overlay, value, (4 + offset, y), white, cache=False)
+            count = counts.get(row['name'].split(':', 1)[1])
+            if count is not None:
+                text.draw(overlay, str(count), (4 + columns[-1], y), white, cache=False)
+            y += line_height
+        return overlay
+
+    def _get_entity_counts(self, world):
+        """
+        Считает сущности, которые обрабатывают системы: размер наибольшего живого запроса системы
+        :param world: Мир ECS
+        :return: Словарь имя класса системы -> число сущностей
+        """
+        counts = {}
+        for system in world.systems:
+            sizes = [len(value) for value in vars(system).values() if isinstance(value, QueryView)]
+            if sizes:
+                counts[type(system).__name__] = max(sizes)
+        return counts
@@ -0,0 +1,166 @@
+class RenderQueue:
+    """
+    Очередь команд отрисовки. Во время прохода отрисовки системы кладут в нее
+    команды (поверхность, позиция, область, флаги), а сброс выводит их на экран
+    вызовами Surface.blits по возрастанию слоя - по одному вызову на слой вместо
+    отдельного blit на каждый спрайт. Очередь считает команды по источникам и
+    собирает области экрана с меняющимся содержимым (для режима перерисовки
+    только изменившихся областей)
+    """
+
+    def __init__(self, target):
+        """
+        Инициализирует очередь
+        :param target: Поверхность, на которую выводятся команды (обычно экран)
+        """
+        self.target = target
+        self.layers = {}  # Слой -> список команд (surface, dest, area, flags)
+
+        # Счетчики текущего кадра
+        self.command_counts = {}  # Источник -> число команд
+        self.flush_count = 0  # Число сбросов
+        self.blits_calls = 0  # Число вызовов Surface.blits
+
+        # Области экрана с содержимым, которое может меняться каждый кадр (интерфейс, эффекты):
+        # отмеченные при отрисовке (mark_dirty) и заявленные до подготовки кадра (mark_upcoming)
+        self.dirty_rects = []
+        self.upcoming_rects = []
+        self.last_dirty_rects = []  # Области для перерисовки текущего кадра
+        
+        # Включен режим грязных прямоугольников: системы заявляют области кадра заранее
+        self.collect_upcoming = False
+
+        # Кадр перерисовывается только в изменившихся областях: сдвига камеры и игрока не было,
+        # поэтому полноэкранные слои (затемнение, освещение) можно вывести из прошлого кадра
+        self.partial_frame = False
+        # Области частичного кадра. Проходы выполняются один раз с отсечением по их объединению,
+        # а вывод очереди и полноэкранных слоев дополнительно отсекается каждой областью
+        self.frame_rects = None
+
+        # Счетчики последнего завершенного кадра
+        self.last_frame = {'commands': 0, 'flushes': 0, 'blits_calls': 0, 'by_source': {}}
+
+    def push(self, surface, dest, area=None, flags=0, layer=0, source=None):
+        """
+        Добавляет команду отрисовки
+        :param surface: Выводимая поверхность
+        :param dest: Позиция (x, y) или прямоугольник на целевой поверхности
+        :param area: Выводимая часть поверхности (None - вся поверхность)
+        :param flags: Флаги смешивания (special_flags)
+        :param layer: Слой: команды меньших слоев выводятся раньше
+        :param source: Имя системы, добавившей команду (для счетчиков)
+        """
+        commands = self.layers.get(layer)
+        if commands is None:
+            commands = self.layers[layer] = []
+        commands.append((surface, dest, area, flags))
+        self.command_counts[source] = self.command_counts.get(source, 0) + 1
+
+    def extend(self, commands, layer=0, source=None):
+        """
+        Добавляет несколько команд в один слой
+        :param commands: Список команд (surface, dest, area, flags)
+        :param layer: Слой
+        :param source: Имя системы, добавившей команды (для счетчиков)
+        """
+        if not commands:
+            return
+        self.layers.setdefault(layer, []).extend(commands)
+        self.command_counts[source] = self.command_counts.get(source, 0) + len(commands)
+
+    def mark_dirty(self, rect):
+        """
+        Отмечает область экрана, нарисованную в обход очереди. Такие области перерисовываются
+        в следующем кадре, чтобы стереть или обновить их содержимое. Подходит для содержимого
+        на постоянном месте: новые пиксели за пределами прошлых областей в текущем кадре отсекаются
+        :param rect: Прямоугольник (pygame.Rect или кортеж (x, y, ширина, высота)) без учета отсечения
+        """
+        self.dirty_rects.append(rect)
+    
+    def mark_upcoming(self, rect):
+        """
+        Заявляет область, которую система нарисует в ближайшем кадре. Вызывается до подготовки
+        кадра (в update), поэтому область входит в отсечение этого же кадра. Нарисованную область
+        по-прежнему отмечают mark_dirty, чтобы стереть ее в следующем кадре: при полной перерисовке
+        камера может сдвинуться после update, и заявленная область разойдется с нарисованной
+        :param rect: Прямоугольник (pygame.Rect или кортеж (x, y, ширина, высота)) без учета отсечения
+        """
+        self.upcoming_rects.append(rect)
+
+    def flush(self):
+        """Выводит накопленные команды по возрастанию слоя и очищает очередь"""
+        if not self.layers:
+            return
+        target = self.target
+        if self.frame_rects is None:
+            for layer in sorted(self.layers):
+                target.blits(self.layers[layer], doreturn=False)
+                self.blits_calls += 1
+        else:
+            # Команды вне областей кадра отбрасываются отсечением без вывода пикселей
+            clip = target.get_clip()
+            for rect in self.frame_rects:
+                target.set_clip(rect.clip(clip))
+                for layer in sorted(self.layers):
+                    target.blits(self.layers[layer], doreturn=False)
+                    self.blits_calls += 1
+            target.set_clip(clip)
+        self.layers.clear()
+        self.flush_count += 1
+
+    def fill(self, color):
+        """
+        Заливает экран цветом (в частичном кадре - только области кадра)
+        :param color: Цвет заливки
+        """
+        if self.frame_rects is None:
+            self.target.fill(color)
+        else:
+            for rect in self.frame_rects:
+                self.target.fill(color, rect)
+
+    def blit_screen(self, surface, flags=0):
+        """
+        Выводит поверхность размером с экран в позицию (0, 0) (в частичном кадре - только области кадра)
+        :param surface: Полноэкранная поверхность
+        :param flags: Флаги смешивания (special_flags)
+        """
+        if self.frame_rects is None:
+            self.target.blit(surface, (0, 0), special_flags=flags)
+        else:
+            self.target.blits([(surface, rect, rect, flags) for rect in self.frame_rects], doreturn=False)
+
+    def begin_frame(self):
+        """
+        Начинает новый кадр: сохраняет счетчики прошлого кадра и обнуляет текущие, собирает
+        области для перерисовки кадра
+        """
+        self.last_frame = {
+            'commands': sum(self.command_counts.values()),
+            'flushes': self.flush_count,
+            'blits_calls': self.blits_calls,
+            'by_source': self.command_counts,
+        }
+        self.command_counts = {}
+        self.flush_count = 0
+        self.blits_calls = 0
+        
+        # Перерисовываются области, нарисованные в прошлом кадре, и заявленные на текущий
+        self.last_dirty_rects = self.dirty_rects + self.upcoming_rects
+        self.dirty_rects = []
+        self.upcoming_rects = []
+
+    def get_stats(self):
+        """
+        Возвращает счетчики последнего завершенного кадра
+        :return: Словарь {'commands', 'flushes', 'blits_calls', 'by_source'}
+        """
+        return self.last_frame
+
+    def get_dirty_rects(self):
+        """
+        Возвращает области для перерисовки текущего кадра: отмеченные при отрисовке прошлого
+        кадра и заявленные на текущий кадр
+        :return: Список прямоугольников
+        """
+        return self.last_dirty_rects
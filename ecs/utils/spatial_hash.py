@@ -0,0 +1,95 @@
+class SpatialHash:
+    """
+    Пространственный хэш (равномерная сетка ячеек) для широкой фазы столкновений.
+    Сущности раскладываются по ячейкам, которые перекрывает их AABB, и дальше
+    проверяются только пары, попавшие в общую ячейку
+    """
+
+    def __init__(self, cell_size=64):
+        """
+        Инициализирует пространственный хэш
+        :param cell_size: Размер ячейки в пикселях
+        """
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cy) -> список ID сущностей
+        self.bounds = {}  # ID сущности -> (left, top, right, bottom)
+
+    def clear(self):
+        """Удаляет все сущности из хэша"""
+        self.cells.clear()
+        self.bounds.clear()
+
+    def insert(self, entity_id, left, top, right, bottom):
+        """
+        Добавляет сущность в хэш
+        :param entity_id: ID сущности
+        :param left: Левая граница AABB
+        :param top: Верхняя граница AABB
+        :param right: Правая граница AABB
+        :param bottom: Нижняя граница AABB
+        """
+        self.bounds[entity_id] = (left, top, right, bottom)
+        cell_size = self.cell_size
+        cells = self.cells
+
+        for cy in range(int(top // cell_size), int(bottom // cell_size) + 1):
+            for cx in range(int(left // cell_size), int(right // cell_size) + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cells[(cx, cy)] = [entity_id]
+                else:
+                    cell.append(entity_id)
+
+    def query(self, left, top, right, bottom):
+        """
+        Возвращает сущности из ячеек, которые перекрывает прямоугольник
+        :param left: Левая граница прямоугольника
+        :param top: Верхняя граница прямоугольника
+        :param right: Правая граница прямоугольника
+        :param bottom: Нижняя граница прямоугольника
+        :return: Список ID сущностей без повторов (кандидаты для точной проверки)
+        """
+        cell_size = self.cell_size
+        cells = self.cells
+        found = {}
+
+        for cy in range(int(top // cell_size), int(bottom // cell_size) + 1):
+            for cx in range(int(left // cell_size), int(right // cell_size) + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    for entity_id in cell:
+                        found[entity_id] = None
+
+        return list(found)
+
+    def query_point(self, x, y, radius=0):
+        """
+        Возвращает сущности из ячеек вокруг точки
+        :param x: Координата X
+        :param y: Координата Y
+        :param radius: Радиус области поиска
+        :return: Список ID сущностей без повторов
+        """
+        return self.query(x - radius, y - radius, x + radius, y + radius)
+
+    def get_pairs(self):
+        """
+        Возвращает пары сущностей, которые делят хотя бы одну ячейку
+        :return: Список пар (id1, id2), где id1 < id2, каждая пара один раз
+        """
+        pairs = {}
+
+        for cell in self.cells.values():
+            count = len(cell)
+            if count < 2:
+                continue
+            for i in range(count - 1):
+                first = cell[i]
+                for j in range(i + 1, count):
+                    second = cell[j]
+                    if first < second:
+                        pairs[(first, second)] = None
+                    else:
+                        pairs[(second, first)] = None
+
+        return list(pairs)
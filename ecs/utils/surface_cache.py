@@ -0,0 +1,155 @@
+from collections import OrderedDict
+import pygame
+
+class SurfaceCache:
+    """
+    LRU-кэш преобразованных (масштабированных, повернутых, отраженных, окрашенных)
+    поверхностей. Большинство спрайтов используют несколько общих изображений, поэтому
+    результат преобразования переиспользуется между сущностями и кадрами
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, angle_step=2):
+        """
+        Инициализирует кэш
+        :param max_bytes: Ограничение памяти под закэшированные поверхности в байтах
+        :param angle_step: Шаг квантования угла поворота в градусах
+        """
+        self.max_bytes = max_bytes
+        self.angle_step = angle_step
+        self.entries = OrderedDict()  # Ключ -> (исходное изображение, поверхность, размер в байтах)
+        self.memory = 0  # Текущий объем закэшированных поверхностей в байтах
+        self.zoom = None  # Масштаб камеры, для которого построены поверхности
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_zoom(self, zoom):
+        """
+        Сбрасывает кэш, если изменился масштаб камеры
+        :param zoom: Текущий масштаб камеры
+        """
+        if zoom != self.zoom:
+            self.zoom = zoom
+            self.clear()
+
+    def clear(self):
+        """Удаляет все поверхности из кэша"""
+        self.entries.clear()
+        self.memory = 0
+
+    def quantize_angle(self, angle):
+        """
+        Квантует угол поворота
+        :param angle: Угол в градусах
+        :return: Угол, округленный до шага квантования, в диапазоне [0, 360)
+        """
+        return round(angle / self.angle_step) * self.angle_step % 360
+
+    def get(self, image, width, height, angle=0, flip_x=False, flip_y=False, overlay=None):
+        """
+        Возвращает преобразованное изображение, создавая его при промахе
+        :param image: Исходная поверхность
+        :param width: Ширина после масштабирования
+        :param height: Высота после масштабирования
+        :param angle: Угол поворота в градусах (квантуется)
+        :param flip_x: Отразить по горизонтали
+        :param flip_y: Отразить по вертикали
+        :param overlay: Цвет, умножаемый на изображение (None - без наложения)
+        :return: Преобразованная поверхность
+        """
+        angle = self.quantize_angle(angle)
+        key = (id(image), width, height, angle, flip_x, flip_y, overlay)
+
+        entry = self.entries.get(key)
+        # id может быть переиспользован после удаления изображения, поэтому сверяем сам объект
+        if entry is not None and entry[0] is image:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        surface = self._transform(image, width, height, angle, flip_x, flip_y, overlay)
+        self._store(key, image, surface)
+        return surface
+
+    def get_solid(self, color, width, height):
+        """
+        Возвращает поверхность, залитую цветом (для спрайтов без изображения)
+        :param color: Цвет заливки
+        :param width: Ширина
+        :param height: Высота
+        :return: Залитая поверхность
+        """
+        key = ('solid', color, width, height)
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        surface = pygame.Surface((max(0, width), max(0, height)))
+        surface.fill(color)
+        self._store(key, None, surface)
+        return surface
+
+    def _store(self, key, image, surface):
+        """
+        Сохраняет поверхность в кэш и вытесняет давно не использованные записи
+        :param key: Ключ записи
+        :param image: Исходное изображение (None для залитых поверхностей)
+        :param surface: Сохраняемая поверхность
+        """
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.memory -= entry[2]
+        self.entries[key] = (image, surface, size)
+        self.entries.move_to_end(key)
+        self.memory += size
+
+        # Вытесняем давно не использованные поверхности, пока не уложимся в ограничение
+        while self.memory > self.max_bytes and len(self.entries) > 1:
+            _, (_, _, evicted_size) = self.entries.popitem(last=False)
+            self.memory -= evicted_size
+            self.evictions += 1
+
+    def _transform(self, image, width, height, angle, flip_x, flip_y, overlay):
+        """
+        Выполняет преобразование изображения
+        :param image: Исходная поверхность
+        :param width: Ширина после масштабирования
+        :param height: Высота после масштабирования
+        :param angle: Квантованный угол поворота в градусах
+        :param flip_x: Отразить по горизонтали
+        :param flip_y: Отразить по вертикали
+        :param overlay: Цвет, умножаемый на изображение (None - без наложения)
+        :return: Новая поверхность
+        """
+        surface = pygame.transform.scale(image, (width, height))
+        if flip_x or flip_y:
+            surface = pygame.transform.flip(surface, flip_x, flip_y)
+        if overlay is not None:
+            surface.fill(overlay, special_flags=pygame.BLEND_RGB_MULT)
+        if angle != 0:
+            surface = pygame.transform.rotate(surface, -angle)  # Отрицательный угол для правильного поворота
+        return surface
+
+    def get_stats(self):
+        """
+        Возвращает статистику кэша
+        :return: Словарь со статистикой
+        """
+        total = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'memory': self.memory,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0,
+        }
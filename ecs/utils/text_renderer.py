@@ -0,0 +1,157 @@
+from collections import OrderedDict
+import pygame
+
+# Символы атласа: цифры, знаки и буквы, из которых состоят надписи интерфейса
+ATLAS_CHARACTERS = (
+    "0123456789 +-.,:;/%()!?x"
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+    "АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯабвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+)
+
+class TextRenderer:
+    """
+    Кэширующий вывод текста одним шрифтом. Надписи и редко меняющиеся значения берутся
+    из LRU-кэша строк и растеризуются только при изменении текста. Значения, меняющиеся
+    каждый кадр, собираются из атласа глифов - одной поверхности на цвет, из которой
+    символы выводятся вызовом Surface.blits, - без растеризации и без вытеснения надписей из кэша
+    """
+
+    def __init__(self, size=24, name=None, max_entries=256):
+        """
+        Инициализирует вывод текста
+        :param size: Размер шрифта
+        :param name: Имя системного шрифта (None - шрифт по умолчанию)
+        :param max_entries: Максимальное число строк в LRU-кэше
+        """
+        self.font = pygame.font.SysFont(name, size)
+        self.height = self.font.get_height()
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (текст, цвет) -> поверхность
+        self.atlases = {}  # Цвет -> (поверхность атласа, словарь символ -> область в атласе)
+        self.glyphs = {char: self.font.size(char)[0] for char in ATLAS_CHARACTERS}  # Символ атласа -> ширина
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, color):
+        """
+        Возвращает поверхность строки, растеризуя ее только при первом обращении
+        :param text: Текст
+        :param color: Цвет текста
+        :return: Поверхность с текстом
+        """
+        key = (text, color)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.font.render(text, True, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
+
+    def draw(self, target, text, pos, color, cache=True):
+        """
+        Выводит строку на поверхность
+        :param target: Целевая поверхность
+        :param text: Текст
+        :param pos: Левый верхний угол (x, y)
+        :param color: Цвет текста
+        :param cache: True - строка берется из LRU-кэша (надписи и редко меняющиеся значения);
+                      False - строка собирается из атласа глифов без растеризации и без записи
+                      в кэш (значения, меняющиеся каждый кадр: FPS, расстояния)
+        :return: Прямоугольник выведенного текста
+        """
+        x, y = int(pos[0]), int(pos[1])
+        if cache:
+            return target.blit(self.render(text, color), (x, y))
+
+        glyphs = self.glyphs
+        if not all(char in glyphs for char in text):
+            # Символов нет в атласе - выводим строку через кэш
+            return target.blit(self.render(text, color), (x, y))
+
+        atlas, areas = self._get_atlas(color)
+        commands = []
+        offset = x
+        for char in text:
+            commands.append((atlas, (offset, y), areas[char], 0))
+            offset += glyphs[char]
+        target.blits(commands, doreturn=False)
+        return pygame.Rect(x, y, offset - x, self.height)
+
+    def get_rect(self, text, pos, cache=True):
+        """
+        Возвращает прямоугольник строки без вывода (тот же, что вернет draw без отсечения)
+        :param text: Текст
+        :param pos: Левый верхний угол (x, y)
+        :param cache: Способ вывода, как в draw
+        :return: Прямоугольник текста
+        """
+        x, y = int(pos[0]), int(pos[1])
+        glyphs = self.glyphs
+        if not cache and all(char in glyphs for char in text):
+            return pygame.Rect(x, y, sum(glyphs[char] for char in text), self.height)
+        return pygame.Rect((x, y), self.font.size(text))
+
+    def size(self, text):
+        """
+        Возвращает размер строки при выводе через кэш
+        :param text: Текст
+        :return: Кортеж (ширина, высота)
+        """
+        return self.font.size(text)
+
+    def _get_atlas(self, color):
+        """
+        Возвращает атлас глифов для цвета, создавая его при первом обращении
+        :param color: Цвет текста
+        :return: Кортеж (поверхность атласа, словарь символ -> pygame.Rect)
+        """
+        atlas = self.atlases.get(color)
+        if atlas is not None:
+            return atlas
+
+        glyphs = [(char, self.font.render(char, True, color)) for char in ATLAS_CHARACTERS]
+        surface = pygame.Surface((sum(glyph.get_width() for _, glyph in glyphs), self.height), pygame.SRCALPHA)
+        areas = {}
+        offset = 0
+        for char, glyph in glyphs:
+            # Копируем глиф вместе с альфа-каналом (смешивание с прозрачным фоном затемнило бы края)
+            surface.blit(glyph, (offset, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            areas[char] = pygame.Rect(offset, 0, glyph.get_width(), self.height)
+            offset += glyph.get_width()
+
+        atlas = self.atlases[color] = (surface, areas)
+        return atlas
+
+    def get_stats(self):
+        """
+        Возвращает статистику кэша строк
+        :return: Словарь со статистикой
+        """
+        return {
+            'entries': len(self.entries),
+            'atlases': len(self.atlases),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+# Общие экземпляры по размеру шрифта (создаются при первом обращении, после pygame.init)
+_text_renderers = {}
+
+def get_text_renderer(size=24):
+    """
+    Возвращает общий вывод текста шрифтом по умолчанию заданного размера
+    :param size: Размер шрифта
+    :return: Экземпляр TextRenderer
+    """
+    renderer = _text_renderers.get(size)
+    if renderer is None:
+        renderer = _text_renderers[size] = TextRenderer(size)
+    return renderer
@@ -0,0 +1,279 @@
+import math
+
+# Коды тайлов (совпадают с кодами карты, которую возвращает генератор лабиринта)
+TILE_EMPTY = 0
+TILE_WALL = 1
+TILE_FLOOR = 2
+TILE_ENTRANCE = 3
+TILE_EXIT = 4
+
+class TileGrid:
+    """
+    Плотная сетка тайлов уровня. Создается фабрикой уровня и публикуется как ресурс мира,
+    чтобы системы проверяли стены за O(1) по индексу клетки, а не перебором всех тайлов
+    """
+
+    def __init__(self, width, height, tile_size=32):
+        """
+        Инициализирует пустую сетку
+        :param width: Ширина сетки в тайлах
+        :param height: Высота сетки в тайлах
+        :param tile_size: Размер тайла в пикселях
+        """
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+
+        # Плоские массивы, индекс клетки = ty * width + tx
+        size = width * height
+        self.kinds = bytearray(size)  # Тип тайла (TILE_*)
+        self.walkable = bytearray(size)  # 1 - проходимый тайл
+        self.solid = bytearray(size)  # 1 - тайл с блокирующим коллайдером (стена)
+        self.entity_ids = [None] * size  # ID сущности тайла
+
+        # Координаты тайлов по типам (например, все выходы уровня)
+        self.tiles_by_kind = {}
+
+        # Границы занятой тайлами области (в тайлах), обновляются в set_tile
+        self.min_tx = width
+        self.min_ty = height
+        self.max_tx = -1
+        self.max_ty = -1
+
+    def index(self, tx, ty):
+        """
+        Возвращает индекс клетки в плоских массивах
+        :param tx: Координата X тайла
+        :param ty: Координата Y тайла
+        :return: Индекс клетки
+        """
+        return ty * self.width + tx
+
+    def in_bounds(self, tx, ty):
+        """
+        Проверяет, находится ли клетка в пределах сетки
+        :param tx: Координата X тайла
+        :param ty: Координата Y тайла
+        :return: True, если клетка в пределах сетки
+        """
+        return 0 <= tx < self.width and 0 <= ty < self.height
+
+    def set_tile(self, tx, ty, kind, walkable, solid, entity_id):
+        """
+        Записывает тайл в сетку
+        :param tx: Координата X тайла
+        :param ty: Координата Y тайла
+        :param kind: Тип тайла (TILE_*)
+        :param walkable: Проходим ли тайл
+        :param solid: Есть ли у тайла блокирующий коллайдер
+        :param entity_id: ID сущности тайла
+        """
+        i = ty * self.width + tx
+        self.kinds[i] = kind
+        self.walkable[i] = 1 if walkable else 0
+        self.solid[i] = 1 if solid else 0
+        self.entity_ids[i] = entity_id
+        self.tiles_by_kind.setdefault(kind, []).append((tx, ty))
+
+        self.min_tx = min(self.min_tx, tx)
+        self.min_ty = min(self.min_ty, ty)
+        self.max_tx = max(self.max_tx, tx)
+        self.max_ty = max(self.max_ty, ty)
+
+    def world_to_tile(self, x, y):
+        """
+        Преобразует мировые координаты в координаты тайла
+        :param x: Мировая координата X
+        :param y: Мировая координата Y
+        :return: Кортеж (tx, ty)
+        """
+        return int(x // self.tile_size), int(y // self.tile_size)
+
+    def tile_center(self, tx, ty):
+        """
+        Возвращает мировые координаты центра тайла
+        :param tx: Координата X тайла
+        :param ty: Координата Y тайла
+        :return: Кортеж (x, y)
+        """
+        half = self.tile_size / 2
+        return tx * self.tile_size + half, ty * self.tile_size + half
+
+    def get_kind(self, tx, ty):
+        """
+        Возвращает тип тайла
+        :param tx: Координата X тайла
+        :param ty: Координата Y тайла
+        :return: Тип тайла (TILE_*), TILE_EMPTY за пределами сетки
+        """
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            return self.kinds[ty * self.width + tx]
+        return TILE_EMPTY
+
+    def get_entity(self, tx, ty):
+        """
+        Возвращает ID сущности тайла
+        :param tx: Координата X тайла
+        :param ty: Координата Y тайла
+        :return: ID сущности или None
+        """
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            return self.entity_ids[ty * self.width + tx]
+        return None
+
+    def is_walkable(self, tx, ty):
+        """
+        Проверяет, проходим ли тайл
+        :param tx: Координата X тайла
+        :param ty: Координата Y тайла
+        :return: True, если тайл проходим (за пределами сетки - False)
+        """
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            return self.walkable[ty * self.width + tx] == 1
+        return False
+
+    def is_solid(self, tx, ty):
+        """
+        Проверяет, блокирует ли тайл движение
+        :param tx: Координата X тайла
+        :param ty: Координата Y тайла
+        :return: True, если в клетке стена (за пределами сетки - False)
+        """
+        if 0 <= tx < self.width and 0 <= ty < self.height:
+            return self.solid[ty * self.width + tx] == 1
+        return False
+
+    def is_wall_at(self, x, y):
+        """
+        Проверяет, находится ли мировая точка внутри стены
+        :param x: Мировая координата X
+        :param y: Мировая координата Y
+        :return: True, если точка внутри стены
+        """
+        return self.is_solid(int(x // self.tile_size), int(y // self.tile_size))
+
+    def get_tiles(self, kind):
+        """
+        Возвращает координаты всех тайлов указанного типа
+        :param kind: Тип тайла (TILE_*)
+        :return: Список кортежей (tx, ty)
+        """
+        return self.tiles_by_kind.get(kind, [])
+
+    def get_tile_range(self, left, top, right, bottom):
+        """
+        Возвращает диапазон клеток, которые перекрывает прямоугольник, обрезанный по сетке
+        :param left: Левая граница в мировых координатах
+        :param top: Верхняя граница в мировых координатах
+        :param right: Правая граница в мировых координатах
+        :param bottom: Нижняя граница в мировых координатах
+        :return: Кортеж (min_tx, min_ty, max_tx, max_ty) включительно
+        """
+        tile_size = self.tile_size
+        min_tx = max(0, int(left // tile_size))
+        min_ty = max(0, int(top // tile_size))
+        max_tx = min(self.width - 1, int(math.ceil(right / tile_size)) - 1)
+        max_ty = min(self.height - 1, int(math.ceil(bottom / tile_size)) - 1)
+        return min_tx, min_ty, max_tx, max_ty
+
+    def raycast(self, x0, y0, x1, y1):
+        """
+        Находит первую стену на отрезке, проходя по клеткам сетки алгоритмом DDA
+        (Amanatides-Woo). Стоимость пропорциональна числу пройденных клеток, а быстрые
+        объекты не "проскакивают" тонкие стены между кадрами
+        :param x0: Начальная мировая координата X
+        :param y0: Начальная мировая координата Y
+        :param x1: Конечная мировая координата X
+        :param y1: Конечная мировая координата Y
+        :return: Кортеж (t, tx, ty), где t - доля отрезка до входа в стену (0..1), или None
+        """
+        tile_size = self.tile_size
+        tx, ty = int(x0 // tile_size), int(y0 // tile_size)
+        end_tx, end_ty = int(x1 // tile_size), int(y1 // tile_size)
+
+        if self.is_solid(tx, ty):
+            return 0.0, tx, ty
+
+        dx = x1 - x0
+        dy = y1 - y0
+
+        # Шаг по оси и доля отрезка до ближайшей границы клетки по этой оси
+        if dx > 0:
+            step_x = 1
+            t_delta_x = tile_size / dx
+            t_max_x = ((tx + 1) * tile_size - x0) / dx
+        elif dx < 0:
+            step_x = -1
+            t_delta_x = -tile_size / dx
+            t_max_x = (tx * tile_size - x0) / dx
+        else:
+            step_x = 0
+            t_delta_x = t_max_x = math.inf
+
+        if dy > 0:
+            step_y = 1
+            t_delta_y = tile_size / dy
+            t_max_y = ((ty + 1) * tile_size - y0) / dy
+        elif dy < 0:
+            step_y = -1
+            t_delta_y = -tile_size / dy
+            t_max_y = (ty * tile_size - y0) / dy
+        else:
+            step_y = 0
+            t_delta_y = t_max_y = math.inf
+
+        # Число шагов ограничено манхэттенским расстоянием между клетками
+        for _ in range(abs(end_tx - tx) + abs(end_ty - ty)):
+            if t_max_x < t_max_y:
+                t = t_max_x
+                tx += step_x
+                t_max_x += t_delta_x
+            else:
+                t = t_max_y
+                ty += step_y
+                t_max_y += t_delta_y
+
+            if t > 1:
+                break
+            if self.is_solid(tx, ty):
+                return t, tx, ty
+
+        return None
+
+    def find_solid_in_circle(self, x, y, radius):
+        """
+        Находит стену, которую пересекает круг
+        :param x: Мировая координата X центра
+        :param y: Мировая координата Y центра
+        :param radius: Радиус круга
+        :return: Кортеж (tx, ty) стены или None
+        """
+        tile_size = self.tile_size
+        min_tx, min_ty, max_tx, max_ty = self.get_tile_range(x - radius, y - radius, x + radius, y + radius)
+        radius_squared = radius * radius
+
+        for ty in range(min_ty, max_ty + 1):
+            for tx in range(min_tx, max_tx + 1):
+                if not self.solid[ty * self.width + tx]:
+                    continue
+
+                # Ближайшая к центру круга точка клетки
+                closest_x = max(tx * tile_size, min(x, (tx + 1) * tile_size))
+                closest_y = max(ty * tile_size, min(y, (ty + 1) * tile_size))
+                distance_x = x - closest_x
+                distance_y = y - closest_y
+                if distance_x * distance_x + distance_y * distance_y < radius_squared:
+                    return tx, ty
+
+        return None
+
+    def get_bounds(self):
+        """
+        Возвращает границы занятой тайлами области в мировых координатах
+        :return: Кортеж (min_x, min_y, max_x, max_y) или None, если сетка пуста
+        """
+        if self.max_tx < 0:
+            return None
+        tile_size = self.tile_size
+        return (self.min_tx * tile_size, self.min_ty * tile_size,
+                (self.max_tx + 1) * tile_size, (self.max_ty + 1) * tile_size)
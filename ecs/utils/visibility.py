@@ -0,0 +1,261 @@
+import math
+
+TWO_PI = 2 * math.pi
+
+def build_wall_segments(tile_grid):
+    """
+    Строит контур стен уровня из максимальных отрезков. Берутся только границы между стеной
+    и проходимой клеткой (общие стороны соседних стен отбрасываются), а соседние стороны
+    на одной линии, обращенные в одну сторону, сливаются в один отрезок. Стороны, обращенные
+    в разные стороны, не сливаются: иначе у стен, касающихся углами, отрезки пересекались бы
+    :param tile_grid: Сетка тайлов уровня
+    :return: Список отрезков ((x1, y1), (x2, y2)) в мировых координатах
+    """
+    width = tile_grid.width
+    height = tile_grid.height
+    tile_size = tile_grid.tile_size
+    solid = tile_grid.solid
+    segments = []
+
+    def is_solid(tx, ty):
+        return 0 <= tx < width and 0 <= ty < height and solid[ty * width + tx] == 1
+
+    # Горизонтальные границы: линия y = ty * tile_size между строками ty - 1 и ty
+    for ty in range(height + 1):
+        y = ty * tile_size
+        run_start = None
+        run_side = 0
+        for tx in range(width + 1):
+            side = _edge_side(is_solid(tx, ty - 1), is_solid(tx, ty)) if tx < width else 0
+            if side != run_side:
+                if run_side:
+                    segments.append(((run_start * tile_size, y), (tx * tile_size, y)))
+                run_start = tx
+                run_side = side
+
+    # Вертикальные границы: линия x = tx * tile_size между столбцами tx - 1 и tx
+    for tx in range(width + 1):
+        x = tx * tile_size
+        run_start = None
+        run_side = 0
+        for ty in range(height + 1):
+            side = _edge_side(is_solid(tx - 1, ty), is_solid(tx, ty)) if ty < height else 0
+            if side != run_side:
+                if run_side:
+                    segments.append(((x, run_start * tile_size), (x, ty * tile_size)))
+                run_start = ty
+                run_side = side
+
+    return segments
+
+def _edge_side(solid_before, solid_after):
+    """
+    Определяет, с какой стороны от границы клеток стена
+    :param solid_before: Стена в клетке перед границей (сверху или слева)
+    :param solid_after: Стена в клетке после границы (снизу или справа)
+    :return: -1 - стена перед границей, 1 - после, 0 - границы нет
+    """
+    if solid_before == solid_after:
+        return 0
+    return -1 if solid_before else 1
+
+def clip_segment(x1, y1, x2, y2, left, top, right, bottom):
+    """
+    Обрезает отрезок прямоугольником (алгоритм Лианга-Барски)
+    :param x1: Начальная координата X отрезка
+    :param y1: Начальная координата Y отрезка
+    :param x2: Конечная координата X отрезка
+    :param y2: Конечная координата Y отрезка
+    :param left: Левая граница прямоугольника
+    :param top: Верхняя граница прямоугольника
+    :param right: Правая граница прямоугольника
+    :param bottom: Нижняя граница прямоугольника
+    :return: Обрезанный отрезок ((x1, y1), (x2, y2)) или None, если он вне прямоугольника
+    """
+    dx = x2 - x1
+    dy = y2 - y1
+    t_enter = 0.0
+    t_exit = 1.0
+
+    for p, q in ((-dx, x1 - left), (dx, right - x1), (-dy, y1 - top), (dy, bottom - y1)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = q / p
+        if p < 0:
+            t_enter = max(t_enter, t)
+        else:
+            t_exit = min(t_exit, t)
+        if t_enter > t_exit:
+            return None
+
+    return (x1 + dx * t_enter, y1 + dy * t_enter), (x1 + dx * t_exit, y1 + dy * t_exit)
+
+def compute_visibility_polygon(origin_x, origin_y, segments, radius, start_angle=0.0, span=TWO_PI):
+    """
+    Строит многоугольник видимости из точки одним угловым проходом по концам отрезков.
+    Отрезки обрезаются квадратом со стороной 2 * radius, стороны которого тоже служат
+    препятствиями, поэтому видимая область всегда замкнута
+    :param origin_x: Координата X источника
+    :param origin_y: Координата Y источника
+    :param segments: Непересекающиеся отрезки-препятствия ((x1, y1), (x2, y2))
+    :param radius: Половина стороны ограничивающего квадрата
+    :param start_angle: Начальный угол сектора в радианах (экранные координаты, ось Y вниз)
+    :param span: Угловой размер сектора в радианах (2 * pi - полный обзор)
+    :return: Точки границы видимой области по возрастанию угла. Для неполного сектора
+             многоугольник замыкается источником, который не входит в список
+    """
+    left = origin_x - radius
+    top = origin_y - radius
+    right = origin_x + radius
+    bottom = origin_y + radius
+
+    # Отрезки в пределах квадрата и стороны самого квадрата
+    walls = []
+    for (x1, y1), (x2, y2) in segments:
+        # Быстрый отсев отрезков, целиком лежащих вне квадрата
+        if max(x1, x2) < left or min(x1, x2) > right or max(y1, y2) < top or min(y1, y2) > bottom:
+            continue
+        clipped = clip_segment(x1, y1, x2, y2, left, top, right, bottom)
+        if clipped is not None and clipped[0] != clipped[1]:
+            walls.append(clipped)
+    walls.append(((left, top), (right, top)))
+    walls.append(((right, top), (right, bottom)))
+    walls.append(((right, bottom), (left, bottom)))
+    walls.append(((left, bottom), (left, top)))
+
+    # События прохода: (угол от начала сектора, 0 - начало / 1 - конец отрезка, номер отрезка)
+    events = []
+    for index, ((x1, y1), (x2, y2)) in enumerate(walls):
+        angle1 = (math.atan2(y1 - origin_y, x1 - origin_x) - start_angle) % TWO_PI
+        angle2 = (math.atan2(y2 - origin_y, x2 - origin_x) - start_angle) % TWO_PI
+        delta = angle2 - angle1
+        if delta <= -math.pi:
+            delta += TWO_PI
+        elif delta > math.pi:
+            delta -= TWO_PI
+        if delta == 0:
+            continue  # Отрезок лежит на луче из источника и ничего не загораживает
+        if delta > 0:
+            events.append((angle1, 0, index))
+            events.append((angle2, 1, index))
+        else:
+            events.append((angle2, 0, index))
+            events.append((angle1, 1, index))
+    events.sort()
+
+    # Открытые отрезки от ближнего к дальнему. Первый проход только открывает отрезки,
+    # пересекающие начальный луч, второй строит границу
+    points = []
+    open_walls = []
+    for emit in (False, True):
+        begin_angle = 0.0
+        for angle, is_end, index in events:
+            nearest = open_walls[0] if open_walls else None
+            if is_end:
+                if index in open_walls:
+                    open_walls.remove(index)
+            else:
+                position = 0
+                while position < len(open_walls) and _is_behind(walls[index], walls[open_walls[position]], origin_x, origin_y):
+                    position += 1
+                open_walls.insert(position, index)
+
+            if open_walls and open_walls[0] != nearest:
+                if emit and nearest is not None:
+                    _add_boundary(points, origin_x, origin_y, walls[nearest], begin_angle, angle, start_angle, span)
+                begin_angle = angle
+
+    # Замыкаем границу до конца оборота
+    if open_walls:
+        _add_boundary(points, origin_x, origin_y, walls[open_walls[0]], begin_angle, TWO_PI, start_angle, span)
+
+    return points
+
+def _is_behind(a, b, origin_x, origin_y):
+    """
+    Проверяет, что отрезок a дальше от источника, чем отрезок b (отрезки не пересекаются)
+    :param a: Отрезок ((x1, y1), (x2, y2))
+    :param b: Отрезок ((x1, y1), (x2, y2))
+    :param origin_x: Координата X источника
+    :param origin_y: Координата Y источника
+    :return: True, если a загорожен отрезком b
+    """
+    # Точки чуть внутри концов отрезков, чтобы общие концы не влияли на результат
+    a1 = _interpolate(a[0], a[1], 0.01)
+    a2 = _interpolate(a[1], a[0], 0.01)
+    b1 = _interpolate(b[0], b[1], 0.01)
+    b2 = _interpolate(b[1], b[0], 0.01)
+    origin = (origin_x, origin_y)
+
+    # a целиком по другую сторону от b, чем источник: b между ними
+    side_a1, side_a2, side_origin_b = _left_of(b, a1), _left_of(b, a2), _left_of(b, origin)
+    if side_a1 == side_a2 and side_a2 != side_origin_b:
+        return True
+
+    # b целиком по ту же сторону от a, что и источник: b перед a
+    side_b1, side_b2, side_origin_a = _left_of(a, b1), _left_of(a, b2), _left_of(a, origin)
+    if side_b1 == side_b2 and side_b2 == side_origin_a:
+        return True
+
+    return False
+
+def _left_of(segment, point):
+    """
+    Проверяет, лежит ли точка слева от прямой отрезка
+    :param segment: Отрезок ((x1, y1), (x2, y2))
+    :param point: Точка (x, y)
+    :return: True, если точка слева
+    """
+    (x1, y1), (x2, y2) = segment
+    return (x2 - x1) * (point[1] - y1) - (y2 - y1) * (point[0] - x1) < 0
+
+def _interpolate(p, q, f):
+    """
+    Возвращает точку отрезка pq на доле f от p
+    :param p: Точка (x, y)
+    :param q: Точка (x, y)
+    :param f: Доля от 0 до 1
+    :return: Точка (x, y)
+    """
+    return p[0] + (q[0] - p[0]) * f, p[1] + (q[1] - p[1]) * f
+
+def _add_boundary(points, origin_x, origin_y, segment, angle1, angle2, start_angle, span):
+    """
+    Добавляет участок границы видимости: часть отрезка между двумя лучами, обрезанную сектором
+    :param points: Список точек границы
+    :param origin_x: Координата X источника
+    :param origin_y: Координата Y источника
+    :param segment: Ближайший отрезок на этом участке
+    :param angle1: Начальный угол участка от начала сектора
+    :param angle2: Конечный угол участка от начала сектора
+    :param start_angle: Начальный угол сектора
+    :param span: Угловой размер сектора
+    """
+    angle1 = max(angle1, 0.0)
+    angle2 = min(angle2, span)
+    if angle1 > angle2:
+        return
+    for angle in (angle1, angle2):
+        point = _ray_hit(origin_x, origin_y, start_angle + angle, segment)
+        if not points or points[-1] != point:
+            points.append(point)
+
+def _ray_hit(origin_x, origin_y, angle, segment):
+    """
+    Находит точку пересечения луча из источника с прямой отрезка
+    :param origin_x: Координата X источника
+    :param origin_y: Координата Y источника
+    :param angle: Угол луча в радианах
+    :param segment: Отрезок ((x1, y1), (x2, y2))
+    :return: Точка пересечения (x, y)
+    """
+    (x1, y1), (x2, y2) = segment
+    dx = math.cos(angle)
+    dy = math.sin(angle)
+    den = dx * (y2 - y1) - dy * (x2 - x1)
+    if abs(den) < 1e-12:
+        return x1, y1
+    t = ((x1 - origin_x) * (y2 - y1) - (y1 - origin_y) * (x2 - x1)) / den
+    return origin_x + dx * t, origin_y + dy * t
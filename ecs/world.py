@@ -1,3 +1,115 @@
+import time
+
+class Archetype:
+    """
+    Таблица архетипа: все сущности с одинаковым набором типов компонентов
+    """
+    
+    def __init__(self, signature):
+        """
+        Инициализирует таблицу архетипа
+        :param signature: frozenset типов компонентов
+        """
+        self.signature = signature
+        # Словарь используется как упорядоченное множество: O(1) добавление и удаление
+        self.entities = {}
+        # Живые представления запросов, которым подходит этот архетип
+        self.views = []
+
+
+class QueryView:
+    """
+    Живое представление запроса: множество сущностей, у которых есть все
+    требуемые компоненты и нет исключенных. Создается один раз через World.query
+    и поддерживается миром в актуальном состоянии при изменении компонентов
+    """
+    
+    def __init__(self, include, exclude):
+        """
+        Инициализирует представление запроса
+        :param include: frozenset обязательных типов компонентов
+        :param exclude: frozenset исключенных типов компонентов
+        """
+        self.include = include
+        self.exclude = exclude
+        self.entities = {}  # Упорядоченное множество ID сущностей
+        self._snapshot = None  # Кортеж для безопасного обхода, пересоздается только после изменений
+        self.listeners = []  # Пары (on_add, on_remove), вызываемые при изменении состава представления
+    
+    def matches(self, signature):
+        """
+        Проверяет, подходит ли набор типов компонентов под запрос
+        :param signature: frozenset типов компонентов
+        :return: True, если набор подходит
+        """
+        return self.include <= signature and not (self.exclude & signature)
+    
+    def first(self):
+        """
+        Возвращает первую сущность представления
+        :return: ID сущности или None, если представление пустое
+        """
+        return next(iter(self.entities), None)
+    
+    def add_listener(self, on_add, on_remove):
+        """
+        Подписывается на изменения состава представления. on_add сразу вызывается для уже
+        входящих сущностей, а также повторно, если у сущности заменили один из требуемых компонентов
+        :param on_add: Функция (entity_id), вызываемая при появлении сущности в представлении
+        :param on_remove: Функция (entity_id), вызываемая при выходе сущности из представления
+                          (компоненты сущности к этому моменту могут быть уже удалены)
+        """
+        self.listeners.append((on_add, on_remove))
+        for entity_id in tuple(self.entities):
+            on_add(entity_id)
+    
+    def _add(self, entity_id):
+        self.entities[entity_id] = None
+        self._snapshot = None
+        for on_add, _ in self.listeners:
+            on_add(entity_id)
+    
+    def _replace(self, entity_id):
+        for on_add, _ in self.listeners:
+            on_add(entity_id)
+    
+    def _discard(self, entity_id):
+        if entity_id in self.entities:
+            del self.entities[entity_id]
+            self._snapshot = None
+            for _, on_remove in self.listeners:
+                on_remove(entity_id)
+    
+    def _clear(self):
+        if self.listeners:
+            for entity_id in tuple(self.entities):
+                for _, on_remove in self.listeners:
+                    on_remove(entity_id)
+        self.entities.clear()
+        self._snapshot = None
+    
+    def _get_snapshot(self):
+        # Системы удаляют сущности прямо во время обхода, поэтому обходим неизменяемый снимок
+        if self._snapshot is None:
+            self._snapshot = tuple(self.entities)
+        return self._snapshot
+    
+    def __iter__(self):
+        return iter(self._get_snapshot())
+    
+    def __getitem__(self, index):
+        return self._get_snapshot()[index]
+    
+    def __len__(self):
+        return len(self.entities)
+    
+    def __bool__(self):
+        return bool(self.entities)
+    
+    def __contains__(self, entity_id):
+        return entity_id in self.entities
+
+
 class World:
     """Мир ECS (Entity-Component-System)"""
     
@@ -7,6 +119,29 @@ class World:
         self.components = {}  # Словарь компонентов
         self.systems = []  # Список систем
         self.next_entity_id = 0  # Следующий ID сущности
+        
+        # Архетипы: сущности сгруппированы по набору типов компонентов
+        self.archetypes = {}  # Сигнатура (frozenset типов) -> Archetype
+        self.entity_archetypes = {}  # ID сущности -> Archetype
+        
+        # Кэш запросов: набор запрошенных типов -> список подходящих архетипов.
+        # Пополняется при появлении новых архетипов, поэтому запрос не сканирует все сущности
+        self.query_cache = {}
+        
+        # Живые представления запросов: (включаемые типы, исключаемые типы) -> QueryView
+        self.query_views = {}
+        
+        # Ресурсы мира - общие данные, не привязанные к сущностям (например, сетка тайлов)
+        self.resources = {}  # Тип ресурса -> экземпляр
+        
+        # Проходы отрисовки в порядке выполнения: список (имя, функция без аргументов)
+        self.render_passes = []
+        # Время выполнения каждого прохода в последнем кадре: имя -> миллисекунды
+        self.render_pass_times = {}
+        
+        # Профилировщик кадров (FrameProfiler): если задан, мир передает ему время
+        # каждого update системы и каждого прохода отрисовки
+        self.profiler = None
     
     def create_entity(self):
         """
@@ -16,6 +151,13 @@ class World:
         entity_id = self.next_entity_id
         self.next_entity_id += 1
         self.entities[entity_id] = set()  # Множество компонентов сущности
+        
+        # Новая сущность попадает в пустой архетип
+        archetype = self._get_archetype(frozenset())
+        archetype.entities[entity_id] = None
+        self.entity_archetypes[entity_id] = archetype
+        for view in archetype.views:
+            view._add(entity_id)
         return entity_id
     
     def delete_entity(self, entity_id):
@@ -25,9 +167,14 @@ class World:
         """
         if entity_id in self.entities:
             # Удаляем все компоненты сущности
-            for component_type in list(self.components.keys()):
-                if entity_id in self.components[component_type]:
-                    del self.components[component_type][entity_id]
+            for component_type in self.entities[entity_id]:
+                del self.components[component_type][entity_id]
+            
+            # Удаляем сущность из таблицы архетипа
+            archetype = self.entity_archetypes.pop(entity_id)
+            del archetype.entities[entity_id]
+            for view in archetype.views:
+                view._discard(entity_id)
             
             # Удаляем сущность
             del self.entities[entity_id]
@@ -50,6 +197,15 @@ class World:
         # Удаляем все сущности
         self.entities = {}
         
+        # Сбрасываем архетипы и кэш запросов
+        self.archetypes = {}
+        self.entity_archetypes = {}
+        self.query_cache = {}
+        
+        # Представления запросов остаются зарегистрированными, очищаем только их содержимое
+        for view in self.query_views.values():
+            view._clear()
+        
         # Сбрасываем счетчик ID
         self.next_entity_id = 0
     
@@ -74,7 +230,16 @@ class World:
         self.components[component_type][entity_id] = component
         
         # Добавляем тип компонента в множество компонентов сущности
-        self.entities[entity_id].add(component_type)
+        entity_components = self.entities[entity_id]
+        if component_type not in entity_components:
+            entity_components.add(component_type)
+            # Набор компонентов изменился - переносим сущность в другой архетип
+            self._move_entity(entity_id, frozenset(entity_components))
+        else:
+            # Компонент заменен новым экземпляром - сообщаем подписчикам представлений, которые его требуют
+            for view in self.entity_archetypes[entity_id].views:
+                if view.listeners and component_type in view.include:
+                    view._replace(entity_id)
     
     def remove_component(self, entity_id, component_type):
         """
@@ -96,7 +261,11 @@ class World:
         del self.components[component_type][entity_id]
         
         # Удаляем тип компонента из множества компонентов сущности
-        self.entities[entity_id].discard(component_type)
+        entity_components = self.entities[entity_id]
+        entity_components.discard(component_type)
+        
+        # Переносим сущность в архетип без этого компонента
+        self._move_entity(entity_id, frozenset(entity_components))
     
     def has_component(self, entity_id, component_type):
         """
@@ -157,14 +326,117 @@ class World:
                 return list(self.components[component_type].keys())
             return []
         
-        # Иначе находим сущности, у которых есть все указанные компоненты
+        # Иначе собираем сущности из архетипов, содержащих все указанные компоненты.
+        # Стоимость пропорциональна числу подходящих сущностей, а не размеру мира
         entities = []
-        for entity_id, entity_components in self.entities.items():
-            if all(component_type in entity_components for component_type in component_types):
-                entities.append(entity_id)
+        for archetype in self._get_matching_archetypes(frozenset(component_types)):
+            entities.extend(archetype.entities)
         
         return entities
     
+    def query(self, *component_types, exclude=()):
+        """
+        Возвращает живое представление сущностей, у которых есть все указанные компоненты.
+        Представление регистрируется один раз и обновляется миром при добавлении и удалении
+        компонентов, поэтому его можно сохранить в системе и обходить каждый кадр
+        :param component_types: Типы компонентов
+        :param exclude: Типы компонентов, которых не должно быть у сущности
+        :return: Экземпляр QueryView
+        """
+        key = (frozenset(component_types), frozenset(exclude))
+        view = self.query_views.get(key)
+        if view is None:
+            view = QueryView(*key)
+            self.query_views[key] = view
+            
+            # Заполняем представление сущностями из уже существующих архетипов
+            for signature, archetype in self.archetypes.items():
+                if view.matches(signature):
+                    archetype.views.append(view)
+                    for entity_id in archetype.entities:
+                        view._add(entity_id)
+        return view
+    
+    def _get_archetype(self, signature):
+        """
+        Возвращает таблицу архетипа для набора типов, создавая ее при необходимости
+        :param signature: frozenset типов компонентов
+        :return: Экземпляр Archetype
+        """
+        archetype = self.archetypes.get(signature)
+        if archetype is None:
+            archetype = Archetype(signature)
+            self.archetypes[signature] = archetype
+            
+            # Добавляем новый архетип во все закэшированные запросы, которым он подходит
+            for query_types, matching in self.query_cache.items():
+                if query_types <= signature:
+                    matching.append(archetype)
+            
+            # И подключаем его к подходящим живым представлениям
+            for view in self.query_views.values():
+                if view.matches(signature):
+                    archetype.views.append(view)
+        return archetype
+    
+    def _get_matching_archetypes(self, query_types):
+        """
+        Возвращает список архетипов, содержащих все запрошенные типы
+        :param query_types: frozenset типов компонентов
+        :return: Список архетипов (кэшируется и обновляется при создании новых архетипов)
+        """
+        matching = self.query_cache.get(query_types)
+        if matching is None:
+            matching = [archetype for signature, archetype in self.archetypes.items()
+                        if query_types <= signature]
+            self.query_cache[query_types] = matching
+        return matching
+    
+    def _move_entity(self, entity_id, signature):
+        """
+        Переносит сущность в таблицу архетипа с новой сигнатурой
+        :param entity_id: ID сущности
+        :param signature: Новый набор типов компонентов сущности
+        """
+        old_archetype = self.entity_archetypes[entity_id]
+        new_archetype = self._get_archetype(signature)
+        if old_archetype is new_archetype:
+            return
+        
+        del old_archetype.entities[entity_id]
+        new_archetype.entities[entity_id] = None
+        self.entity_archetypes[entity_id] = new_archetype
+        
+        # Обновляем только те представления, принадлежность к которым изменилась
+        for view in old_archetype.views:
+            if view not in new_archetype.views:
+                view._discard(entity_id)
+        for view in new_archetype.views:
+            if view not in old_archetype.views:
+                view._add(entity_id)
+    
+    def add_resource(self, resource):
+        """
+        Добавляет ресурс в мир (ресурс того же типа заменяется)
+        :param resource: Экземпляр ресурса
+        """
+        self.resources[type(resource)] = resource
+    
+    def get_resource(self, resource_type):
+        """
+        Возвращает ресурс указанного типа
+        :param resource_type: Тип ресурса
+        :return: Экземпляр ресурса или None, если ресурс не добавлен
+        """
+        return self.resources.get(resource_type)
+    
+    def remove_resource(self, resource_type):
+        """
+        Удаляет ресурс указанного типа
+        :param resource_type: Тип ресурса
+        """
+        self.resources.pop(resource_type, None)
+    
     def add_system(self, system):
         """
         Добавляет систему в мир
@@ -185,11 +457,54 @@ class World:
         Обновляет все системы
         :param dt: Время, прошедшее с последнего обновления (в секундах)
         """
+        profiler = self.profiler
+        if profiler is None:
+            for system in self.systems:
+                system.update(dt)
+            return
+        
         for system in self.systems:
+            start_time = time.perf_counter_ns()
             system.update(dt)
+            profiler.record("update:" + type(system).__name__, time.perf_counter_ns() - start_time)
+    
+    def add_render_pass(self, name, callback):
+        """
+        Добавляет проход отрисовки в конец списка проходов
+        :param name: Имя прохода (используется в замерах времени)
+        :param callback: Функция без аргументов, рисующая на экране
+        """
+        self.render_passes.append((name, callback))
+    
+    def remove_render_pass(self, name):
+        """
+        Удаляет проход отрисовки
+        :param name: Имя прохода
+        """
+        self.render_passes = [render_pass for render_pass in self.render_passes if render_pass[0] != name]
+        self.render_pass_times.pop(name, None)
     
     def render(self):
-        """Запускает рендеринг всех систем"""
-        for system in self.systems:
-            if hasattr(system, 'render'):
-                system.render() 
\ No newline at end of file
+        """
+        Отрисовывает кадр: выполняет проходы отрисовки по порядку. Если проходы
+        не заданы, вызывает render всех систем в порядке их добавления
+        """
+        profiler = self.profiler
+        if not self.render_passes:
+            for system in self.systems:
+                if hasattr(system, 'render'):
+                    start_time = time.perf_counter_ns()
+                    system.render()
+                    if profiler is not None:
+                        profiler.record("render:" + type(system).__name__, time.perf_counter_ns() - start_time)
+            return
+        
+        for name, callback in self.render_passes:
+            start_time = time.perf_counter_ns()
+            callback()
+            elapsed = time.perf_counter_ns() - start_time
+            self.render_pass_times[name] = elapsed / 1e6
+            if profiler is not None:
+                # Проход выполняется один раз за кадр, в том числе в режиме перерисовки изменившихся
+                # областей (с отсечением по их объединению), поэтому замер - полное время прохода
+                profiler.record("render:" + name, elapsed)
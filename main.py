@@ -1,28 +1,13 @@
 import pygame
 import sys
-import random
 import time
 from pygame.locals import *
-from ecs.world import World
-from ecs.systems.render_system import RenderSystem
-from ecs.systems.movement_system import MovementSystem
-from ecs.systems.player_control_system import PlayerControlSystem
-from ecs.systems.collision_system import CollisionSystem
-from ecs.systems.enemy_system import EnemySystem
-from ecs.systems.weapon_system import WeaponSystem
-from ecs.systems.camera_system import CameraSystem
-from ecs.factories.player_factory import create_player
-from ecs.factories.level_factory import create_level
-from ecs.factories.enemy_factory import create_enemy
-from ecs.components.components import Position, Tile, Player, GameProgress, Health, Velocity
-from ecs.systems.enemy_ai_system import EnemyAISystem
-from ecs.systems.health_system import HealthSystem
-from ecs.systems.lighting_system import LightingSystem
-from ecs.systems.portal_system import PortalSystem
-from ecs.systems.direction_indicator_system import DirectionIndicatorSystem
-from ecs.systems.minimap_system import MinimapSystem
+from ecs.game import Game
+from ecs.components.components import Player, Health, Velocity
 from ecs.systems.menu_system import MenuSystem
 from ecs.utils.sprite_manager import sprite_manager
+from ecs.utils.text_renderer import get_text_renderer
+from ecs.utils.profiler import FrameProfiler
 
 # Состояния игры
 GAME_STATE_MENU = 0
@@ -41,157 +26,133 @@ pygame.display.set_caption("Рогалик в лабиринте")
 # Загружаем спрайты
 sprite_manager.load_sprites()
 
-# Создаем мир ECS
-world = World()
-
-# Создаем компонент прогресса игры (должен быть доступен глобально)
-game_progress = GameProgress()
-
-# Создаем системы
-camera_system = CameraSystem(world, screen_width, screen_height)
-render_system = RenderSystem(world, screen, camera_system)
-movement_system = MovementSystem(world)
-player_control_system = PlayerControlSystem(world)
-collision_system = CollisionSystem(world)
-enemy_system = EnemySystem(world)
-weapon_system = WeaponSystem(world, screen)
-enemy_ai_system = EnemyAISystem(world)
-health_system = HealthSystem(world, screen)
-portal_system = PortalSystem(world)
-direction_indicator_system = DirectionIndicatorSystem(world, screen, camera_system)
-minimap_system = MinimapSystem(world, screen)
-lighting_system = LightingSystem(world, screen, camera_system)
+# Создаем мир ECS со всеми системами
+game = Game(screen)
+world = game.world
+game_progress = game.game_progress
+camera_system = game.camera_system
+render_system = game.render_system
+player_control_system = game.player_control_system
+health_system = game.health_system
+portal_system = game.portal_system
+lighting_system = game.lighting_system
 
 # Создаем систему меню
 menu_system = MenuSystem(screen)
 
-# Добавляем системы в мир в порядке их выполнения
-world.add_system(player_control_system)
-world.add_system(enemy_ai_system)
-world.add_system(movement_system)
-world.add_system(collision_system)
-world.add_system(enemy_system)
-world.add_system(weapon_system)
-world.add_system(health_system)
-world.add_system(portal_system)
-world.add_system(camera_system)
-world.add_system(direction_indicator_system)
-world.add_system(minimap_system)
-world.add_system(render_system)
-world.add_system(lighting_system)
+# Общий кэширующий вывод текста для FPS, прогресса и справки
+hud_text = get_text_renderer(24)
 
-# Устанавливаем систему оружия для PlayerControlSystem
-player_control_system.set_weapon_system(weapon_system)
+# Профилировщик кадров: мир замеряет каждую систему и проход отрисовки
+profiler = FrameProfiler()
+world.profiler = profiler
 
-# Создаем шрифт для отображения FPS и прогресса
-fps_font = pygame.font.SysFont(None, 24)
-ui_font = pygame.font.SysFont(None, 24)
+# Флаги отображения FPS, справки и оверлея профилировщика
+show_fps = True
+show_help = False
+show_profiler = False
 
-# Текущее состояние игры (начинаем с меню)
-game_state = GAME_STATE_MENU
-menu_system.show_start()
+# Строка FPS кадра (собирается в update_hud до подготовки кадра)
+fps_text = ""
 
-def reset_game():
-    """Сбрасывает игру и создает новый уровень"""
-    global game_progress
-    
-    # Удаляем все сущности
-    world.clear_entities()
-    
-    # Сбрасываем прогресс игры
-    game_progress.reset()
+def update_hud():
+    """
+    Собирает меняющиеся элементы интерфейса до подготовки кадра и заявляет их области:
+    ширина строки FPS и размер оверлея меняются, и в режиме перерисовки изменившихся
+    областей новые пиксели должны попасть в отсечение этого же кадра
+    """
+    global fps_text
+    render_queue = render_system.render_queue
     
-    # Создаем новый уровень (лабиринт)
-    level_width = 30  # Увеличенный размер лабиринта для гарантированного создания выхода
-    level_height = 30
-    level_entities = create_level(world, level_width, level_height)
+    if show_fps:
+        # Скользящее среднее FPS по последним 30 кадрам профилировщика
+        avg_frame_time = profiler.get_average_frame_ms(30)
+        fps = 1000.0 / avg_frame_time if avg_frame_time > 0 else 0
+        fps_text = f"FPS: {fps:.1f}  Освещение: {lighting_system.frame_time_ms:.2f} мс"
+        render_queue.mark_upcoming(hud_text.get_rect(fps_text, (10, 10), cache=False))
     
-    # Находим начальную позицию (вход в лабиринт)
-    entrance_pos = None
-    for entity_id in level_entities:
-        if world.has_component(entity_id, Tile):
-            tile = world.get_component(entity_id, Tile)
-            if tile.name == "entrance":
-                entrance_pos = world.get_component(entity_id, Position)
-                break
+    if show_profiler:
+        render_queue.mark_upcoming(profiler.get_overlay_rect((10, 100), world))
+
+def render_hud():
+    """Отрисовывает FPS, прогресс игры и справку поверх кадра"""
+    # Отображаем FPS
+    if show_fps:
+        # Значение меняется каждый кадр, поэтому строка собирается из атласа глифов
+        render_system.render_queue.mark_dirty(hud_text.draw(screen, fps_text, (10, 10), (255, 255, 255), cache=False))
     
-    # Если не нашли вход, ищем любую проходимую позицию
-    if not entrance_pos:
-        walkable_positions = []
-        for entity_id in level_entities:
-            if world.has_component(entity_id, Tile):
-                tile = world.get_component(entity_id, Tile)
-                if tile.walkable:
-                    pos = world.get_component(entity_id, Position)
-                    walkable_positions.append((pos.x, pos.y))
+    # Отображаем прогресс игры
+    if hasattr(portal_system, 'game_progress'):
+        progress = portal_system.game_progress
         
-        if walkable_positions:
-            # Выбираем случайную проходимую позицию
-            x, y = random.choice(walkable_positions)
-            entrance_pos = Position(x, y)
-        else:
-            # Если не нашли проходимых позиций, используем дефолтную
-            entrance_pos = Position(100, 100)
-    
-    # Создаем игрока
-    player_id = create_player(world, entrance_pos.x, entrance_pos.y)
-    
-    # Создаем врагов в случайных местах
-    enemy_count = 3  # Начальное количество врагов
-    floor_tiles = []
-    
-    # Собираем все проходимые тайлы
-    for entity_id in level_entities:
-        if world.has_component(entity_id, Tile):
-            tile = world.get_component(entity_id, Tile)
-            if tile.walkable and tile.name == "floor":
-                pos = world.get_component(entity_id, Position)
-                floor_tiles.append((pos.x, pos.y))
+        # Отображаем информацию о прогрессе в верхнем правом углу
+        level_text = f"Уровень: {progress.level}"
+        score_text = f"Счет: {progress.total_score}"
+        kills_text = f"Убито: {progress.enemies_killed}"
+        
+        hud_text.draw(screen, level_text, (screen_width - 200, 10), (255, 255, 255))
+        hud_text.draw(screen, score_text, (screen_width - 200, 40), (255, 255, 255))
+        hud_text.draw(screen, kills_text, (screen_width - 200, 70), (255, 255, 255))
+        render_system.render_queue.mark_dirty((screen_width - 200, 10, 200, 60 + hud_text.height))
     
-    # Создаем врагов на случайных проходимых тайлах
-    if floor_tiles:
-        for _ in range(enemy_count):
-            # Выбираем случайную позицию
-            x, y = random.choice(floor_tiles)
-            
-            # Проверяем, что позиция достаточно далеко от игрока
-            player_pos = world.get_component(player_id, Position)
-            distance = ((x - player_pos.x) ** 2 + (y - player_pos.y) ** 2) ** 0.5
-            
-            # Если позиция слишком близко к игроку, пробуем другую
-            attempts = 0
-            while distance < 200 and attempts < 10:
-                x, y = random.choice(floor_tiles)
-                distance = ((x - player_pos.x) ** 2 + (y - player_pos.y) ** 2) ** 0.5
-                attempts += 1
-            
-            # Создаем врага
-            create_enemy(world, x, y)
+    # Отображаем справку, если она включена
+    if show_help:
+        help_texts = [
+            "Управление:",
+            "WASD - движение",
+            "ЛКМ - стрелять",
+            "R - сбросить игру",
+            "F1 - режим отладки",
+            "F2 - показать/скрыть FPS",
+            "F3 - профилировщик систем",
+            "F4 - сохранить замеры кадров в CSV",
+            "H - показать/скрыть справку",
+            "+/- - изменить масштаб",
+            "F5 - перерисовка только изменившихся областей",
+            "F6 - упрощенное затемнение (виньетка)",
+            "",
+            "Настройка фонарика:",
+            "1/2 - увеличить/уменьшить угол обзора",
+            "3/4 - увеличить/уменьшить дальность",
+            "5/6 - увеличить/уменьшить мерцание",
+            "7/8 - увеличить/уменьшить затемнение",
+            "9 - включить/выключить режим 'только свет вокруг игрока'",
+            "0/Backspace - увеличить/уменьшить радиус света вокруг игрока"
+        ]
+        
+        y_offset = 50
+        for text in help_texts:
+            render_system.render_queue.mark_dirty(hud_text.draw(screen, text, (screen_width - 350, y_offset), (255, 255, 255)))
+            y_offset += 25
     
-    # Устанавливаем камеру на игрока
-    camera_system.follow(player_id)
+    # Отображаем оверлей профилировщика
+    if show_profiler:
+        render_system.render_queue.mark_dirty(profiler.render_overlay(screen, (10, 100), world))
+
+# Проходы отрисовки кадра и интерфейс поверх них
+game.add_render_passes()
+world.add_render_pass("hud", render_hud)
+
+# Текущее состояние игры (начинаем с меню)
+game_state = GAME_STATE_MENU
+menu_system.show_start()
+
+def reset_game():
+    """Сбрасывает игру и создает новый уровень"""
+    # Замеры прошлой игры (и время, проведенное в меню) не смешиваются с новыми
+    profiler.reset()
     
-    # Передаем компонент прогресса в систему порталов
-    portal_system.game_progress = game_progress
+    # Лабиринт увеличенного размера для гарантированного создания выхода
+    game.reset(level_width=30, level_height=30, enemy_count=3)
     
-    # Помечаем кэш стен как устаревший, чтобы обновить его
-    if hasattr(lighting_system, 'wall_cache_dirty'):
-        lighting_system.wall_cache_dirty = True
-        
     print(f"Игра сброшена. Прогресс: уровень={game_progress.level}, счет={game_progress.total_score}, убито={game_progress.enemies_killed}")
 
 # Основной игровой цикл
 clock = pygame.time.Clock()
 running = True
-show_fps = True
-show_help = False
 target_fps = 60
-frame_times = []  # Для расчета скользящего среднего FPS
 
 while running:
-    # Замеряем время начала кадра
-    frame_start_time = time.time()
-    
     # Получаем список событий
     events = pygame.event.get()
     
@@ -213,8 +174,9 @@ while running:
             # Выходим из игры
             running = False
         
-        # Отрисовываем меню
+        # Отрисовываем меню (после возврата в игру кадр перерисовывается целиком)
         menu_system.render()
+        render_system.request_full_redraw()
         pygame.display.flip()
         continue  # Пропускаем остальную часть цикла
     
@@ -234,6 +196,7 @@ while running:
         
         # Отрисовываем экран окончания игры
         menu_system.render()
+        render_system.request_full_redraw()
         pygame.display.flip()
         continue  # Пропускаем остальную часть цикла
     
@@ -242,6 +205,9 @@ while running:
         # Обработка событий
         for event in events:
             if event.type == pygame.KEYDOWN:
+                # Клавиши меняют настройки отрисовки, поэтому следующий кадр перерисовывается целиком
+                render_system.request_full_redraw()
+                
                 if event.key == pygame.K_ESCAPE:
                     # Вместо выхода из игры показываем меню
                     game_state = GAME_STATE_MENU
@@ -256,6 +222,22 @@ while running:
                 elif event.key == pygame.K_F2:
                     # Включение/выключение отображения FPS
                     show_fps = not show_fps
+                elif event.key == pygame.K_F3:
+                    # Включение/выключение оверлея профилировщика
+                    show_profiler = not show_profiler
+                elif event.key == pygame.K_F4:
+                    # Сохранение замеров последних кадров в CSV
+                    csv_path = time.strftime("profile_%Y%m%d_%H%M%S.csv")
+                    frames = profiler.dump_csv(csv_path)
+                    print(f"Замеры {frames} кадров сохранены в {csv_path}")
+                elif event.key == pygame.K_F5:
+                    # Включение/выключение перерисовки только изменившихся областей
+                    render_system.dirty_rects_enabled = not render_system.dirty_rects_enabled
+                    print(f"Перерисовка изменившихся областей: {'включена' if render_system.dirty_rects_enabled else 'выключена'}")
+                elif event.key == pygame.K_F6:
+                    # Переключение упрощенного затемнения
+                    render_system.vignette_only = not render_system.vignette_only
+                    print(f"Упрощенное затемнение: {'включено' if render_system.vignette_only else 'выключено'}")
                 elif event.key == pygame.K_h:
                     # Включение/выключение справки
                     show_help = not show_help
@@ -274,23 +256,25 @@ while running:
                     # Увеличение угла обзора фонарика
                     if hasattr(lighting_system, 'fov'):
                         lighting_system.fov = min(360, lighting_system.fov + 10)
-                        lighting_system.update_ray_angles()
+                        lighting_system.update_light_cone()
                         print(f"Угол обзора фонарика: {lighting_system.fov}°")
                 elif event.key == pygame.K_2:
                     # Уменьшение угла обзора фонарика
                     if hasattr(lighting_system, 'fov'):
                         lighting_system.fov = max(30, lighting_system.fov - 10)
-                        lighting_system.update_ray_angles()
+                        lighting_system.update_light_cone()
                         print(f"Угол обзора фонарика: {lighting_system.fov}°")
                 elif event.key == pygame.K_3:
                     # Увеличение дальности фонарика
                     if hasattr(lighting_system, 'max_ray_length'):
                         lighting_system.max_ray_length += 50
+                        lighting_system.update_light_cone()
                         print(f"Дальность фонарика: {lighting_system.max_ray_length}")
                 elif event.key == pygame.K_4:
                     # Уменьшение дальности фонарика
                     if hasattr(lighting_system, 'max_ray_length'):
                         lighting_system.max_ray_length = max(100, lighting_system.max_ray_length - 50)
+                        lighting_system.update_light_cone()
                         print(f"Дальность фонарика: {lighting_system.max_ray_length}")
                 elif event.key == pygame.K_5:
                     # Увеличение интенсивности мерцания
@@ -338,8 +322,11 @@ while running:
                         player_health.current = 0
                         print("Тестовое убийство игрока")
             elif event.type == pygame.VIDEORESIZE:
-                # Обновляем поверхность затемнения при изменении размера окна
+                # Обновляем поверхности затемнения и видимую область камеры при изменении размера окна
                 render_system.update_darkness_surface()
+                lighting_system.resize(event.w, event.h)
+                render_system.request_full_redraw()
+                camera_system.set_screen_size(event.w, event.h)
         
         # Получаем время, прошедшее с последнего кадра
         dt = clock.tick(target_fps) / 1000.0  # Конвертируем миллисекунды в секунды
@@ -370,75 +357,22 @@ while running:
                     velocity.dy = 0
                 continue
         
-        # Отрисовываем все системы
-        screen.fill((0, 0, 0))  # Очищаем экран
-        
-        # Вызываем методы render для всех систем
-        for system in world.systems:
-            if hasattr(system, 'render'):
-                system.render(camera_system)
-        
-        # Отображаем FPS
-        if show_fps:
-            # Вычисляем скользящее среднее FPS
-            frame_time = time.time() - frame_start_time
-            frame_times.append(frame_time)
-            if len(frame_times) > 30:  # Усредняем по последним 30 кадрам
-                frame_times.pop(0)
-            avg_frame_time = sum(frame_times) / len(frame_times)
-            fps = 1.0 / avg_frame_time if avg_frame_time > 0 else 0
-            
-            # Отображаем FPS
-            fps_text = f"FPS: {fps:.1f}"
-            fps_surface = fps_font.render(fps_text, True, (255, 255, 255))
-            screen.blit(fps_surface, (10, 10))
-        
-        # Отображаем прогресс игры
-        if hasattr(portal_system, 'game_progress'):
-            progress = portal_system.game_progress
-            
-            # Отображаем информацию о прогрессе в верхнем правом углу
-            level_text = f"Уровень: {progress.level}"
-            score_text = f"Счет: {progress.total_score}"
-            kills_text = f"Убито: {progress.enemies_killed}"
-            
-            level_surface = ui_font.render(level_text, True, (255, 255, 255))
-            score_surface = ui_font.render(score_text, True, (255, 255, 255))
-            kills_surface = ui_font.render(kills_text, True, (255, 255, 255))
-            
-            screen.blit(level_surface, (screen_width - 200, 10))
-            screen.blit(score_surface, (screen_width - 200, 40))
-            screen.blit(kills_surface, (screen_width - 200, 70))
+        # Отрисовываем кадр всеми проходами отрисовки. В режиме перерисовки изменившихся
+        # областей на экран выводятся только они
+        update_hud()
+        dirty_rects = render_system.prepare_frame()
+        if dirty_rects is None:
+            world.render()
+            pygame.display.flip()
+        else:
+            # Проходы выполняются один раз с отсечением по объединению областей
+            if dirty_rects:
+                screen.set_clip(dirty_rects[0].unionall(dirty_rects[1:]))
+                world.render()
+                screen.set_clip(None)
+            pygame.display.update(dirty_rects)
         
-        # Отображаем справку, если она включена
-        if show_help:
-            help_texts = [
-                "Управление:",
-                "WASD - движение",
-                "ЛКМ - стрелять",
-                "R - сбросить игру",
-                "F1 - режим отладки",
-                "F2 - показать/скрыть FPS",
-                "H - показать/скрыть справку",
-                "+/- - изменить масштаб",
-                "",
-                "Настройка фонарика:",
-                "1/2 - увеличить/уменьшить угол обзора",
-                "3/4 - увеличить/уменьшить дальность",
-                "5/6 - увеличить/уменьшить мерцание",
-                "7/8 - увеличить/уменьшить затемнение",
-                "9 - включить/выключить режим 'только свет вокруг игрока'",
-                "0/Backspace - увеличить/уменьшить радиус света вокруг игрока"
-            ]
-            
-            y_offset = 50
-            for text in help_texts:
-                help_surface = ui_font.render(text, True, (255, 255, 255))
-                screen.blit(help_surface, (screen_width - 350, y_offset))
-                y_offset += 25
-    
-    # Обновляем экран
-    pygame.display.flip()
+        profiler.end_frame(len(world.entities))
 
 # Завершение работы
 pygame.quit()